@@ -1,12 +1,24 @@
 from .auth import (
     get_password_hash,
     verify_password,
+    verify_and_update_password,
     create_access_token,
-    get_current_user
+    create_user_token,
+    get_current_user,
+    authenticate_token,
+    revoke_user_tokens,
+    invalidate_token_versions,
+    Principal
 )
 __all__ = [
     "get_password_hash",
     "verify_password",
+    "verify_and_update_password",
     "create_access_token",
-    "get_current_user"
+    "create_user_token",
+    "get_current_user",
+    "authenticate_token",
+    "revoke_user_tokens",
+    "invalidate_token_versions",
+    "Principal"
 ]
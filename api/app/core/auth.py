@@ -1,17 +1,26 @@
 # auth_utils.py
 from dotenv import load_dotenv
+import asyncio
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 
 from fastapi import Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from sqlalchemy import update
 
 from passlib.context import CryptContext
 from jose import jwt, JWTError
 
 from app import models, db
 from app.schemas.oauth2 import oauth2_scheme 
+from app.core.cache import TTLCache, MISSING
+from app.core import metrics
+from app.core.pubsub import Broker
 
 # Cargar variables de entorno
 load_dotenv()
@@ -21,46 +30,211 @@ SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 60))
 
+# Tabla de versiones de token cacheada; las revocaciones se publican por el broker (invalidate_token_versions)
+TOKEN_VERSION_CACHE_TTL_SECONDS = float(os.getenv("TOKEN_VERSION_CACHE_TTL_SECONDS", 30))
+TOKEN_VERSION_CACHE_SIZE = int(os.getenv("TOKEN_VERSION_CACHE_SIZE", 10_000))
+
+# Configuración de hashing: si cambia BCRYPT_ROUNDS, los hashes se regeneran en el siguiente login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", min(4, os.cpu_count() or 1)))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", 32))
+
 # Contexto de hashing de contraseñas
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS,
+)
+
+# bcrypt libera el GIL, así que un pool de hilos basta para sacarlo del event loop.
+# Se crea en el startup (o en el primer hash, en scripts) y se vuelve a crear si la app arranca otra vez
+_hash_executor: ThreadPoolExecutor | None = None
+_pending_hashes = 0
+_pending_lock = threading.Lock()
+
+HASH_LATENCY = metrics.Histogram("password_hash_seconds", "Duración de las operaciones bcrypt")
+HASH_QUEUE_WAIT = metrics.Histogram("password_hash_queue_wait_seconds", "Espera en cola antes de ejecutar bcrypt")
+HASH_REJECTED = metrics.Counter("password_hash_rejected_total", "Operaciones bcrypt rechazadas por saturación")
+
+
+async def _run_hash(op: str, fn, *args):
+    global _pending_hashes
+    if _pending_hashes >= PASSWORD_HASH_MAX_PENDING:
+        HASH_REJECTED.inc(op=op)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server busy, try again later",
+            headers={"Retry-After": "1"},
+        )
+
+    queued_at = time.perf_counter()
+
+    def job():
+        started_at = time.perf_counter()
+        HASH_QUEUE_WAIT.observe(started_at - queued_at, op=op)
+        try:
+            return fn(*args)
+        finally:
+            HASH_LATENCY.observe(time.perf_counter() - started_at, op=op)
+
+    # El hueco se libera cuando termina el hilo, no cuando la petición deja de esperar: si el cliente se
+    # desconecta, bcrypt sigue ocupando el hilo (y el límite tiene que seguir contándolo)
+    with _pending_lock:
+        _pending_hashes += 1
+    future = start_hash_executor().submit(job)
+    future.add_done_callback(_release_hash_slot)
+    return await asyncio.wrap_future(future)
+
+
+def _release_hash_slot(_future) -> None:
+    global _pending_hashes
+    with _pending_lock:
+        _pending_hashes -= 1
+
+
+def start_hash_executor() -> ThreadPoolExecutor:
+    global _hash_executor
+    if _hash_executor is None:
+        _hash_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
+    return _hash_executor
+
+
+def shutdown_hash_executor() -> None:
+    global _hash_executor
+    if _hash_executor is not None:
+        _hash_executor.shutdown(wait=True)
+        _hash_executor = None
+
 
 # Utils
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return await _run_hash("verify", pwd_context.verify, plain_password, hashed_password)
+
+# 👉 Devuelve (válida, nuevo_hash); nuevo_hash no es None si el hash guardado usa otro coste
+async def verify_and_update_password(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    return await _run_hash("verify", pwd_context.verify_and_update, plain_password, hashed_password)
 
-def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+async def get_password_hash(password: str) -> str:
+    return await _run_hash("hash", pwd_context.hash, password)
 def create_access_token(data: dict, expires_delta: timedelta | None = None) -> str:
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
+# 👉 Token con los claims necesarios para no consultar la tabla users en cada request
+def create_user_token(user: models.User) -> str:
+    return create_access_token({
+        "sub": user.email,
+        "uid": user.id,
+        "username": user.username,
+        "ver": user.token_version or 0,
+    })
+
 # Ejemplo de uso:
-# create_access_token({"sub": user.email})
+# create_user_token(user)
 from fastapi.security import HTTPAuthorizationCredentials
 
+
+# 👉 Usuario autenticado construido a partir de los claims del token
+@dataclass(frozen=True)
+class Principal:
+    id: int
+    email: str
+    username: str
+
+
+# 👉 Versiones de token por usuario (None = usuario borrado)
+_token_versions = TTLCache(maxsize=TOKEN_VERSION_CACHE_SIZE, ttl=TOKEN_VERSION_CACHE_TTL_SECONDS)
+TOKEN_CHANNEL = "token_invalidations"
+_token_broker: Broker | None = None
+
+async def get_token_version(db_sess: AsyncSession, user_id: int) -> int | None:
+    version = _token_versions.get(user_id)
+    if version is MISSING:
+        result = await db_sess.execute(
+            select(models.User.token_version).filter(models.User.id == user_id)
+        )
+        version = result.scalar_one_or_none()
+        _token_versions.set(user_id, version)
+    return version
+
+# 👉 Invalida todos los tokens emitidos para el usuario (cerrar sesión en todos los dispositivos, cambio de contraseña).
+#    Hace commit: la invalidación solo se publica cuando la nueva versión ya es visible para los demás workers
+async def revoke_user_tokens(db_sess: AsyncSession, user_id: int) -> None:
+    await db_sess.execute(
+        update(models.User)
+        .where(models.User.id == user_id)
+        .values(token_version=models.User.token_version + 1)
+    )
+    await db_sess.commit()
+    await invalidate_token_versions(user_id)
+
+
+def _drop_token_versions(user_id: int | None) -> None:
+    if user_id is None:
+        _token_versions.clear()
+    else:
+        _token_versions.pop(user_id)
+
+
+def _on_token_invalidation(message: dict) -> None:
+    _drop_token_versions(message.get("user_id"))
+
+
+# 👉 Llamar después del commit que cambia token_version o borra usuarios (sin argumentos = todos).
+#    Se publica por el broker: los demás workers dejan de aceptar los tokens sin esperar al TTL
+#    (el TTL solo cubre cambios hechos directamente en la base de datos o mensajes perdidos)
+async def invalidate_token_versions(user_id: int | None = None) -> None:
+    _drop_token_versions(user_id)
+    if _token_broker is not None:
+        await _token_broker.publish(TOKEN_CHANNEL, {"user_id": user_id})
+
+
+# 👉 Se llama en el startup para recibir las invalidaciones de otros workers
+def setup_token_cache(broker: Broker) -> None:
+    global _token_broker
+    _token_broker = broker
+    broker.subscribe(TOKEN_CHANNEL, _on_token_invalidation)
+
+
 async def get_current_user(
     token: HTTPAuthorizationCredentials = Depends(oauth2_scheme),
     db_sess: AsyncSession = Depends(db.get_db)
-):
+) -> Principal:
+    return await authenticate_token(token.credentials, db_sess)
+
+
+# 👉 JWT -> Principal (misma validación para HTTP y WebSocket); 401 si no es válido
+async def authenticate_token(token: str, db_sess: AsyncSession) -> Principal:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(token.credentials, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         email: str = payload.get("sub")
         if email is None:
             raise credentials_exception
     except JWTError:
         raise credentials_exception
 
-    result = await db_sess.execute(select(models.User).filter(models.User.email == email))
-    user = result.scalar_one_or_none()
-    if user is None:
+    user_id = payload.get("uid")
+    if user_id is None:
+        # Tokens antiguos (solo "sub"): se resuelven contra la base de datos
+        result = await db_sess.execute(select(models.User).filter(models.User.email == email))
+        user = result.scalar_one_or_none()
+        if user is None:
+            raise credentials_exception
+        return Principal(id=user.id, email=user.email, username=user.username)
+
+    # Fast path: sin SELECT salvo cuando la versión no está en caché
+    version = await get_token_version(db_sess, user_id)
+    if version is None or version != payload.get("ver", 0):
         raise credentials_exception
-    return user
+    return Principal(id=user_id, email=email, username=payload.get("username"))
 
 
@@ -0,0 +1,77 @@
+# app/core/body.py
+# Lectura del cuerpo de las peticiones con límite de tamaño y parseo con orjson
+# Cuerpos con Content-Encoding: gzip / zstd se descomprimen aquí (el límite vale para los bytes ya descomprimidos)
+import os
+
+import orjson
+from fastapi import HTTPException, Request
+from fastapi.routing import APIRoute
+
+from app.core import compression
+
+MAX_BODY_BYTES = int(os.getenv("MAX_BODY_BYTES", 5 * 1024 * 1024))
+
+
+def _too_large(limit: int) -> HTTPException:
+    return HTTPException(status_code=413, detail=f"Payload too large (max {limit} bytes)")
+
+
+# 👉 Límite propio para un endpoint concreto (p.ej. importaciones masivas)
+def max_body_size(limit: int):
+    def decorator(endpoint):
+        endpoint.max_body_bytes = limit
+        return endpoint
+    return decorator
+
+
+class ORJSONRequest(Request):
+    max_body_bytes = MAX_BODY_BYTES
+
+    async def body(self) -> bytes:
+        if not hasattr(self, "_body"):
+            limit = self.max_body_bytes
+            declared = self.headers.get("content-length")
+            if declared and declared.isdigit() and int(declared) > limit:
+                raise _too_large(limit)
+            chunks = []
+            size = 0
+            async for chunk in self.stream():
+                size += len(chunk)
+                if size > limit:
+                    raise _too_large(limit)
+                chunks.append(chunk)
+            self._body = self._decode(b"".join(chunks), limit)
+        return self._body
+
+    def _decode(self, body: bytes, limit: int) -> bytes:
+        encoding = self.headers.get("content-encoding", "identity").strip().lower()
+        if encoding == "identity" or not body:
+            return body
+        if encoding not in compression.ENCODINGS:
+            raise HTTPException(status_code=415, detail=f"Unsupported Content-Encoding: {encoding}")
+        try:
+            return compression.decompress(body, encoding, max_size=limit)
+        except compression.DecompressedTooLarge:
+            raise _too_large(limit)
+        except compression.DecompressionError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    async def json(self):
+        if not hasattr(self, "_json"):
+            # orjson.JSONDecodeError hereda de json.JSONDecodeError: FastAPI lo sigue tratando como 422
+            self._json = orjson.loads(await self.body())
+        return self._json
+
+
+# 👉 route_class para los routers: todos los cuerpos JSON pasan por ORJSONRequest
+class ORJSONRoute(APIRoute):
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+        limit = getattr(self.endpoint, "max_body_bytes", MAX_BODY_BYTES)
+
+        async def orjson_handler(request: Request):
+            orjson_request = ORJSONRequest(request.scope, request.receive)
+            orjson_request.max_body_bytes = limit
+            return await handler(orjson_request)
+
+        return orjson_handler
@@ -0,0 +1,93 @@
+# app/core/cache.py
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+# Marca para distinguir "no está en caché" de un valor None cacheado
+MISSING = object()
+
+
+# 👉 Caché LRU acotada con expiración por entrada (en memoria del proceso)
+class TTLCache:
+    def __init__(self, maxsize: int, ttl: float, timer: Callable[[], float] = time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._timer = timer
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = MISSING) -> Any:
+        entry = self._data.get(key)
+        if entry is None:
+            return default
+        expires_at, value = entry
+        if expires_at <= self._timer():
+            del self._data[key]
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        self._data[key] = (self._timer() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        self._data.pop(key, None)
+
+    def discard_where(self, predicate: Callable[[Hashable], bool]) -> None:
+        for key in [k for k in self._data if predicate(k)]:
+            del self._data[key]
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+# 👉 Caché LRU acotada por el tamaño total (en bytes) de los valores
+class ByteLRUCache:
+    def __init__(self, max_bytes: int, sizeof: Callable[[Any], int] = len):
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof
+        self._data: OrderedDict[Hashable, Any] = OrderedDict()
+        self._size = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        value = self._data.get(key, MISSING)
+        if value is MISSING:
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        size = self._sizeof(value)
+        self.pop(key)
+        if size > self.max_bytes:
+            return
+        self._data[key] = value
+        self._size += size
+        while self._size > self.max_bytes:
+            _, evicted = self._data.popitem(last=False)
+            self._size -= self._sizeof(evicted)
+
+    def pop(self, key: Hashable) -> None:
+        value = self._data.pop(key, MISSING)
+        if value is not MISSING:
+            self._size -= self._sizeof(value)
+
+    def discard_where(self, predicate: Callable[[Hashable, Any], bool]) -> None:
+        for key in [k for k, v in self._data.items() if predicate(k, v)]:
+            self.pop(key)
+
+    def clear(self) -> None:
+        self._data.clear()
+        self._size = 0
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -0,0 +1,127 @@
+# app/core/compression.py
+# Compresión de los datos de jugadas (las animaciones de Unity son JSON grandes y muy repetitivos)
+#
+#   Almacenamiento: PLAY_DATA_COMPRESSION=none|gzip|zstd comprime data_json en Mongo a partir de
+#                   PLAY_DATA_COMPRESSION_MIN_BYTES (solo con PLAY_DATA_STORAGE=both|json)
+#   Respuestas:     Content-Encoding según el Accept-Encoding del cliente (zstd > gzip), a partir de
+#                   RESPONSE_COMPRESSION_MIN_BYTES
+#   Peticiones:     cuerpos con Content-Encoding: gzip / zstd se descomprimen antes de parsear (ver app.core.body)
+import gzip
+import os
+import zlib
+
+try:
+    import zstandard
+except ImportError:  # opcional: sin zstandard solo se usa gzip
+    zstandard = None
+
+PLAY_DATA_COMPRESSION = os.getenv("PLAY_DATA_COMPRESSION", "none")
+PLAY_DATA_COMPRESSION_MIN_BYTES = int(os.getenv("PLAY_DATA_COMPRESSION_MIN_BYTES", 16 * 1024))
+RESPONSE_COMPRESSION_MIN_BYTES = int(os.getenv("RESPONSE_COMPRESSION_MIN_BYTES", 4 * 1024))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", 6))
+ZSTD_LEVEL = int(os.getenv("ZSTD_LEVEL", 3))
+
+# Por orden de preferencia
+ENCODINGS = ("zstd", "gzip") if zstandard is not None else ("gzip",)
+
+if PLAY_DATA_COMPRESSION not in ("none", "gzip", "zstd"):
+    raise ValueError(f"❌ PLAY_DATA_COMPRESSION desconocido: {PLAY_DATA_COMPRESSION}")
+if PLAY_DATA_COMPRESSION == "zstd" and zstandard is None:
+    raise ValueError("❌ PLAY_DATA_COMPRESSION=zstd requiere el paquete zstandard")
+
+
+class DecompressionError(ValueError):
+    pass
+
+
+class DecompressedTooLarge(DecompressionError):
+    pass
+
+
+def compress(raw: bytes, encoding: str) -> bytes:
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(raw)
+    if encoding == "gzip":
+        # mtime=0: misma entrada -> mismos bytes
+        return gzip.compress(raw, compresslevel=GZIP_LEVEL, mtime=0)
+    raise ValueError(f"Unsupported encoding: {encoding}")
+
+
+# 👉 max_size: tope del resultado (protege de "bombas" de compresión en los cuerpos de las peticiones)
+def decompress(blob: bytes, encoding: str, max_size: int | None = None) -> bytes:
+    limit = max_size + 1 if max_size is not None else -1
+    if encoding == "zstd" and zstandard is not None:
+        try:
+            chunks, size = [], 0
+            with zstandard.ZstdDecompressor().stream_reader(blob) as reader:
+                while chunk := reader.read(64 * 1024):
+                    chunks.append(chunk)
+                    size += len(chunk)
+                    if max_size is not None and size > max_size:
+                        break
+            raw = b"".join(chunks)
+        except zstandard.ZstdError as e:
+            raise DecompressionError(f"Invalid zstd body: {e}") from e
+    elif encoding == "gzip":
+        try:
+            raw = zlib.decompressobj(wbits=31).decompress(blob, max(limit, 0))
+        except zlib.error as e:
+            raise DecompressionError(f"Invalid gzip body: {e}") from e
+    else:
+        raise DecompressionError(f"Unsupported Content-Encoding: {encoding}")
+    if max_size is not None and len(raw) > max_size:
+        raise DecompressedTooLarge(f"Decompressed body too large (max {max_size} bytes)")
+    return raw
+
+
+# 👉 Codificación de una respuesta de `size` bytes (None = sin comprimir: cliente sin soporte o cuerpo pequeño)
+def response_encoding(accept_encoding: str | None, size: int) -> str | None:
+    if size < RESPONSE_COMPRESSION_MIN_BYTES:
+        return None
+    return negotiate(accept_encoding)
+
+
+# 👉 Compresión por trozos (respuestas en streaming): cada trozo se vacía para que el cliente pueda ir procesándolo
+async def compress_stream(chunks, encoding: str):
+    if encoding == "zstd":
+        compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+        flush_block = zstandard.COMPRESSOBJ_FLUSH_BLOCK
+    else:
+        compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        flush_block = zlib.Z_SYNC_FLUSH
+    async for chunk in chunks:
+        data = compressor.compress(chunk) + compressor.flush(flush_block)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+# 👉 Codificación con la que se guarda data_json (None = sin comprimir)
+def storage_encoding(raw: bytes) -> str | None:
+    if PLAY_DATA_COMPRESSION == "none" or len(raw) < PLAY_DATA_COMPRESSION_MIN_BYTES:
+        return None
+    return PLAY_DATA_COMPRESSION
+
+
+# 👉 Mejor codificación aceptada por el cliente ("gzip, deflate, br, zstd;q=0.9" -> "zstd")
+def negotiate(accept_encoding: str | None) -> str | None:
+    if not accept_encoding:
+        return None
+    accepted: dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    candidates = [
+        encoding for encoding in ENCODINGS
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0
+    ]
+    if not candidates:
+        return None
+    return max(candidates, key=lambda encoding: accepted.get(encoding, accepted.get("*", 0.0)))
@@ -0,0 +1,298 @@
+# app/core/jsonpatch.py
+# JSON Patch (RFC 6902) y JSON Merge Patch (RFC 7386), y su traducción a operadores de update de Mongo
+import copy
+from typing import Any
+
+
+class PatchError(ValueError):
+    pass
+
+
+# ---------------- JSON Pointer ----------------
+def parse_pointer(pointer: str) -> list[str]:
+    if pointer == "":
+        return []
+    if not pointer.startswith("/"):
+        raise PatchError(f"Invalid JSON pointer: {pointer}")
+    return [token.replace("~1", "/").replace("~0", "~") for token in pointer[1:].split("/")]
+
+
+def _array_index(container: list, token: str, allow_end: bool) -> int:
+    if token == "-" and allow_end:
+        return len(container)
+    if not token.isdigit() or (token != "0" and token.startswith("0")):
+        raise PatchError(f"Invalid array index: {token}")
+    index = int(token)
+    if index > len(container) or (index == len(container) and not allow_end):
+        raise PatchError(f"Array index out of range: {token}")
+    return index
+
+
+def _resolve(doc: Any, tokens: list[str]) -> Any:
+    for token in tokens:
+        if isinstance(doc, dict):
+            if token not in doc:
+                raise PatchError(f"Path not found: /{'/'.join(tokens)}")
+            doc = doc[token]
+        elif isinstance(doc, list):
+            doc = doc[_array_index(doc, token, allow_end=False)]
+        else:
+            raise PatchError(f"Path not found: /{'/'.join(tokens)}")
+    return doc
+
+
+def _add(doc: Any, tokens: list[str], value: Any) -> Any:
+    if not tokens:
+        return value
+    parent = _resolve(doc, tokens[:-1])
+    key = tokens[-1]
+    if isinstance(parent, dict):
+        parent[key] = value
+    elif isinstance(parent, list):
+        parent.insert(_array_index(parent, key, allow_end=True), value)
+    else:
+        raise PatchError(f"Cannot add to /{'/'.join(tokens)}")
+    return doc
+
+
+def _remove(doc: Any, tokens: list[str]) -> Any:
+    if not tokens:
+        raise PatchError("Cannot remove the root document")
+    parent = _resolve(doc, tokens[:-1])
+    key = tokens[-1]
+    if isinstance(parent, dict):
+        if key not in parent:
+            raise PatchError(f"Path not found: /{'/'.join(tokens)}")
+        return parent.pop(key)
+    if isinstance(parent, list):
+        return parent.pop(_array_index(parent, key, allow_end=False))
+    raise PatchError(f"Path not found: /{'/'.join(tokens)}")
+
+
+# 👉 Igualdad de JSON (RFC 6902, op "test"): mismo tipo JSON y mismo valor, recursivamente.
+#    En Python True == 1 y {"a": 1} == {"a": True}; aquí no. Los números se comparan por valor (1 y 1.0 son iguales)
+def json_equal(a: Any, b: Any) -> bool:
+    if isinstance(a, bool) or isinstance(b, bool):
+        return isinstance(a, bool) and isinstance(b, bool) and a == b
+    if isinstance(a, (int, float)) and isinstance(b, (int, float)):
+        return a == b
+    if isinstance(a, dict) and isinstance(b, dict):
+        return a.keys() == b.keys() and all(json_equal(a[key], b[key]) for key in a)
+    if isinstance(a, list) and isinstance(b, list):
+        return len(a) == len(b) and all(json_equal(x, y) for x, y in zip(a, b))
+    if a is None or b is None:
+        return a is None and b is None
+    return type(a) is type(b) and a == b
+
+
+# 👉 Aplica una lista de operaciones RFC 6902; devuelve el documento nuevo (no modifica el original)
+# 👉 in_place=True modifica `doc` sin copiarlo (para documentos grandes que ya son del llamador):
+#    si una operación falla, `doc` queda a medias y el llamador debe descartarlo
+def apply_patch(doc: Any, operations: list[dict], in_place: bool = False) -> Any:
+    if not in_place:
+        doc = copy.deepcopy(doc)
+    for operation in operations:
+        if not isinstance(operation, dict) or "op" not in operation or "path" not in operation:
+            raise PatchError("Each operation needs 'op' and 'path'")
+        op = operation["op"]
+        tokens = parse_pointer(operation["path"])
+        if op in ("add", "replace", "test") and "value" not in operation:
+            raise PatchError(f"'{op}' needs a value")
+
+        if op == "add":
+            doc = _add(doc, tokens, copy.deepcopy(operation["value"]))
+        elif op == "remove":
+            _remove(doc, tokens)
+        elif op == "replace":
+            if tokens:
+                _remove(doc, tokens)
+            doc = _add(doc, tokens, copy.deepcopy(operation["value"]))
+        elif op in ("move", "copy"):
+            from_tokens = parse_pointer(operation.get("from", ""))
+            if op == "move":
+                if tokens[:len(from_tokens)] == from_tokens and tokens != from_tokens:
+                    raise PatchError("Cannot move a value into one of its children")
+                value = _remove(doc, from_tokens)
+            else:
+                value = copy.deepcopy(_resolve(doc, from_tokens))
+            doc = _add(doc, tokens, value)
+        elif op == "test":
+            if not json_equal(_resolve(doc, tokens), operation["value"]):
+                raise PatchError(f"Test failed at {operation['path']}")
+        else:
+            raise PatchError(f"Unknown operation: {op}")
+    return doc
+
+
+# 👉 RFC 7386: null borra, los objetos se mezclan recursivamente, el resto reemplaza
+#    in_place=True: igual que en apply_patch (el objeto raíz se reutiliza si ya es un objeto)
+def apply_merge_patch(target: Any, patch: Any, in_place: bool = False) -> Any:
+    if not isinstance(patch, dict):
+        return copy.deepcopy(patch)
+    if not isinstance(target, dict):
+        result = {}
+    else:
+        result = target if in_place else copy.deepcopy(target)
+    for key, value in patch.items():
+        if value is None:
+            result.pop(key, None)
+        else:
+            # result ya es una copia propia: los niveles de abajo no se vuelven a copiar
+            result[key] = apply_merge_patch(result.get(key), value, in_place=True)
+    return result
+
+
+# 👉 Diferencia mínima entre dos documentos como operaciones RFC 6902
+def make_patch(source: Any, target: Any, path: str = "") -> list[dict]:
+    if source == target:
+        return []
+    if isinstance(source, dict) and isinstance(target, dict):
+        operations = []
+        for key in source:
+            child = f"{path}/{_escape(key)}"
+            if key not in target:
+                operations.append({"op": "remove", "path": child})
+            else:
+                operations.extend(make_patch(source[key], target[key], child))
+        for key in target:
+            if key not in source:
+                operations.append({"op": "add", "path": f"{path}/{_escape(key)}", "value": target[key]})
+        return operations
+    if isinstance(source, list) and isinstance(target, list) and len(source) == len(target):
+        operations = []
+        for index, (a, b) in enumerate(zip(source, target)):
+            operations.extend(make_patch(a, b, f"{path}/{index}"))
+        return operations
+    if isinstance(source, list) and isinstance(target, list) and len(target) > len(source) \
+            and target[:len(source)] == source:
+        return [{"op": "add", "path": f"{path}/-", "value": value} for value in target[len(source):]]
+    return [{"op": "replace", "path": path, "value": target}]
+
+
+def _escape(token: str) -> str:
+    return token.replace("~", "~0").replace("/", "~1")
+
+
+# ---------------- Traducción a Mongo ----------------
+def _mongo_key(tokens: list[str], prefix: str) -> str | None:
+    for token in tokens:
+        # Claves que Mongo no puede direccionar con notación de puntos
+        if token == "" or "." in token or token.startswith("$"):
+            return None
+    return ".".join([prefix, *tokens])
+
+
+# Mongo rechaza un update que toca la misma ruta dos veces o una ruta y una de sus hijas
+def _conflicts(paths: list[str]) -> bool:
+    seen = set(paths)
+    if len(seen) != len(paths):
+        return True
+    for path in paths:
+        parts = path.split(".")
+        if any(".".join(parts[:i]) in seen for i in range(1, len(parts))):
+            return True
+    return False
+
+
+# 👉 Operaciones -> (update, rutas que deben existir) o None si hay que aplicar el parche completo
+#    Solo se traducen las operaciones sin ambigüedad objeto/array:
+#      add/replace sobre miembros no numéricos -> $set, add "/-" -> $push, remove de miembros no numéricos -> $unset
+#    strict=False (merge patch): no se exige que existan las rutas afectadas
+def to_mongo_update(operations: list[dict], prefix: str = "data", strict: bool = True) -> tuple[dict, list[str]] | None:
+    set_fields: dict[str, Any] = {}
+    unset_fields: dict[str, str] = {}
+    push_fields: dict[str, Any] = {}
+    must_exist: list[str] = []
+    touched: list[str] = []
+
+    for operation in operations:
+        if not isinstance(operation, dict):
+            return None
+        op = operation.get("op")
+        try:
+            tokens = parse_pointer(operation.get("path", ""))
+        except PatchError:
+            return None
+        if not tokens:
+            return None
+
+        last = tokens[-1]
+        if op == "add" and last == "-":
+            key = _mongo_key(tokens[:-1], prefix) if len(tokens) > 1 else None
+            if key is None or "value" not in operation:
+                return None
+            if key in push_fields:
+                # Varios "/-" seguidos sobre el mismo array: un solo $push con $each
+                push_fields[key]["$each"].append(operation["value"])
+                continue
+            push_fields[key] = {"$each": [operation["value"]]}
+            must_exist.append(key)
+        elif op in ("add", "replace") and not last.isdigit():
+            key = _mongo_key(tokens, prefix)
+            if key is None or "value" not in operation:
+                return None
+            set_fields[key] = operation["value"]
+            if op == "replace":
+                must_exist.append(key)
+            elif len(tokens) > 1:
+                must_exist.append(key.rsplit(".", 1)[0])
+        elif op == "remove" and not last.isdigit():
+            key = _mongo_key(tokens, prefix)
+            if key is None:
+                return None
+            unset_fields[key] = ""
+            must_exist.append(key)
+        else:
+            return None
+        touched.append(key)
+
+    if not touched or _conflicts(touched):
+        return None
+
+    update: dict[str, Any] = {}
+    if set_fields:
+        update["$set"] = set_fields
+    if unset_fields:
+        update["$unset"] = unset_fields
+    if push_fields:
+        update["$push"] = push_fields
+    return update, (must_exist if strict else [])
+
+
+# 👉 Merge patch -> (operaciones equivalentes, objetos que deben existir), o None si no se puede expresar
+#    sin conocer el documento:
+#      - {} no cambia un objeto pero sí reemplaza un valor escalar
+#      - claves numéricas (o "-"): en Mongo "frames.3" es un índice de array, en RFC 7386 una clave de objeto
+#    Un objeto anidado solo se mezcla si el destino ya es un objeto (si no, RFC 7386 lo reemplaza por uno nuevo y
+#    un $unset no haría nada): sus rutas se devuelven para exigir {$type: "object"} en la consulta
+def merge_patch_operations(patch: dict, path: str = "") -> tuple[list[dict], list[str]] | None:
+    operations = []
+    objects = [path]
+    for key, value in patch.items():
+        if key.isdigit() or key == "-":
+            return None
+        child = f"{path}/{_escape(key)}"
+        if value is None:
+            operations.append({"op": "remove", "path": child})
+        elif isinstance(value, dict):
+            if not value:
+                return None
+            nested = merge_patch_operations(value, child)
+            if nested is None:
+                return None
+            operations.extend(nested[0])
+            objects.extend(nested[1])
+        else:
+            operations.append({"op": "add", "path": child, "value": value})
+    return operations, objects
+
+
+# 👉 Rutas JSON Pointer -> filtro de Mongo que exige que cada una sea un objeto (None si alguna no se puede direccionar)
+def mongo_object_filter(pointers: list[str], prefix: str = "data") -> dict | None:
+    query = {}
+    for pointer in pointers:
+        key = _mongo_key(parse_pointer(pointer), prefix)
+        if key is None:
+            return None
+        query[key] = {"$type": "object"}
+    return query
@@ -0,0 +1,60 @@
+# app/core/pagination.py
+# Paginación por cursor (keyset): el cursor es la clave de ordenación de la última fila devuelta
+import base64
+import binascii
+import os
+
+import orjson
+from fastapi import HTTPException, Query, Response
+
+DEFAULT_PAGE_SIZE = int(os.getenv("DEFAULT_PAGE_SIZE", 100))
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", 500))
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(values: list) -> str:
+    return base64.urlsafe_b64encode(orjson.dumps(values)).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> list:
+    try:
+        values = orjson.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (binascii.Error, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+
+# 👉 Parámetros comunes de los listados (el límite está acotado a MAX_PAGE_SIZE)
+def page_params(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = Query(None),
+) -> tuple[int, str | None]:
+    return limit, cursor
+
+
+def set_next_cursor(response: Response, cursor: str | None) -> None:
+    if cursor:
+        response.headers[NEXT_CURSOR_HEADER] = cursor
+
+
+# 👉 fields=a,b,c -> set validado contra los campos permitidos
+#    Los campos de `nested` admiten además subrutas (data.frames, ...)
+def parse_fields(
+    fields: str | None,
+    allowed: set[str],
+    default: set[str],
+    nested: frozenset[str] = frozenset(),
+) -> set[str]:
+    if not fields:
+        return set(default)
+    requested = {f.strip() for f in fields.split(",") if f.strip()}
+    unknown = [
+        f for f in requested
+        if f.split(".", 1)[0] not in allowed or ("." in f and f.split(".", 1)[0] not in nested)
+    ]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    return requested
@@ -0,0 +1,90 @@
+# app/core/play_cache.py
+# Caché de respuestas serializadas de GET /plays/{play_id}/data, con ETag (hash del contenido)
+import hashlib
+import os
+import time
+from dataclasses import dataclass
+
+from app.core import compression
+from app.core.cache import ByteLRUCache, TTLCache, MISSING
+from app.core.pubsub import Broker
+
+PLAY_CACHE_MAX_BYTES = int(os.getenv("PLAY_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+PLAY_CACHE_CHANNEL = "play_cache_invalidations"
+# Cuerpos ya comprimidos (gzip/zstd) por ETag: no hace falta invalidarlos, un cambio de contenido cambia el ETag
+PLAY_CACHE_ENCODED_MAX_BYTES = int(os.getenv("PLAY_CACHE_ENCODED_MAX_BYTES", 16 * 1024 * 1024))
+
+
+@dataclass(frozen=True)
+class CachedPlay:
+    team_id: int
+    revision: int
+    etag: str
+    body: bytes
+
+
+_plays = ByteLRUCache(max_bytes=PLAY_CACHE_MAX_BYTES, sizeof=lambda entry: len(entry.body))
+_encoded = ByteLRUCache(max_bytes=PLAY_CACHE_ENCODED_MAX_BYTES, sizeof=len)
+# Invalidaciones recientes: evita guardar una lectura que empezó antes de una escritura
+_recent_invalidations = TTLCache(maxsize=10_000, ttl=60)
+_broker: Broker | None = None
+
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def get(play_id: int) -> CachedPlay | None:
+    return _plays.get(play_id)
+
+
+# 👉 read_started_at = time.monotonic() tomado antes de leer de las bases de datos
+#    store=False: solo calcula el ETag (p.ej. documento aún no escrito por el outbox)
+def put(play_id: int, team_id: int, revision: int, body: bytes, read_started_at: float, store: bool = True) -> CachedPlay:
+    entry = CachedPlay(team_id=team_id, revision=revision, etag=make_etag(body), body=body)
+    invalidated_at = _recent_invalidations.get(play_id)
+    if store and (invalidated_at is MISSING or invalidated_at < read_started_at):
+        _plays.set(play_id, entry)
+    return entry
+
+
+# 👉 Cuerpo de la respuesta comprimido con `encoding` (se comprime una vez por contenido y codificación)
+def encoded_body(entry: CachedPlay, encoding: str) -> bytes:
+    key = (entry.etag, encoding)
+    body = _encoded.get(key)
+    if body is None:
+        body = compression.compress(entry.body, encoding)
+        _encoded.set(key, body)
+    return body
+
+
+def _drop(play_id: int | None, team_id: int | None) -> None:
+    if play_id is not None:
+        _recent_invalidations.set(play_id, time.monotonic())
+        _plays.pop(play_id)
+    if team_id is not None:
+        _plays.discard_where(lambda key, entry: entry.team_id == team_id)
+
+
+def _on_invalidation(message: dict) -> None:
+    _drop(message.get("play_id"), message.get("team_id"))
+
+
+# 👉 Llamar después de modificar/borrar una jugada (o todas las de un equipo)
+async def invalidate(play_id: int | None = None, team_id: int | None = None) -> None:
+    _drop(play_id, team_id)
+    if _broker is not None:
+        await _broker.publish(PLAY_CACHE_CHANNEL, {"play_id": play_id, "team_id": team_id})
+
+
+def setup_play_cache(broker: Broker) -> None:
+    global _broker
+    _broker = broker
+    broker.subscribe(PLAY_CACHE_CHANNEL, _on_invalidation)
@@ -0,0 +1,185 @@
+# app/core/pubsub.py
+import asyncio
+import contextvars
+import inspect
+import logging
+import os
+from collections import defaultdict
+from typing import Any, Awaitable, Callable
+
+import orjson
+
+# memory   -> solo dentro del proceso (un worker, tests)
+# postgres -> LISTEN/NOTIFY, comparte mensajes entre varios workers de uvicorn
+BROKER_BACKEND = os.getenv("BROKER_BACKEND", "memory")
+
+# Espera entre reintentos al reconectar la conexión de LISTEN (crece hasta el máximo)
+BROKER_RECONNECT_MIN_SECONDS = float(os.getenv("BROKER_RECONNECT_MIN_SECONDS", 1))
+BROKER_RECONNECT_MAX_SECONDS = float(os.getenv("BROKER_RECONNECT_MAX_SECONDS", 30))
+BROKER_CONNECT_TIMEOUT_SECONDS = float(os.getenv("BROKER_CONNECT_TIMEOUT_SECONDS", 5))
+
+logger = logging.getLogger(__name__)
+
+Callback = Callable[[dict], Awaitable[None] | None]
+
+
+async def _deliver(callbacks: list[Callback], message: dict) -> None:
+    for callback in list(callbacks):
+        result = callback(message)
+        if inspect.isawaitable(result):
+            await result
+
+
+class Broker:
+    def __init__(self):
+        self._subscribers: dict[str, list[Callback]] = defaultdict(list)
+
+    def subscribe(self, channel: str, callback: Callback) -> Callable[[], None]:
+        self._subscribers[channel].append(callback)
+
+        def unsubscribe():
+            if callback in self._subscribers[channel]:
+                self._subscribers[channel].remove(callback)
+
+        return unsubscribe
+
+    async def publish(self, channel: str, message: dict) -> None:
+        raise NotImplementedError
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+
+# 👉 Stand-in local: entrega directa a los suscriptores del mismo proceso
+class InMemoryBroker(Broker):
+    async def publish(self, channel: str, message: dict) -> None:
+        await _deliver(self._subscribers.get(channel, []), message)
+
+
+# 👉 Postgres LISTEN/NOTIFY (payload máx. ~8 KB por mensaje)
+#    Dos conexiones: una solo para LISTEN y otra para NOTIFY (asyncpg no admite operaciones concurrentes en una
+#    conexión). Si la de LISTEN se cae, se reconecta y se vuelve a escuchar en todos los canales; lo publicado
+#    mientras tanto se pierde y las cachés lo cubren con su TTL.
+class PostgresBroker(Broker):
+    def __init__(self, dsn: str):
+        super().__init__()
+        self._dsn = dsn.replace("postgresql+asyncpg://", "postgresql://")
+        self._conn = None
+        self._publish_conn = None
+        self._publish_lock = asyncio.Lock()
+        self._listening: set[str] = set()
+        self._reconnect_task: asyncio.Task | None = None
+        self._started = False
+        self._stopping = False
+
+    async def start(self) -> None:
+        self._stopping = False
+        # Un lock por arranque: el de un event loop anterior (tests, TestClient) no sirve en este
+        self._publish_lock = asyncio.Lock()
+        await self._connect()
+        self._started = True
+
+    async def _connect(self) -> None:
+        import asyncpg
+
+        self._conn = await asyncpg.connect(self._dsn, timeout=BROKER_CONNECT_TIMEOUT_SECONDS)
+        self._conn.add_termination_listener(self._on_terminated)
+        self._listening.clear()
+        for channel in list(self._subscribers):
+            await self._listen(channel)
+
+    async def stop(self) -> None:
+        self._stopping = True
+        self._started = False
+        if self._reconnect_task is not None:
+            self._reconnect_task.cancel()
+            self._reconnect_task = None
+        for conn in (self._conn, self._publish_conn):
+            if conn is not None and not conn.is_closed():
+                await conn.close()
+        self._conn = None
+        self._publish_conn = None
+        self._listening.clear()
+
+    def subscribe(self, channel: str, callback: Callback) -> Callable[[], None]:
+        unsubscribe = super().subscribe(channel, callback)
+        if self._conn is not None and channel not in self._listening:
+            asyncio.get_running_loop().create_task(self._listen(channel))
+        return unsubscribe
+
+    async def _listen(self, channel: str) -> None:
+        # Sin conexión (reconectando): _connect() escuchará en todos los canales suscritos
+        if channel in self._listening or self._conn is None:
+            return
+        self._listening.add(channel)
+        await self._conn.add_listener(channel, self._on_notify)
+
+    def _on_notify(self, connection: Any, pid: int, channel: str, payload: str) -> None:
+        message = orjson.loads(payload)
+        asyncio.get_running_loop().create_task(_deliver(self._subscribers.get(channel, []), message))
+
+    # 👉 La conexión de LISTEN se cerró (reinicio de Postgres, proxy, red): reconectar con espera creciente
+    def _on_terminated(self, connection: Any) -> None:
+        if self._stopping or connection is not self._conn:
+            return
+        logger.warning("⚠️ Conexión LISTEN del broker perdida: reconectando")
+        self._conn = None
+        if self._reconnect_task is None or self._reconnect_task.done():
+            self._reconnect_task = asyncio.get_running_loop().create_task(
+                self._reconnect(), context=contextvars.Context()
+            )
+
+    async def _reconnect(self) -> None:
+        delay = BROKER_RECONNECT_MIN_SECONDS
+        while not self._stopping:
+            try:
+                await self._connect()
+                logger.info("✅ Broker reconectado (%s canales)", len(self._listening))
+                return
+            except Exception as e:
+                logger.warning("⚠️ No se pudo reconectar el broker (%s); reintento en %.0fs", e, delay)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, BROKER_RECONNECT_MAX_SECONDS)
+
+    async def publish(self, channel: str, message: dict) -> None:
+        if self._stopping or not self._started:
+            # Sin conexión (scripts, arranque): al menos se entrega en este proceso
+            await _deliver(self._subscribers.get(channel, []), message)
+            return
+        payload = orjson.dumps(message).decode()
+        async with self._publish_lock:
+            try:
+                if self._publish_conn is None or self._publish_conn.is_closed():
+                    import asyncpg
+
+                    self._publish_conn = await asyncpg.connect(self._dsn, timeout=BROKER_CONNECT_TIMEOUT_SECONDS)
+                await self._publish_conn.execute("SELECT pg_notify($1, $2)", channel, payload)
+                published = True
+            except Exception:
+                # Se publica después del commit: un fallo aquí no debe convertir la escritura en un 500
+                logger.exception("❌ No se pudo publicar en %s: solo se entrega en este worker", channel)
+                self._publish_conn = None
+                published = False
+        if not published or self._conn is None:
+            # Este worker no recibirá su propia notificación (LISTEN caído o NOTIFY fallido)
+            await _deliver(self._subscribers.get(channel, []), message)
+
+
+_broker: Broker | None = None
+
+
+def get_broker() -> Broker:
+    global _broker
+    if _broker is None:
+        if BROKER_BACKEND == "memory":
+            _broker = InMemoryBroker()
+        elif BROKER_BACKEND == "postgres":
+            from app.db.postgres import database_url
+
+            _broker = PostgresBroker(database_url())
+        else:
+            raise ValueError(f"❌ BROKER_BACKEND desconocido: {BROKER_BACKEND}")
+    return _broker
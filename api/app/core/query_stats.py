@@ -0,0 +1,211 @@
+# app/core/query_stats.py
+# Consultas por petición: cuántas, cuántos viajes de ida y vuelta y cuánto tiempo en Postgres y en Mongo
+#
+#   - hooks de SQLAlchemy (before/after_cursor_execute) y un CommandListener de pymongo
+#   - QueryStatsMiddleware: cabecera Server-Timing, métricas por endpoint y presupuesto de consultas
+#
+# QUERY_BUDGET: máximo de consultas por petición (0 = sin límite); @query_budget(n) lo cambia para un endpoint
+# QUERY_BUDGET_MODE:
+#   off    -> no se comprueba
+#   warn   -> se registra un warning (y la métrica query_budget_exceeded_total)
+#   strict -> además la respuesta pasa a ser un 500 (para tests / CI: un N+1 nuevo rompe la suite)
+import logging
+import os
+import threading
+import time
+from contextvars import ContextVar
+
+import orjson
+from pymongo import monitoring
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core import metrics
+
+logger = logging.getLogger(__name__)
+
+QUERY_BUDGET = int(os.getenv("QUERY_BUDGET", 20))
+QUERY_BUDGET_MODE = os.getenv("QUERY_BUDGET_MODE", "warn")
+SERVER_TIMING_HEADER = os.getenv("SERVER_TIMING_HEADER", "1") == "1"
+
+if QUERY_BUDGET_MODE not in ("off", "warn", "strict"):
+    raise ValueError(f"❌ QUERY_BUDGET_MODE desconocido: {QUERY_BUDGET_MODE}")
+
+DATABASES = ("pg", "mongo")
+
+DB_QUERIES = metrics.Counter("db_queries_total", "Consultas ejecutadas por base de datos")
+DB_QUERY_SECONDS = metrics.Histogram("db_query_seconds", "Duración de cada consulta por base de datos")
+REQUEST_QUERIES = metrics.Histogram(
+    "db_queries_per_request", "Consultas por petición y endpoint", buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+)
+REQUEST_DB_SECONDS = metrics.Histogram("db_seconds_per_request", "Tiempo en base de datos por petición y endpoint")
+BUDGET_EXCEEDED = metrics.Counter("query_budget_exceeded_total", "Peticiones que superaron su presupuesto de consultas")
+
+
+# 👉 Presupuesto propio para un endpoint (None = sin límite, p.ej. exportaciones en streaming)
+def query_budget(limit: int | None):
+    def decorator(endpoint):
+        endpoint.query_budget = limit
+        return endpoint
+    return decorator
+
+
+class RequestStats:
+    def __init__(self, scope: dict):
+        self.scope = scope
+        self.started = time.perf_counter()
+        self.queries = dict.fromkeys(DATABASES, 0)
+        self.round_trips = dict.fromkeys(DATABASES, 0)
+        self.seconds = dict.fromkeys(DATABASES, 0.0)
+        # Motor ejecuta pymongo en hilos: el listener puede llegar desde varios a la vez
+        self._lock = threading.Lock()
+
+    def add(self, database: str, seconds: float, query: bool = True) -> None:
+        with self._lock:
+            self.round_trips[database] += 1
+            self.seconds[database] += seconds
+            if query:
+                self.queries[database] += 1
+
+    @property
+    def route(self) -> str:
+        route = self.scope.get("route")
+        return getattr(route, "path", None) or "unmatched"
+
+    def budget(self) -> int | None:
+        endpoint = getattr(self.scope.get("route"), "endpoint", None)
+        budget = getattr(endpoint, "query_budget", QUERY_BUDGET)
+        return budget or None
+
+    # 👉 Mensaje si la petición se pasó de su presupuesto (None si no)
+    def budget_violation(self) -> str | None:
+        if QUERY_BUDGET_MODE == "off":
+            return None
+        budget = self.budget()
+        total = sum(self.queries.values())
+        if budget is None or total <= budget:
+            return None
+        detail = ", ".join(f"{database}={self.queries[database]}" for database in DATABASES)
+        return f"Query budget exceeded for {self.route}: {total} queries ({detail}), budget {budget}"
+
+    def server_timing(self) -> str:
+        parts = []
+        for database in DATABASES:
+            if self.round_trips[database]:
+                parts.append(
+                    f'{database};dur={self.seconds[database] * 1000:.1f};'
+                    f'desc="{self.queries[database]} queries, {self.round_trips[database]} round trips"'
+                )
+        parts.append(f"app;dur={(time.perf_counter() - self.started) * 1000:.1f}")
+        return ", ".join(parts)
+
+
+_current: ContextVar[RequestStats | None] = ContextVar("query_stats", default=None)
+
+
+def current() -> RequestStats | None:
+    return _current.get()
+
+
+def _record(database: str, seconds: float, query: bool = True) -> None:
+    DB_QUERIES.inc(database=database)
+    DB_QUERY_SECONDS.observe(seconds, database=database)
+    stats = _current.get()
+    if stats is not None:
+        stats.add(database, seconds, query)
+
+
+# ---------------- Postgres (SQLAlchemy) ----------------
+# Los hooks se ejecutan en el greenlet de SQLAlchemy, que hereda el contexto de la tarea: la ContextVar llega
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._query_started_at = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    _record("pg", time.perf_counter() - context._query_started_at)
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    if not event.contains(engine.sync_engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+# ---------------- Mongo (pymongo) ----------------
+# Motor ejecuta pymongo en hilos copiando el contexto de la tarea, así que la ContextVar también llega aquí
+class _MongoCommandListener(monitoring.CommandListener):
+    def started(self, event) -> None:
+        pass
+
+    def succeeded(self, event) -> None:
+        # getMore: otro viaje del mismo cursor, no otra consulta
+        _record("mongo", event.duration_micros / 1e6, query=event.command_name != "getMore")
+
+    def failed(self, event) -> None:
+        _record("mongo", event.duration_micros / 1e6, query=event.command_name != "getMore")
+
+
+_mongo_listener: _MongoCommandListener | None = None
+
+
+# 👉 Antes de crear el cliente de Mongo (los listeners globales solo se aplican a clientes nuevos)
+def instrument_mongo() -> None:
+    global _mongo_listener
+    if _mongo_listener is None:
+        _mongo_listener = _MongoCommandListener()
+        monitoring.register(_mongo_listener)
+
+
+# ---------------- Middleware ----------------
+class QueryStatsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(scope)
+        token = _current.set(stats)
+        blocked = False
+
+        async def send_with_timing(message):
+            nonlocal blocked
+            if blocked:
+                return
+            if message["type"] == "http.response.start":
+                violation = stats.budget_violation() if QUERY_BUDGET_MODE == "strict" else None
+                if violation:
+                    # Se descarta la respuesta del endpoint
+                    blocked = True
+                    body = orjson.dumps({"detail": violation})
+                    await send({
+                        "type": "http.response.start",
+                        "status": 500,
+                        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+                    })
+                    await send({"type": "http.response.body", "body": body})
+                    return
+                if SERVER_TIMING_HEADER:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", stats.server_timing().encode()))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            _finish(stats)
+
+
+def _finish(stats: RequestStats) -> None:
+    route = stats.route
+    for database in DATABASES:
+        REQUEST_QUERIES.observe(stats.queries[database], database=database, route=route)
+        REQUEST_DB_SECONDS.observe(stats.seconds[database], database=database, route=route)
+    violation = stats.budget_violation()
+    if violation:
+        BUDGET_EXCEEDED.inc(route=route)
+        logger.warning("⚠️ %s", violation)
@@ -0,0 +1,64 @@
+# app/core/roles.py
+import os
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app import models
+from app.core.cache import TTLCache, MISSING
+from app.core.pubsub import Broker
+
+ROLE_CACHE_TTL_SECONDS = float(os.getenv("ROLE_CACHE_TTL_SECONDS", 300))
+ROLE_CACHE_SIZE = int(os.getenv("ROLE_CACHE_SIZE", 50_000))
+ROLE_CHANNEL = "role_invalidations"
+
+# (user_id, team_id) -> rol, o None si no es miembro
+_roles = TTLCache(maxsize=ROLE_CACHE_SIZE, ttl=ROLE_CACHE_TTL_SECONDS)
+_broker: Broker | None = None
+
+
+async def get_user_role(db_sess: AsyncSession, user_id: int, team_id: int) -> str | None:
+    key = (user_id, team_id)
+    role = _roles.get(key)
+    if role is MISSING:
+        result = await db_sess.execute(
+            select(models.Permission.role).filter_by(user_id=user_id, team_id=team_id)
+        )
+        role = result.scalar_one_or_none()
+        _roles.set(key, role)
+    return role
+
+
+# 👉 Guarda roles ya leídos por otra consulta (p.ej. /bootstrap) para no volver a preguntarlos
+def remember_roles(user_id: int, roles: dict[int, str]) -> None:
+    for team_id, role in roles.items():
+        _roles.set((user_id, team_id), role)
+
+
+def _drop(user_id: int | None, team_id: int | None) -> None:
+    if user_id is None and team_id is None:
+        _roles.clear()
+    elif team_id is None:
+        _roles.discard_where(lambda key: key[0] == user_id)
+    elif user_id is None:
+        _roles.discard_where(lambda key: key[1] == team_id)
+    else:
+        _roles.pop((user_id, team_id))
+
+
+def _on_invalidation(message: dict) -> None:
+    _drop(message.get("user_id"), message.get("team_id"))
+
+
+# 👉 Llamar después del commit que cambia la membresía (sin argumentos = todo)
+async def invalidate_roles(user_id: int | None = None, team_id: int | None = None) -> None:
+    _drop(user_id, team_id)
+    if _broker is not None:
+        await _broker.publish(ROLE_CHANNEL, {"user_id": user_id, "team_id": team_id})
+
+
+# 👉 Se llama en el startup para recibir las invalidaciones de otros workers
+def setup_role_cache(broker: Broker) -> None:
+    global _broker
+    _broker = broker
+    broker.subscribe(ROLE_CHANNEL, _on_invalidation)
@@ -0,0 +1,123 @@
+# app/core/serialization.py
+# Cómo se guarda `data` en plays_data y cómo se devuelve sin reconstruir objetos Python.
+#
+# PLAY_DATA_STORAGE:
+#   bson -> {"data": {...}}                         (formato original)
+#   both -> {"data": {...}, "data_json": <bytes>}   (permite proyecciones en Mongo y lectura sin decodificar)
+#   json -> {"data_json": <bytes>}                  (solo los bytes JSON canónicos)
+#
+# Con PLAY_DATA_COMPRESSION (ver app.core.compression) data_json grande se guarda comprimido
+# y "data_encoding" indica cómo ("gzip" / "zstd"); los documentos sin ese campo se leen como siempre.
+import os
+from typing import Any
+
+import orjson
+from bson import Binary
+
+from app.core import compression
+
+PLAY_DATA_STORAGE = os.getenv("PLAY_DATA_STORAGE", "bson")
+if PLAY_DATA_STORAGE not in ("bson", "both", "json"):
+    raise ValueError(f"❌ PLAY_DATA_STORAGE desconocido: {PLAY_DATA_STORAGE}")
+
+STORES_BSON = PLAY_DATA_STORAGE in ("bson", "both")
+STORES_JSON = PLAY_DATA_STORAGE in ("both", "json")
+
+
+def _data_fields(data: Any) -> dict:
+    fields = {}
+    if STORES_BSON:
+        fields["data"] = data
+    if STORES_JSON:
+        raw = orjson.dumps(data)
+        encoding = compression.storage_encoding(raw)
+        if encoding:
+            fields["data_json"] = Binary(compression.compress(raw, encoding))
+            fields["data_encoding"] = encoding
+        else:
+            fields["data_json"] = Binary(raw)
+    return fields
+
+
+# 👉 Documento nuevo para insert_one / insert_many (revision empieza en 1)
+def play_document(play_id: int, data: Any) -> dict:
+    return {"play_id": play_id, "revision": 1, **_data_fields(data)}
+
+
+# 👉 Operadores de update que reemplazan data (y borran el formato que ya no se usa)
+#    Cada escritura incrementa revision (control de concurrencia optimista)
+def play_data_update(data: Any) -> dict:
+    update = {"$set": _data_fields(data), "$inc": {"revision": 1}}
+    unset = {field: "" for field in ("data", "data_json", "data_encoding") if field not in update["$set"]}
+    if unset:
+        update["$unset"] = unset
+    return update
+
+
+# 👉 Filtro por revisión (los documentos anteriores a este campo cuentan como revisión 0)
+def revision_query(revision: int) -> Any:
+    return {"$in": [None, 0]} if revision == 0 else revision
+
+
+# 👉 Proyección para leer el documento completo: data_json si existe, si no data (documentos antiguos)
+READ_PROJECTION = {
+    "_id": 0,
+    "play_id": 1,
+    "revision": 1,
+    "data_json": 1,
+    "data_encoding": 1,
+    "data": {"$cond": [{"$eq": [{"$type": "$data_json"}, "missing"]}, "$data", "$$REMOVE"]},
+}
+
+
+# 👉 Subrutas de data ("frames", "meta.name"...) sobre el objeto ya decodificado
+def extract_paths(data: Any, paths: list[str]) -> Any:
+    if not isinstance(data, dict):
+        return None
+    result: dict = {}
+    for path in paths:
+        source, target = data, result
+        keys = path.split(".")
+        for key in keys[:-1]:
+            if not isinstance(source, dict) or key not in source:
+                break
+            source = source[key]
+            target = target.setdefault(key, {})
+        else:
+            if isinstance(source, dict) and keys[-1] in source:
+                target[keys[-1]] = source[keys[-1]]
+    return result
+
+
+# 👉 Bytes JSON de data_json (descomprimidos si hace falta), None si el documento no lo tiene
+def _stored_json(doc: dict) -> bytes | None:
+    raw = doc.get("data_json")
+    if raw is None:
+        return None
+    encoding = doc.get("data_encoding")
+    return compression.decompress(bytes(raw), encoding) if encoding else bytes(raw)
+
+
+# 👉 JSON de `data` tal cual está guardado (sin pasar por dict cuando existe data_json)
+def data_json_bytes(doc: dict | None) -> bytes:
+    if doc is None:
+        return b"null"
+    raw = _stored_json(doc)
+    if raw is not None:
+        return raw
+    return orjson.dumps(doc.get("data"))
+
+
+# 👉 data como objeto Python (para proyecciones, parches, etc.)
+def data_object(doc: dict | None) -> Any:
+    if doc is None:
+        return None
+    raw = _stored_json(doc)
+    if raw is not None:
+        return orjson.loads(raw)
+    return doc.get("data")
+
+
+# 👉 {"id":..,...} + "data": <bytes ya serializados>, sin re-codificar data
+def splice_play(meta: dict, data_json: bytes) -> bytes:
+    return orjson.dumps(meta)[:-1] + b',"data":' + data_json + b"}"
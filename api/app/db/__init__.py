@@ -1,10 +1,14 @@
-
-from .postgres import connect_postgres, Base, AsyncSessionLocal, engine, get_db
-from .mongo import get_mongo_client
+from .postgres import Base, AsyncSessionLocal, get_engine, dispose_engine, get_db
+from .mongo import connect_mongo, close_mongo, get_mongo_client, get_plays_collection, get_revisions_collection
 
 __all__ = [
-    "connect_postgres",
     "Base",
     "AsyncSessionLocal",
-    "engine",
-]
\ No newline at end of file
+    "get_engine",
+    "dispose_engine",
+    "connect_mongo",
+    "close_mongo",
+    "get_mongo_client",
+    "get_plays_collection",
+    "get_revisions_collection",
+]
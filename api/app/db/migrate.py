@@ -0,0 +1,44 @@
+# app/db/migrate.py
+# Esquema de las bases de datos, fuera del arranque de la API (desde api/):  python -m app.db.migrate
+#
+#   - Postgres: alembic upgrade head
+#   - Mongo (PLAY_STORE_BACKEND=mongo): índices únicos de plays_data y play_revisions
+#
+# Se ejecuta una vez por despliegue, antes de arrancar los workers (docker compose lo hace al levantar la api)
+import asyncio
+from pathlib import Path
+
+from alembic import command
+from alembic.config import Config
+
+from app.db import mongo
+
+ALEMBIC_INI = Path(__file__).resolve().parents[2] / "alembic.ini"
+
+
+def upgrade_postgres(revision: str = "head") -> None:
+    config = Config(str(ALEMBIC_INI))
+    config.set_main_option("script_location", str(ALEMBIC_INI.parent / "migrations"))
+    command.upgrade(config, revision)
+    print(f"✅ PostgreSQL migrado a {revision}")
+
+
+async def ensure_mongo_indexes() -> None:
+    mongo.connect_mongo()
+    try:
+        await mongo.ensure_indexes()
+    finally:
+        mongo.close_mongo()
+    print("✅ Índices de MongoDB creados")
+
+
+def main() -> None:
+    from app.services.play_store import PLAY_STORE_BACKEND
+
+    upgrade_postgres()
+    if PLAY_STORE_BACKEND == "mongo":
+        asyncio.run(ensure_mongo_indexes())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,71 @@
 # app/db/mongo.py
-from motor.motor_asyncio import AsyncIOMotorClient
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorCollection, AsyncIOMotorDatabase
 import os
 
-def get_mongo_client():
+MONGO_DB_NAME = os.getenv("MONGO_DB_NAME", "basketballboard")
+
+# Configuración del pool (un único cliente por proceso)
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", 0))
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", 100))
+MONGO_MAX_IDLE_TIME_MS = int(os.getenv("MONGO_MAX_IDLE_TIME_MS", 60_000))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", 5_000))
+# Espera máxima por una conexión libre del pool (0 = sin límite)
+MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", 10_000))
+
+_client: AsyncIOMotorClient | None = None
+
+
+def _mongo_url() -> str | None:
     if os.getenv("MODE") == "development":
-        client = AsyncIOMotorClient(os.getenv("MONGO_URL_DEV"))
-    else:
-        client = AsyncIOMotorClient(os.getenv("MONGO_URL"))
-    return client["basketballboard"]  # este es tu database
+        return os.getenv("MONGO_URL_DEV")
+    return os.getenv("MONGO_URL")
+
+
+# 👉 Se llama una sola vez en el startup de la app
+def connect_mongo() -> AsyncIOMotorClient:
+    global _client
+    if _client is None:
+        _client = AsyncIOMotorClient(
+            _mongo_url(),
+            minPoolSize=MONGO_MIN_POOL_SIZE,
+            maxPoolSize=MONGO_MAX_POOL_SIZE,
+            maxIdleTimeMS=MONGO_MAX_IDLE_TIME_MS,
+            serverSelectionTimeoutMS=MONGO_SERVER_SELECTION_TIMEOUT_MS,
+            waitQueueTimeoutMS=MONGO_WAIT_QUEUE_TIMEOUT_MS or None,
+        )
+        print("✅ Cliente MongoDB creado")
+    return _client
+
+
+# 👉 Se llama en el shutdown de la app
+def close_mongo() -> None:
+    global _client
+    if _client is not None:
+        _client.close()
+        _client = None
+
+
+def get_mongo_client() -> AsyncIOMotorDatabase:
+    if _client is None:
+        raise RuntimeError("❌ MongoDB no está conectado. ¿Se ejecutó el startup de la app?")
+    return _client[MONGO_DB_NAME]  # este es tu database
+
+
+# 👉 Para /ready
+async def ping() -> None:
+    await get_mongo_client().command("ping")
+
+
+# 👉 Índices de Mongo (idempotente, se llama desde python -m app.db.migrate)
+async def ensure_indexes() -> None:
+    await get_plays_collection().create_index("play_id", unique=True, name="uq_play_id")
+    await get_revisions_collection().create_index([("play_id", 1), ("rev", -1)], unique=True, name="uq_play_id_rev")
+
+
+# 👉 Dependencias para las rutas
+def get_plays_collection() -> AsyncIOMotorCollection:
+    return get_mongo_client()["plays_data"]
+
 
-# 👉 colección lista para importar
-plays_collection = get_mongo_client()["plays_data"]
+def get_revisions_collection() -> AsyncIOMotorCollection:
+    return get_mongo_client()["play_revisions"]
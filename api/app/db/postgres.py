@@ -1,33 +1,37 @@
 # db.py
 import os
 from dotenv import load_dotenv
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import declarative_base
 
 # Cargar variables de entorno desde .env
 load_dotenv()
 
-# Inicializar conexión y crear tablas (opcional)
-async def connect_postgres():
-    async with engine.begin() as conn:
-        # Solo crea tablas si no existen
-        await conn.run_sync(Base.metadata.create_all)
-    print("✅ Conectado a PostgreSQL con SQLAlchemy async")
 # Seleccionar URL según el modo
 if os.getenv("MODE") == "development":
     DATABASE_URL = os.getenv("POSTGRES_URL_DEV")
 else:
     DATABASE_URL = os.getenv("POSTGRES_URL")
 
-if not DATABASE_URL:
-    raise ValueError("❌ DATABASE_URL no está configurada. Revisa tu archivo .env")
+# Log de cada sentencia SQL: solo para depurar (POSTGRES_ECHO=1), cuesta rendimiento.
+# Para ver cuántas consultas hace cada endpoint: cabecera Server-Timing y /metrics (app.core.query_stats)
+POSTGRES_ECHO = os.getenv("POSTGRES_ECHO", "0") == "1"
 
-# Motor async
-engine = create_async_engine(DATABASE_URL, echo=True, future=True)
+# Pool por worker: conexiones abiertas = POOL_SIZE, hasta POOL_SIZE + MAX_OVERFLOW en picos
+POSTGRES_POOL_SIZE = int(os.getenv("POSTGRES_POOL_SIZE", 10))
+POSTGRES_MAX_OVERFLOW = int(os.getenv("POSTGRES_MAX_OVERFLOW", 10))
+# Espera máxima por una conexión libre antes de fallar
+POSTGRES_POOL_TIMEOUT = float(os.getenv("POSTGRES_POOL_TIMEOUT", 30))
+# Reabrir conexiones antiguas (proxies/balanceadores que cortan conexiones inactivas)
+POSTGRES_POOL_RECYCLE = int(os.getenv("POSTGRES_POOL_RECYCLE", 1800))
+POSTGRES_POOL_PRE_PING = os.getenv("POSTGRES_POOL_PRE_PING", "1") == "1"
 
-# Sesiones async
+# Motor async: se crea en el arranque de la app (lifespan), no al importar el módulo
+engine: AsyncEngine | None = None
+
+# Sesiones async (el engine se enlaza en get_engine())
 AsyncSessionLocal = async_sessionmaker(
-    bind=engine,
     autocommit=False,
     autoflush=False,
     expire_on_commit=False,
@@ -37,6 +41,39 @@ AsyncSessionLocal = async_sessionmaker(
 Base = declarative_base()
 
 
+def database_url() -> str:
+    if not DATABASE_URL:
+        raise ValueError("❌ DATABASE_URL no está configurada. Revisa tu archivo .env")
+    return DATABASE_URL
+
+
+# 👉 Crea el engine la primera vez (no abre conexiones: el pool las abre al usarse)
+def get_engine() -> AsyncEngine:
+    global engine
+    if engine is None:
+        engine = create_async_engine(
+            database_url(),
+            echo=POSTGRES_ECHO,
+            future=True,
+            pool_size=POSTGRES_POOL_SIZE,
+            max_overflow=POSTGRES_MAX_OVERFLOW,
+            pool_timeout=POSTGRES_POOL_TIMEOUT,
+            pool_recycle=POSTGRES_POOL_RECYCLE,
+            pool_pre_ping=POSTGRES_POOL_PRE_PING,
+        )
+        AsyncSessionLocal.configure(bind=engine)
+        print("✅ Engine de PostgreSQL creado")
+    return engine
+
+
+# 👉 Se llama en el shutdown de la app
+async def dispose_engine() -> None:
+    global engine
+    if engine is not None:
+        await engine.dispose()
+        engine = None
+
+
 
 
 # db.py
@@ -46,3 +83,9 @@ from sqlalchemy.ext.asyncio import AsyncSession
 async def get_db() -> AsyncSession:
     async with AsyncSessionLocal() as session:
         yield session
+
+
+# 👉 Para /ready
+async def ping() -> None:
+    async with get_engine().connect() as conn:
+        await conn.execute(text("SELECT 1"))
@@ -0,0 +1 @@
+from .scheduler import start_periodic, stop_all
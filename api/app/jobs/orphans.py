@@ -0,0 +1,165 @@
+# app/jobs/orphans.py
+# Reconciliación Postgres <-> Mongo: borra documentos de plays_data (y su historial en play_revisions)
+# cuyo play_id ya no existe en la tabla plays (equipos/usuarios borrados, escrituras a medias...).
+#
+# Ambos lados se leen ordenados por id y en lotes (páginas por clave en Postgres, cada una en su propia
+# transacción corta; cursor por índice en Mongo) y se comparan como un merge de dos listas ordenadas,
+# sin cargar ninguno entero en memoria. Ninguna transacción de Postgres queda abierta durante el recorrido:
+# la exclusión entre workers es un advisory lock de sesión en una conexión aparte (en autocommit).
+#
+# Periódica dentro de la API cada ORPHAN_RECONCILE_INTERVAL_SECONDS (0 = desactivada),
+# o a mano (desde api/):  python -m app.jobs.orphans [--dry-run]
+import argparse
+import asyncio
+import logging
+import os
+from typing import AsyncIterator
+
+from sqlalchemy import func, select, text
+
+from app.core import metrics
+from app.db import mongo
+from app.db.postgres import AsyncSessionLocal, get_engine
+from app.models import Play
+
+logger = logging.getLogger(__name__)
+
+ORPHAN_RECONCILE_INTERVAL_SECONDS = float(os.getenv("ORPHAN_RECONCILE_INTERVAL_SECONDS", 6 * 3600))
+ORPHAN_SCAN_BATCH_SIZE = int(os.getenv("ORPHAN_SCAN_BATCH_SIZE", 5000))
+ORPHAN_DELETE_BATCH_SIZE = int(os.getenv("ORPHAN_DELETE_BATCH_SIZE", 500))
+# Pausa entre delete_many para no saturar Mongo
+ORPHAN_DELETE_PAUSE_SECONDS = float(os.getenv("ORPHAN_DELETE_PAUSE_SECONDS", 0.2))
+ORPHAN_DRY_RUN = os.getenv("ORPHAN_DRY_RUN", "0") == "1"
+# Un solo worker reconcilia a la vez
+ORPHAN_LOCK_ID = 7_345_002
+REPORT_SAMPLE_SIZE = 20
+
+ORPHANS_FOUND = metrics.Gauge("orphan_documents_found", "Documentos huérfanos encontrados en la última reconciliación")
+ORPHANS_DELETED = metrics.Counter("orphan_documents_deleted_total", "Documentos huérfanos borrados en Mongo")
+
+
+async def _sorted_ids(cursor) -> AsyncIterator[int]:
+    async for doc in cursor:
+        play_id = doc.get("play_id", doc.get("_id"))
+        if play_id is not None:
+            yield play_id
+
+
+# 👉 Ids de `mongo_ids` que no están en `pg_ids` (ambos ascendentes), en lotes
+async def orphan_batches(pg_ids: AsyncIterator[int], mongo_ids: AsyncIterator[int], max_id: int, batch_size: int):
+    batch: list[int] = []
+    pg_current = await anext(pg_ids, None)
+    async for mongo_id in mongo_ids:
+        # Jugadas creadas después de empezar la lectura de Postgres: no se tocan
+        if mongo_id > max_id:
+            break
+        while pg_current is not None and pg_current < mongo_id:
+            pg_current = await anext(pg_ids, None)
+        if pg_current != mongo_id:
+            batch.append(mongo_id)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+# 👉 Ids de plays hasta max_id, ascendentes: una consulta corta por página (keyset sobre la clave primaria)
+async def _pg_ids(max_id: int, batch_size: int = ORPHAN_SCAN_BATCH_SIZE) -> AsyncIterator[int]:
+    last_id = 0
+    while True:
+        async with AsyncSessionLocal() as db_sess:
+            page = (await db_sess.execute(
+                select(Play.id).where(Play.id > last_id, Play.id <= max_id).order_by(Play.id).limit(batch_size)
+            )).scalars().all()
+        for play_id in page:
+            yield play_id
+        if len(page) < batch_size:
+            return
+        last_id = page[-1]
+
+
+# 👉 Vuelve a comprobar en Postgres antes de borrar (una jugada pudo crearse mientras se comparaba)
+async def _still_missing(play_ids: list[int]) -> list[int]:
+    async with AsyncSessionLocal() as db_sess:
+        existing = set((await db_sess.execute(select(Play.id).where(Play.id.in_(play_ids)))).scalars())
+    return [play_id for play_id in play_ids if play_id not in existing]
+
+
+async def _reconcile_collection(collection, mongo_cursor, max_id: int, dry_run: bool) -> dict:
+    pg_ids = _pg_ids(max_id)
+    found, sample = 0, []
+    try:
+        async for batch in orphan_batches(pg_ids, _sorted_ids(mongo_cursor), max_id, ORPHAN_DELETE_BATCH_SIZE):
+            batch = await _still_missing(batch)
+            if not batch:
+                continue
+            found += len(batch)
+            sample.extend(batch[:REPORT_SAMPLE_SIZE - len(sample)])
+            if not dry_run:
+                result = await collection.delete_many({"play_id": {"$in": batch}})
+                ORPHANS_DELETED.inc(result.deleted_count, collection=collection.name)
+                await asyncio.sleep(ORPHAN_DELETE_PAUSE_SECONDS)
+    finally:
+        # El merge puede terminar antes de recorrer todas las páginas de Postgres
+        await pg_ids.aclose()
+    return {"orphans": found, "sample": sample}
+
+
+# 👉 Devuelve un informe {colección: {"orphans", "sample"}}; dry_run=True solo cuenta
+async def reconcile_orphans(dry_run: bool = ORPHAN_DRY_RUN) -> dict:
+    plays = mongo.get_plays_collection()
+    revisions = mongo.get_revisions_collection()
+    report: dict = {"dry_run": dry_run}
+
+    # Lock de sesión: se mantiene entre las transacciones cortas y hay que soltarlo a mano
+    async with get_engine().execution_options(isolation_level="AUTOCOMMIT").connect() as lock_conn:
+        locked = await lock_conn.scalar(text("SELECT pg_try_advisory_lock(:key)"), {"key": ORPHAN_LOCK_ID})
+        if not locked:
+            return {**report, "skipped": "another worker is reconciling"}
+        try:
+            async with AsyncSessionLocal() as db_sess:
+                max_id = await db_sess.scalar(select(func.coalesce(func.max(Play.id), 0)))
+
+            # plays_data: índice único por play_id, ya ordenado
+            plays_cursor = plays.find({}, {"_id": 0, "play_id": 1}).sort("play_id", 1).batch_size(ORPHAN_SCAN_BATCH_SIZE)
+            report[plays.name] = await _reconcile_collection(plays, plays_cursor, max_id, dry_run)
+
+            # play_revisions: un play_id por grupo, ordenados
+            revisions_cursor = revisions.aggregate(
+                [{"$group": {"_id": "$play_id"}}, {"$sort": {"_id": 1}}],
+                allowDiskUse=True,
+                batchSize=ORPHAN_SCAN_BATCH_SIZE,
+            )
+            report[revisions.name] = await _reconcile_collection(revisions, revisions_cursor, max_id, dry_run)
+        finally:
+            try:
+                await lock_conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": ORPHAN_LOCK_ID})
+            except Exception:
+                # Sin unlock la conexión no vuelve al pool: al cerrarla, Postgres suelta el lock
+                logger.exception("❌ No se pudo soltar el lock de la reconciliación de huérfanos")
+                await lock_conn.invalidate()
+
+    ORPHANS_FOUND.set(report[plays.name]["orphans"], collection=plays.name)
+    ORPHANS_FOUND.set(report[revisions.name]["orphans"], collection=revisions.name)
+    logger.info("🧹 Reconciliación de huérfanos: %s", report)
+    return report
+
+
+async def reconcile_orphans_job() -> None:
+    await reconcile_orphans()
+
+
+async def _main(dry_run: bool) -> None:
+    mongo.connect_mongo()
+    try:
+        report = await reconcile_orphans(dry_run)
+        print(report)
+    finally:
+        mongo.close_mongo()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Borra documentos de Mongo sin jugada en Postgres")
+    parser.add_argument("--dry-run", action="store_true", help="Solo informa, no borra")
+    asyncio.run(_main(parser.parse_args().dry_run))
@@ -0,0 +1,37 @@
+# app/jobs/revisions.py
+# Compactación del historial de revisiones (retención de REVISION_RETENTION revisiones por jugada)
+#
+# Periódica dentro de la API cada REVISION_COMPACTION_INTERVAL_SECONDS (0 = desactivada),
+# o a mano (desde api/):  python -m app.jobs.revisions [--keep N]
+import argparse
+import asyncio
+import os
+
+from app.core import metrics
+from app.db import mongo
+from app.services import revisions
+
+REVISION_COMPACTION_INTERVAL_SECONDS = float(os.getenv("REVISION_COMPACTION_INTERVAL_SECONDS", 3600))
+
+REVISIONS_COMPACTED = metrics.Counter("play_revisions_compacted_total", "Revisiones borradas por la retención")
+
+
+async def compact_revisions_job(keep: int = revisions.REVISION_RETENTION) -> int:
+    removed = await revisions.compact_revisions(mongo.get_revisions_collection(), keep)
+    REVISIONS_COMPACTED.inc(removed)
+    return removed
+
+
+async def _main(keep: int) -> None:
+    mongo.connect_mongo()
+    try:
+        removed = await compact_revisions_job(keep)
+        print(f"✅ Revisiones eliminadas: {removed}")
+    finally:
+        mongo.close_mongo()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compacta el historial de revisiones de las jugadas")
+    parser.add_argument("--keep", type=int, default=revisions.REVISION_RETENTION)
+    asyncio.run(_main(parser.parse_args().keep))
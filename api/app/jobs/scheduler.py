@@ -0,0 +1,46 @@
+# app/jobs/scheduler.py
+# Tareas periódicas dentro del proceso de la API (se arrancan en startup y se cancelan en shutdown)
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable
+
+from app.core import metrics
+
+logger = logging.getLogger(__name__)
+
+JOB_RUNS = metrics.Counter("job_runs_total", "Ejecuciones de tareas periódicas")
+JOB_DURATION = metrics.Histogram("job_duration_seconds", "Duración de las tareas periódicas")
+
+_tasks: dict[str, asyncio.Task] = {}
+
+
+async def _loop(name: str, interval: float, job: Callable[[], Awaitable[None]]) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        started = time.perf_counter()
+        try:
+            await job()
+            JOB_RUNS.inc(job=name, status="ok")
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # Un fallo no detiene la tarea: se reintenta en el siguiente intervalo
+            logger.exception("❌ Error en la tarea periódica %s", name)
+            JOB_RUNS.inc(job=name, status="error")
+        JOB_DURATION.observe(time.perf_counter() - started, job=name)
+
+
+# 👉 Ejecuta `job` cada `interval` segundos (interval <= 0 la desactiva)
+def start_periodic(name: str, interval: float, job: Callable[[], Awaitable[None]]) -> None:
+    if interval <= 0 or name in _tasks:
+        return
+    _tasks[name] = asyncio.create_task(_loop(name, interval, job), name=f"job:{name}")
+
+
+async def stop_all() -> None:
+    tasks = list(_tasks.values())
+    _tasks.clear()
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
@@ -2,6 +2,8 @@ from .user import User
 from .team import Team
 from .permission import Permission
 from .play import Play
+from .outbox import OutboxEvent
+from .team_change import TeamChange
 
-__all__ = ["User", "Team", "Permission", "Play"]
+__all__ = ["User", "Team", "Permission", "Play", "OutboxEvent", "TeamChange"]
 
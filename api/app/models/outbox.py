@@ -0,0 +1,20 @@
+from sqlalchemy import Column, BigInteger, Integer, String, Text, TIMESTAMP, func
+from sqlalchemy.dialects.postgresql import JSONB
+from app.db import Base
+
+
+# Escrituras pendientes en Mongo, guardadas en la misma transacción que el cambio en Postgres
+# (las aplica app.services.outbox en segundo plano, en orden de id)
+class OutboxEvent(Base):
+    __tablename__ = "outbox"
+
+    id = Column(BigInteger, primary_key=True)
+    kind = Column(String, nullable=False)  # play_upsert, play_delete, team_delete
+    aggregate_id = Column(Integer, nullable=False)
+    payload = Column(JSONB, nullable=False)
+    created_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=func.now())
+    available_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=func.now())
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    last_error = Column(Text)
+    # Agotó los reintentos: queda fuera de la cola para revisión manual
+    dead_at = Column(TIMESTAMP(timezone=True))
@@ -1,10 +1,14 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, TIMESTAMP, func
+from sqlalchemy import Column, Integer, String, ForeignKey, TIMESTAMP, func, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from app.db import Base
 
 
 class Permission(Base):
     __tablename__ = "permissions"
+    __table_args__ = (
+        UniqueConstraint("user_id", "team_id", name="uq_permissions_user_id_team_id"),
+        Index("ix_permissions_team_id_role", "team_id", "role"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"))
@@ -1,15 +1,31 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, TIMESTAMP, func
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Computed, Integer, String, ForeignKey, TIMESTAMP, func, Index
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB, TSVECTOR
+from sqlalchemy.orm import relationship, deferred
 from app.db import Base
 
 
 class Play(Base):
     __tablename__ = "plays"
+    __table_args__ = (
+        Index("ix_plays_team_id_created_at_id", "team_id", "created_at", "id"),
+        # Búsqueda por equipo (btree_gin + pg_trgm, migración 0006)
+        Index("ix_plays_team_id_search_vector", "team_id", "search_vector", postgresql_using="gin"),
+        Index("ix_plays_team_id_name_trgm", "team_id", "name", postgresql_using="gin",
+              postgresql_ops={"name": "gin_trgm_ops"}),
+        Index("ix_plays_team_id_tags", "team_id", "tags", postgresql_using="gin"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     team_id = Column(Integer, ForeignKey("teams.id", ondelete="CASCADE"))
     name = Column(String, nullable=False)
     created_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
+    # Solo con PLAY_STORE_BACKEND=postgres (con mongo los datos viven en plays_data).
+    # deferred: select(Play) no los carga salvo que se pidan
+    data = deferred(Column(JSONB))
+    revision = Column(Integer, nullable=False, default=0, server_default="0")
+    tags = Column(ARRAY(String), nullable=False, default=list, server_default="{}")
+    # Nombre (peso A) + etiquetas (peso B), calculado por Postgres (función play_search_document)
+    search_vector = deferred(Column(TSVECTOR, Computed("play_search_document(name, tags)", persisted=True)))
 
     # Relaciones
     team = relationship("Team", back_populates="plays")
\ No newline at end of file
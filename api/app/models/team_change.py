@@ -0,0 +1,18 @@
+from sqlalchemy import Column, BigInteger, Integer, String, ForeignKey, TIMESTAMP, func, Index
+from app.db import Base
+
+
+# Feed de cambios por equipo (GET /teams/{team_id}/changes): una fila por alta/cambio/baja de jugada o miembro.
+# id es la secuencia del feed; app.services.changes garantiza que dentro de un equipo se confirman en orden.
+class TeamChange(Base):
+    __tablename__ = "team_changes"
+    __table_args__ = (
+        Index("ix_team_changes_team_id_id", "team_id", "id"),
+    )
+
+    id = Column(BigInteger, primary_key=True)
+    team_id = Column(Integer, ForeignKey("teams.id", ondelete="CASCADE"), nullable=False)
+    entity = Column(String, nullable=False)  # play, member
+    entity_id = Column(Integer, nullable=False)  # id de la jugada o del usuario
+    op = Column(String, nullable=False)  # upsert, delete
+    created_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=func.now())
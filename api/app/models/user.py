@@ -11,6 +11,8 @@ class User(Base):
     email = Column(String, unique=True, nullable=False, index=True)
     username = Column(String, unique=True, nullable=False, index=True)
     password_hash = Column(String, nullable=False)
+    # Se incrementa para revocar los tokens emitidos (cambio de contraseña, borrado...)
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")
 
     # Relaciones
     permissions = relationship("Permission", back_populates="user")
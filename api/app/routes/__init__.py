@@ -1,5 +1,6 @@
 from .auth import router as auth
 from .teams import router as teams
 from .plays import router as plays
+from .bootstrap import router as bootstrap
 
-__all__ = ["auth", "teams", "plays"]
+__all__ = ["auth", "teams", "plays", "bootstrap"]
@@ -5,13 +5,17 @@ from sqlalchemy.future import select
 from sqlalchemy import delete, or_
 from app import db, models, schemas
 from app.core.auth import (
-    verify_password,
+    verify_and_update_password,
     get_password_hash,
-    create_access_token,
-    get_current_user
+    create_user_token,
+    get_current_user,
+    Principal
 )
+from app.core.auth import invalidate_token_versions, revoke_user_tokens
+from app.core.roles import invalidate_roles
+from app.core.body import ORJSONRoute
 
-router = APIRouter(prefix="/auth", tags=["Auth"])
+router = APIRouter(prefix="/auth", tags=["Auth"], route_class=ORJSONRoute)
 
 
 # 👉 Registro de usuario
@@ -33,13 +37,13 @@ async def register(user: schemas.UserCreate, db_sess: AsyncSession = Depends(db.
     new_user = models.User(
         email=user.email.lower(),
         username=user.username.lower(),
-        password_hash=get_password_hash(user.password),
+        password_hash=await get_password_hash(user.password),
     )
     db_sess.add(new_user)
     await db_sess.commit()
     await db_sess.refresh(new_user)
 
-    access_token = create_access_token(data={"sub": new_user.email})
+    access_token = create_user_token(new_user)
     return {"access_token": access_token, "token_type": "bearer"}
 
 
@@ -53,17 +57,26 @@ async def login(form_data: schemas.UserLogin, db_sess: AsyncSession = Depends(db
     )
     user = result.scalars().first()
 
-    if not user or not verify_password(form_data.password, user.password_hash):
+    if not user:
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
-    access_token = create_access_token(data={"sub": user.email})
+    valid, new_hash = await verify_and_update_password(form_data.password, user.password_hash)
+    if not valid:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+
+    # Rehash transparente si cambió el coste configurado
+    if new_hash:
+        user.password_hash = new_hash
+        await db_sess.commit()
+
+    access_token = create_user_token(user)
     return {"access_token": access_token, "token_type": "bearer"}
 
 
 
 # 👉 Info del usuario logueado
 @router.get("/me", response_model=schemas.UserOut)
-async def me(current_user: models.User = Depends(get_current_user)):
+async def me(current_user: Principal = Depends(get_current_user)):
     return schemas.UserOut.from_orm(current_user)
 
 
@@ -75,5 +88,15 @@ async def delete_all_users(
 ):
     await db_sess.execute(delete(models.User))
     await db_sess.commit()
+    # Los tokens de los usuarios borrados dejan de ser válidos (en todos los workers)
+    await invalidate_token_versions()
+    await invalidate_roles()
+    return None
+
+
+# 👉 Cerrar sesión en todos los dispositivos: los tokens emitidos hasta ahora dejan de valer
+@router.post("/logout_all", status_code=204)
+async def logout_all(current_user: Principal = Depends(get_current_user), db_sess: AsyncSession = Depends(db.get_db)):
+    await revoke_user_tokens(db_sess, current_user.id)
     return None
 
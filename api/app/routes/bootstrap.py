@@ -0,0 +1,125 @@
+# app/routes/bootstrap.py
+# Arranque del cliente Unity en una sola petición (antes: /auth/me, /teams/me, /plays/{team_id} por equipo
+# y /plays/{id}/data por jugada). Un solo token, una sola sesión de Postgres y pocas lecturas de datos ($in por lotes).
+#
+# data=all con jugadas grandes: se incluyen datos hasta BOOTSTRAP_MAX_DATA_BYTES; las demás jugadas van sin "data"
+# y "data_truncated": true (el cliente las pide con /plays/{id}/data). La compresión se hace en un hilo.
+import asyncio
+import os
+
+import orjson
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import db, models
+from app.core import get_current_user, Principal, serialization, compression
+from app.core.body import ORJSONRoute
+from app.core.roles import remember_roles
+from app.routes.teams import user_team_permissions
+from app.services.play_store import PlayStore, get_play_store
+
+router = APIRouter(prefix="/bootstrap", route_class=ORJSONRoute)
+
+# Máximo de jugadas listadas y de jugadas con data en una respuesta (el resto, con los endpoints paginados)
+BOOTSTRAP_MAX_PLAYS = int(os.getenv("BOOTSTRAP_MAX_PLAYS", 5000))
+BOOTSTRAP_MAX_DATA_PLAYS = int(os.getenv("BOOTSTRAP_MAX_DATA_PLAYS", 500))
+# Máximo de bytes de data en una respuesta (sin comprimir) y jugadas por lectura del almacén
+BOOTSTRAP_MAX_DATA_BYTES = int(os.getenv("BOOTSTRAP_MAX_DATA_BYTES", 32 * 1024 * 1024))
+BOOTSTRAP_DATA_BATCH_SIZE = int(os.getenv("BOOTSTRAP_DATA_BATCH_SIZE", 100))
+
+
+# 🔹 data=all -> todas las jugadas listadas; data=1,2,3 -> solo esas; sin data -> ninguna
+def _parse_data_ids(data: str | None) -> set[int] | None:
+    if not data:
+        return set()
+    if data == "all":
+        return None
+    try:
+        ids = {int(value) for value in data.split(",") if value.strip()}
+    except ValueError:
+        raise HTTPException(status_code=400, detail="data must be 'all' or a comma-separated list of play ids")
+    if len(ids) > BOOTSTRAP_MAX_DATA_PLAYS:
+        raise HTTPException(status_code=413, detail=f"Too many plays with data (max {BOOTSTRAP_MAX_DATA_PLAYS})")
+    return ids
+
+
+# 🔹 Datos de las jugadas en orden y por lotes hasta BOOTSTRAP_MAX_DATA_BYTES
+#    Devuelve (play_id -> bytes JSON, ids incluidos); un id incluido sin bytes aún no tiene datos (outbox)
+async def _read_data(db_sess: AsyncSession, store: PlayStore, play_ids: list[int]) -> tuple[dict[int, bytes], list[int]]:
+    data_map: dict[int, bytes] = {}
+    included: list[int] = []
+    size = 0
+    for start in range(0, len(play_ids), BOOTSTRAP_DATA_BATCH_SIZE):
+        batch = play_ids[start:start + BOOTSTRAP_DATA_BATCH_SIZE]
+        found = await store.data_map(db_sess, batch, [])
+        for play_id in batch:
+            raw = found.get(play_id)
+            if raw is not None:
+                if size + len(raw) > BOOTSTRAP_MAX_DATA_BYTES:
+                    return data_map, included
+                size += len(raw)
+                data_map[play_id] = raw
+            included.append(play_id)
+    return data_map, included
+
+
+# 📌 Usuario, equipos (con rol) y jugadas de todos sus equipos; opcionalmente con data
+@router.get("")
+async def bootstrap(
+    data: str | None = Query(None, description="all, o ids de jugadas separados por comas, para incluir su data"),
+    accept_encoding: str | None = Header(None),
+    current_user: Principal = Depends(get_current_user),
+    db_sess: AsyncSession = Depends(db.get_db),
+    store: PlayStore = Depends(get_play_store)
+):
+    data_ids = _parse_data_ids(data)
+
+    # Permisos: una consulta para todos los equipos (y quedan en la caché de roles para las siguientes peticiones)
+    teams = await user_team_permissions(db_sess, current_user)
+    remember_roles(current_user.id, {team.team_id: team.role for team in teams})
+
+    plays = []
+    truncated = False
+    if teams:
+        result = await db_sess.execute(
+            select(models.Play.id, models.Play.team_id, models.Play.name, models.Play.tags, models.Play.created_at)
+            .filter(models.Play.team_id.in_([team.team_id for team in teams]))
+            .order_by(models.Play.team_id, models.Play.created_at, models.Play.id)
+            .limit(BOOTSTRAP_MAX_PLAYS + 1)
+        )
+        plays = result.all()
+        truncated = len(plays) > BOOTSTRAP_MAX_PLAYS
+        plays = plays[:BOOTSTRAP_MAX_PLAYS]
+
+    # Solo jugadas de los equipos del usuario: los ids ajenos se ignoran
+    requested = [play.id for play in plays if data_ids is None or play.id in data_ids]
+    if len(requested) > BOOTSTRAP_MAX_DATA_PLAYS:
+        raise HTTPException(status_code=413, detail=f"Too many plays with data (max {BOOTSTRAP_MAX_DATA_PLAYS})")
+    data_map, included = await _read_data(db_sess, store, requested)
+    with_data = set(included)
+
+    items = []
+    for play in plays:
+        meta = {"id": play.id, "team_id": play.team_id, "name": play.name, "tags": play.tags, "created_at": play.created_at}
+        if play.id in with_data:
+            # null si aún no hay datos (creación pendiente en el outbox)
+            items.append(serialization.splice_play(meta, data_map.get(play.id, b"null")))
+        else:
+            items.append(orjson.dumps(meta))
+
+    head = orjson.dumps({
+        "user": {"id": current_user.id, "email": current_user.email, "username": current_user.username},
+        "teams": [team.model_dump() for team in teams],
+        "truncated": truncated,
+        "data_truncated": len(included) < len(requested),
+    })
+    body = head[:-1] + b',"plays":[' + b",".join(items) + b"]}"
+
+    headers = {"Cache-Control": "private, no-cache", "Vary": "Accept-Encoding"}
+    encoding = compression.response_encoding(accept_encoding, len(body))
+    if encoding:
+        headers["Content-Encoding"] = encoding
+        # Puede ser un cuerpo de decenas de MB: fuera del event loop (zlib y zstd sueltan el GIL)
+        body = await asyncio.to_thread(compression.compress, body, encoding)
+    return Response(body, media_type="application/json", headers=headers)
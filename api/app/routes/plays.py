@@ -1,150 +1,464 @@
-from app.schemas.play import PlayCreateRequest
-from fastapi import APIRouter, Depends, HTTPException, status
+from app.schemas.play import PlayCreateRequest, PlayUpdateRequest, parse_play_data, normalize_tags
+from fastapi import APIRouter, Body, Depends, Header, HTTPException, Query, Request, Response, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from bson import ObjectId
+from sqlalchemy import insert, tuple_
+from datetime import datetime
 from typing import List
+import os
+import time
+import orjson
 
 from app import models, db
-from app.core import get_current_user
-import json
-from app.db.mongo import get_mongo_client
+from app.core import get_current_user, authenticate_token, Principal
+from app.core.roles import get_user_role
+from app.core.pagination import page_params, parse_fields, decode_cursor, encode_cursor, set_next_cursor, NEXT_CURSOR_HEADER
+from app.core import serialization, play_cache, compression
+from app.services import revisions, collab, changes, play_search
+from app.services.play_store import PlayStore, get_play_store
+from app.core.body import ORJSONRoute, max_body_size
+from app.core.query_stats import query_budget
 
-router = APIRouter(prefix="/plays")
+router = APIRouter(prefix="/plays", route_class=ORJSONRoute)
 
-def get_plays_collection():
-    mongo_db = get_mongo_client()
-    return mongo_db["plays_data"]
+PLAY_COLUMNS = {"id", "team_id", "name", "tags", "created_at"}
+PLAY_FIELDS = PLAY_COLUMNS | {"data"}
+
+# Revisión actual del documento de la jugada (para If-Match en PUT/PATCH /plays/{id}/data)
+REVISION_HEADER = "X-Play-Revision"
+
+# Jugadas por lote en la exportación en streaming (una consulta de datos por lote)
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", 200))
+
+# Importación masiva: jugadas por escritura en el almacén de datos y máximo por petición
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", 1000))
+IMPORT_MAX_ITEMS = int(os.getenv("IMPORT_MAX_ITEMS", 50_000))
+IMPORT_MAX_BODY_BYTES = int(os.getenv("IMPORT_MAX_BODY_BYTES", 200 * 1024 * 1024))
 
 # 🔹 Middleware/función de permisos
-async def check_user_role(user: models.User, team_id: int, db_sess: AsyncSession, allowed_roles: List[str]):
-    result = await db_sess.execute(
-        select(models.Permission).filter_by(user_id=user.id, team_id=team_id)
-    )
-    perm = result.scalar_one_or_none()
-    if not perm or perm.role not in allowed_roles:
+async def check_user_role(user: Principal, team_id: int, db_sess: AsyncSession, allowed_roles: List[str]):
+    role = await get_user_role(db_sess, user.id, team_id)
+    if role not in allowed_roles:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="No tienes permisos suficientes para esta acción"
         )
-    return perm
+    return role
+
+# 🔹 Página de jugadas ordenada por (created_at, id), pidiendo a Postgres solo las columnas necesarias
+async def _fetch_play_page(db_sess: AsyncSession, team_id: int, selected: set[str], limit: int, cursor: str | None):
+    columns = {"id", "created_at"} | (selected & PLAY_COLUMNS)
+    query = select(*[getattr(models.Play, c) for c in sorted(columns)]).filter(models.Play.team_id == team_id)
+    if cursor:
+        created_at, last_id = decode_cursor(cursor, 2)
+        try:
+            created_at = datetime.fromisoformat(created_at)
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        if not isinstance(last_id, int):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.filter(tuple_(models.Play.created_at, models.Play.id) > tuple_(created_at, last_id))
+    query = query.order_by(models.Play.created_at, models.Play.id).limit(limit + 1)
+
+    rows = (await db_sess.execute(query)).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor([rows[-1].created_at.isoformat(), rows[-1].id])
+
+def _play_row(row, selected: set[str]) -> dict:
+    play = {"id": row.id}
+    for column in ("team_id", "name", "tags", "created_at"):
+        if column in selected:
+            play[column] = getattr(row, column)
+    return play
+
+# 🔹 Subrutas de data pedidas (None = no hace falta Mongo, [] = data completo)
+def _data_paths(selected: set[str]) -> list[str] | None:
+    paths = sorted(f[len("data."):] for f in selected if f.startswith("data."))
+    if "data" in selected:
+        return []
+    # Mongo rechaza proyecciones solapadas ("frames" y "frames.0"): con el ancestro basta
+    paths = [path for path in paths if not any(path.startswith(other + ".") for other in paths)]
+    return paths or None
 
 # 📌 Crear jugada
+#    Los datos se guardan en la misma transacción que la fila (con Mongo, vía outbox)
 @router.post("/", status_code=201)
 async def create_play(
     request: PlayCreateRequest,
-    current_user: models.User = Depends(get_current_user),
-    db_sess: AsyncSession = Depends(db.get_db)
+    current_user: Principal = Depends(get_current_user),
+    db_sess: AsyncSession = Depends(db.get_db),
+    store: PlayStore = Depends(get_play_store)
 ):
     await check_user_role(current_user, request.team_id, db_sess, ["admin", "editor"])
 
-    new_play = models.Play(team_id=request.team_id, name=request.name)
+    new_play = models.Play(team_id=request.team_id, name=request.name, tags=request.tags)
     db_sess.add(new_play)
+    await db_sess.flush()
+    # data ya llega como objeto (o string JSON legado, parseado en el schema)
+    await store.created(db_sess, [(new_play.id, request.data)], current_user.id)
+    await changes.record(db_sess, request.team_id, "play", [new_play.id])
     await db_sess.commit()
     await db_sess.refresh(new_play)
-
-    plays_collection = get_plays_collection()
-    try:
-        data_dict = json.loads(request.data)  # convertir string JSON a dict
-    except json.JSONDecodeError as e:
-        raise HTTPException(status_code=400, detail=f"JSON inválido: {e}")
-
-    await plays_collection.insert_one({
-        "play_id": new_play.id,
-        "data": data_dict  # ahora se guarda como objeto
-    })
+    store.after_commit()
 
     return {
         "id": new_play.id,
         "team_id": request.team_id,
         "name": request.name,
+        "tags": new_play.tags,
         "created_at": new_play.created_at
     }
 
+# 📌 Importar un playbook completo (array JSON o NDJSON con objetos {"name", "data"})
+@router.post("/{team_id}/import", status_code=201)
+@max_body_size(IMPORT_MAX_BODY_BYTES)
+@query_budget(None)  # una escritura por lote de IMPORT_BATCH_SIZE
+async def import_plays(
+    team_id: int,
+    request: Request,
+    current_user: Principal = Depends(get_current_user),
+    db_sess: AsyncSession = Depends(db.get_db),
+    store: PlayStore = Depends(get_play_store)
+):
+    # Un solo chequeo de rol para todo el lote
+    await check_user_role(current_user, team_id, db_sess, ["admin", "editor"])
+
+    items = _parse_import_body(await request.body(), request.headers.get("content-type", ""))
+    if len(items) > IMPORT_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Too many plays (max {IMPORT_MAX_ITEMS})")
+
+    results: list[dict] = [None] * len(items)
+    valid: list[tuple[int, str, list[str], object]] = []
+    for index, item in enumerate(items):
+        try:
+            valid.append((index, *_validate_import_item(item)))
+        except ValueError as e:
+            results[index] = {"index": index, "status": "error", "detail": str(e)}
+
+    if valid:
+        # INSERT ... VALUES (...), (...) RETURNING id, created_at (por páginas, orden garantizado)
+        inserted = await db_sess.execute(
+            insert(models.Play).returning(models.Play.id, models.Play.created_at, sort_by_parameter_order=True),
+            [{"team_id": team_id, "name": name, "tags": tags} for _, name, tags, _ in valid],
+        )
+        rows = inserted.all()
+        # Los datos se guardan en la misma transacción que las filas
+        for start in range(0, len(valid), IMPORT_BATCH_SIZE):
+            batch = zip(valid[start:start + IMPORT_BATCH_SIZE], rows[start:start + IMPORT_BATCH_SIZE])
+            await store.created(db_sess, [(row.id, data) for (_, _, _, data), row in batch], current_user.id)
+        await changes.record(db_sess, team_id, "play", [row.id for row in rows])
+        await db_sess.commit()
+        store.after_commit()
+
+        for (index, name, tags, _), row in zip(valid, rows):
+            results[index] = {
+                "index": index, "status": "created", "id": row.id, "name": name, "tags": tags, "created_at": row.created_at
+            }
+
+    created = sum(1 for r in results if r["status"] == "created")
+    return {"team_id": team_id, "total": len(items), "created": created, "failed": len(items) - created, "results": results}
+
+
+def _parse_import_body(body: bytes, content_type: str) -> list:
+    try:
+        if "ndjson" in content_type:
+            return [orjson.loads(line) for line in body.splitlines() if line.strip()]
+        items = orjson.loads(body)
+    except orjson.JSONDecodeError as e:
+        raise HTTPException(status_code=400, detail=f"JSON inválido: {e}")
+    if not isinstance(items, list):
+        raise HTTPException(status_code=400, detail="Expected a JSON array or NDJSON")
+    return items
+
+
+def _validate_import_item(item) -> tuple[str, list[str], object]:
+    if not isinstance(item, dict):
+        raise ValueError("Each play must be an object")
+    name = item.get("name")
+    if not isinstance(name, str) or not name.strip():
+        raise ValueError("name is required")
+    tags = normalize_tags(item.get("tags") or [])
+    # Compatibilidad con el formato de Unity (data como string JSON)
+    return name, tags, parse_play_data(item.get("data"))
+
 # 📌 Actualizar jugada
+#    Cuerpo JSON {"name", "data"}; se mantienen los query params name/data (string JSON) de versiones anteriores
 @router.put("/{play_id}")
 async def update_play(
     play_id: int,
+    payload: PlayUpdateRequest | None = Body(None),
     name: str = None,
-    data: str = None,  # string JSON desde Unity
-    current_user: models.User = Depends(get_current_user),
-    db_sess: AsyncSession = Depends(db.get_db)
+    data: str = None,  # string JSON desde Unity (legado)
+    current_user: Principal = Depends(get_current_user),
+    db_sess: AsyncSession = Depends(db.get_db),
+    store: PlayStore = Depends(get_play_store)
 ):
-    result = await db_sess.execute(select(models.Play).filter_by(id=play_id))
-    play = result.scalar_one_or_none()
-    if not play:
-        raise HTTPException(status_code=404, detail="Jugada no encontrada")
+    if payload is not None:
+        name = payload.name or name
+    data_obj = payload.data if payload is not None and payload.data is not None else None
+    if data_obj is None and data:
+        try:
+            data_obj = parse_play_data(data)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
 
-    await check_user_role(current_user, play.team_id, db_sess, ["admin", "editor"])
+    play = await _get_play_for_update(db_sess, current_user, play_id)
 
+    tags = payload.tags if payload is not None else None
     if name:
         play.name = name
+    if tags is not None:
+        play.tags = tags
+    # Si también cambian los datos, un solo registro después de guardarlos (abajo)
+    if (name or tags is not None) and data_obj is None:
+        await changes.record(db_sess, play.team_id, "play", [play.id])
     db_sess.add(play)
     await db_sess.commit()
 
-    if data:
+    if data_obj is not None:
+        await store.save(play.id, data_obj, user_id=current_user.id)
+        # Después de guardar los datos: quien lea el cambio ya ve la versión nueva
+        await changes.record_now(play.team_id, "play", [play.id])
+        await collab.notify_external_write(play.id)
+    await play_cache.invalidate(play.id)
+
+    return {"id": play.id, "name": play.name, "tags": play.tags, "team_id": play.team_id}
+
+
+# 📌 Reemplazar solo los datos de la jugada: el cuerpo (application/json u octet-stream) ES el JSON de la jugada
+#    If-Match: "<revision>" opcional para no pisar cambios de otro usuario (412 si no coincide)
+@router.put("/{play_id}/data")
+async def replace_play_data(
+    play_id: int,
+    request: Request,
+    response: Response,
+    if_match: str | None = Header(None),
+    current_user: Principal = Depends(get_current_user),
+    db_sess: AsyncSession = Depends(db.get_db),
+    store: PlayStore = Depends(get_play_store)
+):
+    try:
+        data_obj = orjson.loads(await request.body())
+    except orjson.JSONDecodeError as e:
+        raise HTTPException(status_code=400, detail=f"JSON inválido: {e}")
+
+    play = await _get_play_for_update(db_sess, current_user, play_id)
+    revision = await store.save(play.id, data_obj, _parse_if_match(if_match), user_id=current_user.id)
+    await changes.record_now(play.team_id, "play", [play.id])
+    await play_cache.invalidate(play.id)
+    await collab.notify_external_write(play.id)
+
+    response.headers[REVISION_HEADER] = str(revision)
+    return {"id": play.id, "name": play.name, "team_id": play.team_id, "revision": revision}
+
+
+# 📌 Edición incremental de los datos de la jugada
+#    application/json-patch+json -> RFC 6902 (lista de operaciones)
+#    application/merge-patch+json -> RFC 7386 (objeto)
+#    application/json -> según el cuerpo (lista = JSON Patch, objeto = merge patch)
+@router.patch("/{play_id}/data")
+async def patch_play(
+    play_id: int,
+    request: Request,
+    response: Response,
+    if_match: str | None = Header(None),
+    current_user: Principal = Depends(get_current_user),
+    db_sess: AsyncSession = Depends(db.get_db),
+    store: PlayStore = Depends(get_play_store)
+):
+    try:
+        patch = orjson.loads(await request.body())
+    except orjson.JSONDecodeError as e:
+        raise HTTPException(status_code=400, detail=f"JSON inválido: {e}")
+
+    content_type = request.headers.get("content-type", "")
+    is_merge = "merge-patch" in content_type or ("json-patch" not in content_type and isinstance(patch, dict))
+    if is_merge and not isinstance(patch, dict):
+        raise HTTPException(status_code=400, detail="A merge patch must be a JSON object")
+    if not is_merge and not isinstance(patch, list):
+        raise HTTPException(status_code=400, detail="A JSON Patch must be an array of operations")
+
+    play = await _get_play_for_update(db_sess, current_user, play_id)
+    revision = await store.patch(
+        play.id,
+        operations=None if is_merge else patch,
+        merge=patch if is_merge else None,
+        expected_revision=_parse_if_match(if_match),
+        user_id=current_user.id,
+    )
+    await changes.record_now(play.team_id, "play", [play.id])
+    await play_cache.invalidate(play.id)
+    await collab.notify_external_write(play.id)
+
+    response.headers[REVISION_HEADER] = str(revision)
+    return {"id": play.id, "revision": revision}
+
+
+# 📌 Edición colaborativa en tiempo real (protocolo en app/services/collab.py)
+#    El token va en ?token=... (Unity WebGL no puede poner cabeceras al abrir el WebSocket) o en Authorization: Bearer
+@router.websocket("/{play_id}/ws")
+async def play_websocket(websocket: WebSocket, play_id: int, token: str | None = Query(None)):
+    if token is None:
+        token = websocket.headers.get("authorization", "").removeprefix("Bearer ").strip()
+    await websocket.accept()
+
+    # Autenticación y permisos una sola vez al conectar (la sesión no queda abierta mientras dura el socket)
+    async with db.AsyncSessionLocal() as db_sess:
         try:
-            data_dict = json.loads(data)
-        except json.JSONDecodeError as e:
-            raise HTTPException(status_code=400, detail=f"JSON inválido: {e}")
-
-        plays_collection = get_plays_collection()
-        await plays_collection.update_one(
-            {"play_id": play.id},
-            {"$set": {"data": data_dict}},
-            upsert=True
-        )
+            user = await authenticate_token(token, db_sess)
+        except HTTPException:
+            await websocket.close(code=4401)
+            return
+        result = await db_sess.execute(select(models.Play.team_id).filter_by(id=play_id))
+        team_id = result.scalar_one_or_none()
+        if team_id is None:
+            await websocket.close(code=4404)
+            return
+        role = await get_user_role(db_sess, user.id, team_id)
+    if role not in ("admin", "editor", "viewer"):
+        await websocket.close(code=4403)
+        return
+
+    connection = collab.Connection(websocket, user.id, can_edit=role in ("admin", "editor"))
+    try:
+        room = await collab.join(play_id, team_id, connection)
+    except HTTPException:
+        await websocket.close(code=4404)
+        return
+    try:
+        while True:
+            await collab.handle_message(room, connection, await websocket.receive_text())
+    except WebSocketDisconnect:
+        pass
+    finally:
+        await collab.leave(room, connection)
 
-    return {"id": play.id, "name": play.name, "team_id": play.team_id}
+
+async def _get_play_for_update(db_sess: AsyncSession, current_user: Principal, play_id: int) -> models.Play:
+    result = await db_sess.execute(select(models.Play).filter_by(id=play_id))
+    play = result.scalar_one_or_none()
+    if not play:
+        raise HTTPException(status_code=404, detail="Jugada no encontrada")
+
+    await check_user_role(current_user, play.team_id, db_sess, ["admin", "editor"])
+    return play
 
 
+def _parse_if_match(if_match: str | None) -> int | None:
+    if if_match is None:
+        return None
+    value = if_match.strip().removeprefix("W/").strip('"')
+    if not value.isdigit():
+        raise HTTPException(status_code=400, detail="If-Match must be a play revision number")
+    return int(value)
+
+
+# 📌 Listar jugadas de un equipo (paginado por cursor, ver X-Next-Cursor)
 @router.get("/{team_id}")
 async def list_team_play_names(
     team_id: int,
-    current_user: models.User = Depends(get_current_user),
+    response: Response,
+    page: tuple[int, str | None] = Depends(page_params),
+    fields: str | None = Query(None, description="Campos separados por comas (id, team_id, name, tags, created_at)"),
+    current_user: Principal = Depends(get_current_user),
     db_sess: AsyncSession = Depends(db.get_db)
 ):
     # validar que el usuario es parte del equipo
     await check_user_role(current_user, team_id, db_sess, ["admin", "editor", "viewer"])
 
-    result = await db_sess.execute(select(models.Play).filter_by(team_id=team_id))
-    plays = result.scalars().all()
+    selected = parse_fields(fields, PLAY_COLUMNS, {"id", "name", "created_at"})
+    rows, next_cursor = await _fetch_play_page(db_sess, team_id, selected, *page)
+    set_next_cursor(response, next_cursor)
 
-    return [{"id": play.id, "name": play.name, "created_at": play.created_at} for play in plays]
-@router.get("/{play_id}/data")
-async def get_play_data(
-    play_id: int,
-    current_user: models.User = Depends(get_current_user),
+    return [_play_row(row, selected) for row in rows]
+
+
+# 📌 Buscar jugadas de un equipo por nombre y etiquetas, ordenadas por relevancia (paginado por cursor)
+@router.get("/{team_id}/search")
+async def search_team_plays(
+    team_id: int,
+    response: Response,
+    q: str | None = Query(None, max_length=200, description="Texto libre (nombre y etiquetas; admite prefijos)"),
+    tags: str | None = Query(None, description="Etiquetas separadas por comas (todas deben estar)"),
+    page: tuple[int, str | None] = Depends(page_params),
+    current_user: Principal = Depends(get_current_user),
     db_sess: AsyncSession = Depends(db.get_db)
 ):
-    result = await db_sess.execute(select(models.Play).filter_by(id=play_id))
-    play = result.scalar_one_or_none()
-    if not play:
-        raise HTTPException(status_code=404, detail="Jugada no encontrada")
+    await check_user_role(current_user, team_id, db_sess, ["admin", "editor", "viewer"])
 
-    await check_user_role(current_user, play.team_id, db_sess, ["admin", "editor", "viewer"])
+    try:
+        tag_list = normalize_tags(tags.split(",")) if tags else []
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-    plays_collection = get_plays_collection()
-    mongo_doc = await plays_collection.find_one({"play_id": play.id})
+    rows, next_cursor = await play_search.search_page(db_sess, team_id, q, tag_list, *page)
+    set_next_cursor(response, next_cursor)
 
-    data_obj = mongo_doc["data"] if mongo_doc else None
+    return [
+        {"id": row.id, "team_id": row.team_id, "name": row.name, "tags": row.tags, "created_at": row.created_at,
+         "rank": float(row.rank)}
+        for row in rows
+    ]
 
-    # 🔥 Aquí el fix: devolver JSON real, no string
-    return {
-        "id": play.id,
-        "name": play.name,
-        "team_id": play.team_id,
-        "created_at": play.created_at,
-        "data": data_obj
-    }
+
+@router.get("/{play_id}/data")
+async def get_play_data(
+    play_id: int,
+    if_none_match: str | None = Header(None),
+    accept_encoding: str | None = Header(None),
+    current_user: Principal = Depends(get_current_user),
+    db_sess: AsyncSession = Depends(db.get_db),
+    store: PlayStore = Depends(get_play_store)
+):
+    cached = play_cache.get(play_id)
+    if cached is not None:
+        # Hit: solo el chequeo de rol (también cacheado), sin Postgres ni Mongo
+        await check_user_role(current_user, cached.team_id, db_sess, ["admin", "editor", "viewer"])
+    else:
+        read_started_at = time.monotonic()
+        play = await store.read(db_sess, play_id)
+        if not play:
+            raise HTTPException(status_code=404, detail="Jugada no encontrada")
+
+        await check_user_role(current_user, play.team_id, db_sess, ["admin", "editor", "viewer"])
+
+        # data se inserta tal cual está guardado (bytes JSON), sin reconstruir el objeto
+        meta = {
+            "id": play.id,
+            "name": play.name,
+            "team_id": play.team_id,
+            "created_at": play.created_at,
+        }
+        body = serialization.splice_play(meta, play.data_json or b"null")
+        # Sin documento todavía (creación pendiente en el outbox): no se cachea el null
+        cached = play_cache.put(
+            play.id, play.team_id, play.revision, body, read_started_at, store=play.data_json is not None
+        )
+
+    headers = {"ETag": cached.etag, "Cache-Control": "private, no-cache", REVISION_HEADER: str(cached.revision),
+               "Vary": "Accept-Encoding"}
+    encoding = compression.response_encoding(accept_encoding, len(cached.body))
+    if encoding:
+        # El ETag fuerte corresponde a los bytes sin comprimir: la versión comprimida lleva uno débil
+        headers["ETag"] = "W/" + cached.etag
+    if play_cache.etag_matches(if_none_match, cached.etag):
+        return Response(status_code=304, headers=headers)
+    if encoding:
+        headers["Content-Encoding"] = encoding
+        return Response(play_cache.encoded_body(cached, encoding), media_type="application/json", headers=headers)
+    return Response(cached.body, media_type="application/json", headers=headers)
 
 
 # 📌 Eliminar jugada
 @router.delete("/{play_id}", status_code=204)
 async def delete_play(
     play_id: int,
-    current_user: models.User = Depends(get_current_user),
-    db_sess: AsyncSession = Depends(db.get_db)
+    current_user: Principal = Depends(get_current_user),
+    db_sess: AsyncSession = Depends(db.get_db),
+    store: PlayStore = Depends(get_play_store)
 ):
     result = await db_sess.execute(select(models.Play).filter_by(id=play_id))
     play = result.scalar_one_or_none()
@@ -154,52 +468,172 @@ async def delete_play(
     # validar rol
     await check_user_role(current_user, play.team_id, db_sess, ["admin", "editor"])
 
-    # eliminar en Postgres
+    # eliminar en Postgres (y los datos en la misma transacción; con Mongo, vía outbox)
     await db_sess.delete(play)
+    await store.play_deleted(db_sess, play.id)
+    await changes.record(db_sess, play.team_id, "play", [play.id], op="delete")
     await db_sess.commit()
+    store.after_commit()
 
-    # eliminar en Mongo
-    plays_collection = get_plays_collection()
-    await plays_collection.delete_one({"play_id": play.id})
+    await play_cache.invalidate(play.id)
+    await collab.notify_external_write(play.id, deleted=True)
 
     return {"detail": "Jugada eliminada"}
+
+
+# 📌 Historial de revisiones de una jugada (más recientes primero, paginado por cursor)
+@router.get("/{play_id}/revisions")
+async def list_play_revisions(
+    play_id: int,
+    response: Response,
+    page: tuple[int, str | None] = Depends(page_params),
+    current_user: Principal = Depends(get_current_user),
+    db_sess: AsyncSession = Depends(db.get_db),
+    store: PlayStore = Depends(get_play_store)
+):
+    play = await _get_play_for_read(db_sess, current_user, play_id)
+    _require_revisions(store)
+    limit, cursor = page
+    before = decode_cursor(cursor, 1)[0] if cursor else None
+    if before is not None and not isinstance(before, int):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    items = await revisions.list_revisions(db.get_revisions_collection(), play.id, limit + 1, before)
+    next_cursor = encode_cursor([items[limit - 1]["rev"]]) if len(items) > limit else None
+    set_next_cursor(response, next_cursor)
+    return items[:limit]
+
+
+# 📌 Datos de la jugada en una revisión concreta (foto más cercana + deltas)
+@router.get("/{play_id}/revisions/{rev}")
+async def get_play_revision(
+    play_id: int,
+    rev: int,
+    current_user: Principal = Depends(get_current_user),
+    db_sess: AsyncSession = Depends(db.get_db),
+    store: PlayStore = Depends(get_play_store)
+):
+    play = await _get_play_for_read(db_sess, current_user, play_id)
+    _require_revisions(store)
+    if rev < 1:
+        raise HTTPException(status_code=404, detail="Revisión no encontrada")
+    data = await revisions.get_revision_data(db.get_revisions_collection(), play.id, rev)
+    return {"id": play.id, "revision": rev, "data": data}
+
+
+def _require_revisions(store: PlayStore) -> None:
+    if not store.supports_revisions:
+        raise HTTPException(status_code=501, detail=f"Revision history is not available with the {store.name} play store")
+
+
+async def _get_play_for_read(db_sess: AsyncSession, current_user: Principal, play_id: int) -> models.Play:
+    result = await db_sess.execute(select(models.Play).filter_by(id=play_id))
+    play = result.scalar_one_or_none()
+    if not play:
+        raise HTTPException(status_code=404, detail="Jugada no encontrada")
+
+    await check_user_role(current_user, play.team_id, db_sess, ["admin", "editor", "viewer"])
+    return play
+
+
 @router.get("/{team_id}/full")
 async def get_full_team_plays(
     team_id: int,
-    current_user: models.User = Depends(get_current_user),
-    db_sess: AsyncSession = Depends(db.get_db)
+    request: Request,
+    response: Response,
+    page: tuple[int, str | None] = Depends(page_params),
+    fields: str | None = Query(None, description="Campos separados por comas; admite subrutas de data (data.frames)"),
+    current_user: Principal = Depends(get_current_user),
+    db_sess: AsyncSession = Depends(db.get_db),
+    store: PlayStore = Depends(get_play_store)
 ):
     # validar permisos
     await check_user_role(current_user, team_id, db_sess, ["admin", "editor", "viewer"])
 
-    # obtener jugadas desde Postgres
-    result = await db_sess.execute(select(models.Play).filter_by(team_id=team_id))
-    plays = result.scalars().all()
+    selected = parse_fields(fields, PLAY_FIELDS, PLAY_FIELDS, nested=frozenset({"data"}))
 
-    if not plays:
+    # obtener jugadas desde Postgres (solo las columnas pedidas)
+    rows, next_cursor = await _fetch_play_page(db_sess, team_id, selected, *page)
+    set_next_cursor(response, next_cursor)
+
+    if not rows:
         return []
 
-    # obtener coleccion mongo
-    plays_collection = get_plays_collection()
+    # sin data: respuesta normal
+    paths = _data_paths(selected)
+    if paths is None:
+        return [_play_row(row, selected) for row in rows]
+
+    # traer los datos del almacén (proyectando las subrutas pedidas) y unir los bytes JSON
+    data_map = await store.data_map(db_sess, [row.id for row in rows], paths)
+    body = b"[" + b",".join(
+        serialization.splice_play(_play_row(row, selected), data_map.get(row.id, b"null"))  # null si aún no hay datos
+        for row in rows
+    ) + b"]"
+
+    headers = {"Vary": "Accept-Encoding"}
+    if next_cursor:
+        headers[NEXT_CURSOR_HEADER] = next_cursor
+    encoding = compression.response_encoding(request.headers.get("accept-encoding"), len(body))
+    if encoding:
+        headers["Content-Encoding"] = encoding
+        body = compression.compress(body, encoding)
+    return Response(body, media_type="application/json", headers=headers)
+
+
+# 📌 Exportar el playbook completo en streaming (NDJSON o array JSON por trozos)
+@router.get("/{team_id}/export")
+@query_budget(None)  # una lectura por lote de EXPORT_BATCH_SIZE
+async def export_team_plays(
+    team_id: int,
+    request: Request,
+    format: str = Query("ndjson", pattern="^(ndjson|json)$"),
+    current_user: Principal = Depends(get_current_user),
+    db_sess: AsyncSession = Depends(db.get_db),
+    store: PlayStore = Depends(get_play_store)
+):
+    await check_user_role(current_user, team_id, db_sess, ["admin", "editor", "viewer"])
 
-    # obtener todos los play_id
-    play_ids = [p.id for p in plays]
+    encoding = compression.negotiate(request.headers.get("accept-encoding"))
+    body = _stream_team_plays(team_id, store, format == "json")
+    headers = {"Vary": "Accept-Encoding"}
+    if encoding:
+        body = compression.compress_stream(body, encoding)
+        headers["Content-Encoding"] = encoding
 
-    # traer documentos desde mongo
-    mongo_docs = await plays_collection.find({"play_id": {"$in": play_ids}}).to_list(length=None)
+    media_type = "application/json" if format == "json" else "application/x-ndjson"
+    return StreamingResponse(body, media_type=media_type, headers=headers)
 
-    # convertir a diccionario por play_id
-    mongo_map = {doc["play_id"]: doc.get("data") for doc in mongo_docs}
 
-    # unir datos
-    full_plays = []
-    for p in plays:
-        full_plays.append({
-            "id": p.id,
-            "team_id": p.team_id,
-            "name": p.name,
-            "created_at": p.created_at,
-            "data": mongo_map.get(p.id)  # None si no existe en mongo
-        })
+# 🔹 Recorre Postgres con un cursor de servidor y el almacén de datos por lotes emparejados: memoria constante
+async def _stream_team_plays(team_id: int, store: PlayStore, as_array: bool):
+    query = (
+        select(models.Play.id, models.Play.team_id, models.Play.name, models.Play.tags, models.Play.created_at)
+        .filter(models.Play.team_id == team_id)
+        .order_by(models.Play.created_at, models.Play.id)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+    first = True
+    if as_array:
+        yield b"["
+
+    # La sesión de la request ya está cerrada cuando se envía el cuerpo: se abre una propia
+    async with db.AsyncSessionLocal() as session:
+        result = await session.stream(query)
+        async for rows in result.partitions(EXPORT_BATCH_SIZE):
+            data_map = await store.data_map(session, [row.id for row in rows], [])
+            chunk = bytearray()
+            for row in rows:
+                play = serialization.splice_play(_play_row(row, PLAY_COLUMNS), data_map.get(row.id, b"null"))
+                if as_array:
+                    if not first:
+                        chunk += b","
+                    chunk += play
+                else:
+                    chunk += play + b"\n"
+                first = False
+            yield bytes(chunk)
+
+    if as_array:
+        yield b"]"
 
-    return full_plays
@@ -1,69 +1,94 @@
 import uuid
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import delete, func, select
 from app import schemas, db
-from app.models import Team, Permission, User
-from app.routes.auth import get_current_user
+from app.models import Team, Permission, User, Play
+from app.core import get_current_user, Principal
+from app.core.roles import get_user_role, invalidate_roles
+from app.core import play_cache
+from app.core import compression
+from app.core.pagination import (
+    page_params, parse_fields, decode_cursor, encode_cursor, set_next_cursor, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE,
+    NEXT_CURSOR_HEADER,
+)
 from sqlalchemy.orm import aliased
+from app.core.body import ORJSONRoute
+from app.services import changes
+from app.services.play_store import PlayStore, get_play_store
 
-router = APIRouter(prefix="/teams", tags=["Teams"])
+router = APIRouter(prefix="/teams", tags=["Teams"], route_class=ORJSONRoute)
+
+TEAM_FIELDS = {"id", "name", "color", "invitation_code"}
 @router.post("/", response_model=schemas.TeamOut)
 async def create_team(
     team: schemas.TeamCreate,
     db_sess: AsyncSession = Depends(db.get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
-    # Obtener todos los equipos donde el usuario es admin
+    # Equipos donde el usuario es admin y cuántos se llaman igual, en una sola consulta
     result = await db_sess.execute(
-        select(Permission).filter(Permission.user_id == current_user.id, Permission.role == "admin")
+        select(func.count(), func.count().filter(Team.name == team.name.upper()))
+        .select_from(Permission)
+        .join(Team, Team.id == Permission.team_id)
+        .filter(Permission.user_id == current_user.id, Permission.role == "admin")
     )
-    existing_permissions = result.scalars().all()
+    owned, same_name = result.one()
 
-    # Limite de 3 equipos por usuario
-    if len(existing_permissions) >= 10:
+    # Limite de 10 equipos por usuario
+    if owned >= 10:
         raise HTTPException(status_code=409, detail="You already own 10 teams")
 
     # Validar que no exista un equipo con el mismo nombre para este usuario
-    for perm in existing_permissions:
-        team_result = await db_sess.execute(
-            select(Team).filter(Team.id == perm.team_id, Team.name == team.name.upper())
-        )
-        existing_team_same_name = team_result.scalar_one_or_none()
-        if existing_team_same_name:
-            raise HTTPException(status_code=409, detail="You already have a team with this name")
+    if same_name:
+        raise HTTPException(status_code=409, detail="You already have a team with this name")
 
-    # Crear nuevo equipo
+    # Crear nuevo equipo y el permiso admin del creador en la misma transacción
     new_team = Team(
         name=team.name.upper(),
         color=team.color,
         invitation_code=str(uuid.uuid4())[:8]
     )
     db_sess.add(new_team)
-    await db_sess.commit()
-    await db_sess.refresh(new_team)
+    await db_sess.flush()
 
-    # Crear permiso admin para el creador
     perm = Permission(user_id=current_user.id, team_id=new_team.id, role="admin")
     db_sess.add(perm)
+    await changes.record(db_sess, new_team.id, "member", [current_user.id])
     await db_sess.commit()
+    await invalidate_roles(current_user.id, new_team.id)
 
     return schemas.TeamOut.from_orm(new_team)
 
 
 
-# 📌 Listar todos los equipos
-@router.get("/", response_model=list[schemas.TeamOut])
-async def list_teams(db_sess: AsyncSession = Depends(db.get_db)):
-    result = await db_sess.execute(select(Team))
-    teams = result.scalars().all()
-    return [schemas.TeamOut.from_orm(t) for t in teams]
-
-@router.get("/me", response_model=list[schemas.PermissionOut])
-async def get_my_team(
-    db_sess: AsyncSession = Depends(db.get_db),
-    current_user: User = Depends(get_current_user)
+# 📌 Listar todos los equipos (paginado por cursor, ver X-Next-Cursor)
+@router.get("/")
+async def list_teams(
+    response: Response,
+    page: tuple[int, str | None] = Depends(page_params),
+    fields: str | None = Query(None, description="Campos separados por comas (id, name, color, invitation_code)"),
+    db_sess: AsyncSession = Depends(db.get_db)
 ):
+    limit, cursor = page
+    selected = parse_fields(fields, TEAM_FIELDS, TEAM_FIELDS) | {"id"}
+    columns = [getattr(Team, c) for c in ("id", "name", "color", "invitation_code") if c in selected]
+
+    query = select(*columns)
+    if cursor:
+        (last_id,) = decode_cursor(cursor, 1)
+        if not isinstance(last_id, int):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.filter(Team.id > last_id)
+    rows = (await db_sess.execute(query.order_by(Team.id).limit(limit + 1))).all()
+
+    if len(rows) > limit:
+        rows = rows[:limit]
+        set_next_cursor(response, encode_cursor([rows[-1].id]))
+    return [dict(row._mapping) for row in rows]
+
+# 🔹 Equipos del usuario con su rol y el dueño de cada uno (también lo usa /bootstrap)
+async def user_team_permissions(db_sess: AsyncSession, current_user: Principal) -> list[schemas.PermissionOut]:
     # Alias para encontrar SOLO al admin real (dueño del equipo)
     owner_perm = aliased(Permission)
     owner_user = aliased(User)
@@ -99,12 +124,19 @@ async def get_my_team(
         for row in rows
     ]
 
+@router.get("/me", response_model=list[schemas.PermissionOut])
+async def get_my_team(
+    db_sess: AsyncSession = Depends(db.get_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    return await user_team_permissions(db_sess, current_user)
+
 # 📌 Unirse a un equipo con invitation_code
 @router.post("/join/{invitation_code}", response_model=schemas.TeamOut)
 async def join_team(
     invitation_code: str,
     db_sess: AsyncSession = Depends(db.get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     result = await db_sess.execute(
         select(Team).filter(Team.invitation_code == invitation_code)
@@ -132,9 +164,11 @@ async def join_team(
     # Invalidar código usado
     team.invitation_code = str(uuid.uuid4())[:8]
     db_sess.add(team)
+    await changes.record(db_sess, team.id, "member", [current_user.id])
 
     await db_sess.commit()
     await db_sess.refresh(team)
+    await invalidate_roles(current_user.id, team.id)
 
     return schemas.TeamOut.from_orm(team)
 
@@ -144,7 +178,7 @@ async def join_team(
 async def leave_team(
     team_id: int,
     db_sess: AsyncSession = Depends(db.get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     result = await db_sess.execute(
         select(Permission).filter(
@@ -162,7 +196,9 @@ async def leave_team(
         raise HTTPException(status_code=400, detail="Admin cannot leave their own team")
 
     await db_sess.delete(permission)
+    await changes.record(db_sess, team_id, "member", [current_user.id], op="delete")
     await db_sess.commit()
+    await invalidate_roles(current_user.id, team_id)
     return None
 
 
@@ -171,37 +207,83 @@ async def leave_team(
 async def delete_team(
     team_id: int,
     db_sess: AsyncSession = Depends(db.get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
-    result = await db_sess.execute(
-        select(Permission).filter(
-            Permission.team_id == team_id,
-            Permission.user_id == current_user.id,
-            Permission.role == "admin"
-        )
-    )
-    admin_perm = result.scalar_one_or_none()
-    if not admin_perm:
+    if await get_user_role(db_sess, current_user.id, team_id) != "admin":
         raise HTTPException(status_code=404, detail="Team not found or you are not admin")
 
-    # Borrar el equipo
-    result = await db_sess.execute(select(Team).filter(Team.id == team_id))
-    team = result.scalar_one_or_none()
-    if team:
-        await db_sess.delete(team)
+    # Borrar el equipo: DELETE directo para que Postgres borre en cascada permisos y jugadas
+    #    (la sesión ORM pondría team_id a NULL en los hijos). Los datos se borran en la misma transacción
+    #    (con Mongo, vía outbox).
+    play_ids = (await db_sess.execute(select(Play.id).filter(Play.team_id == team_id))).scalars().all()
+    result = await db_sess.execute(delete(Team).where(Team.id == team_id))
+    if result.rowcount:
+        store = get_play_store()
+        await store.team_deleted(db_sess, team_id, list(play_ids))
         await db_sess.commit()
+        store.after_commit()
+        await invalidate_roles(team_id=team_id)
+        await play_cache.invalidate(team_id=team_id)
 
     return None
 
 
+# 📌 Cambios del equipo desde `since` (sincronización incremental de jugadas y miembros)
+#    Sin since: solo devuelve el cursor actual; el cliente descarga /plays/{team_id}/full y sigue desde ahí.
+#    Respuesta: {"changes": [...], "cursor": <para el siguiente since>, "has_more": bool}
+@router.get("/{team_id}/changes")
+async def get_team_changes(
+    team_id: int,
+    request: Request,
+    since: str | None = Query(None, description="Cursor devuelto por la llamada anterior"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    data: bool = Query(True, description="Incluir data de las jugadas creadas o modificadas"),
+    db_sess: AsyncSession = Depends(db.get_db),
+    current_user: Principal = Depends(get_current_user),
+    store: PlayStore = Depends(get_play_store)
+):
+    if await get_user_role(db_sess, current_user.id, team_id) not in ("admin", "editor", "viewer"):
+        raise HTTPException(status_code=404, detail="Team not found or you are not a member")
+
+    if since is None:
+        items, last_seq, has_more = [], await changes.head(db_sess, team_id), False
+    else:
+        (since_seq,) = decode_cursor(since, 1)
+        if not isinstance(since_seq, int) or since_seq < 0:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        items, last_seq, has_more = await changes.changes_page(db_sess, store, team_id, since_seq, limit, data)
+
+    cursor = encode_cursor([last_seq])
+    body = (
+        b'{"changes":[' + b",".join(items) + b'],"cursor":"' + cursor.encode()
+        + b'","has_more":' + (b"true" if has_more else b"false") + b"}"
+    )
+    headers = {"Cache-Control": "private, no-cache", "Vary": "Accept-Encoding"}
+    if has_more:
+        headers[NEXT_CURSOR_HEADER] = cursor
+    encoding = compression.response_encoding(request.headers.get("accept-encoding"), len(body))
+    if encoding:
+        headers["Content-Encoding"] = encoding
+        body = compression.compress(body, encoding)
+    return Response(body, media_type="application/json", headers=headers)
+
+
 # 📌 Miembros de un equipo
 @router.get("/{team_id}/members", response_model=list[schemas.PermissionOut])
 async def get_team_members(team_id: int, db_sess: AsyncSession = Depends(db.get_db)):
+    # Dueño del equipo en la misma consulta (como en user_team_permissions)
+    owner_perm = aliased(Permission)
+    owner_user = aliased(User)
+
     result = await db_sess.execute(
-        select(Permission.id, Permission.role, Team.name, Team.color, User.username)
+        select(Permission.id, Permission.role, Team.name, Team.color, User.username,
+               owner_user.username.label("owner"))
         .join(Team, Permission.team_id == Team.id)
         .join(User, Permission.user_id == User.id)
+        .join(owner_perm, owner_perm.team_id == Team.id)
+        .join(owner_user, owner_user.id == owner_perm.user_id)
         .filter(Permission.team_id == team_id)
+        .filter(owner_perm.role == "admin")
     )
     rows = result.all()
 
@@ -209,9 +291,11 @@ async def get_team_members(team_id: int, db_sess: AsyncSession = Depends(db.get_
         schemas.PermissionOut(
             id=row.id,
             username=row.username,
+            team_id=team_id,
             team_name=row.name,
             team_color=row.color,
-            role=row.role
+            role=row.role,
+            owner=row.owner
         )
         for row in rows
     ]
@@ -222,17 +306,9 @@ async def get_team_members(team_id: int, db_sess: AsyncSession = Depends(db.get_
 async def get_invitation_code(
     team_id: int,
     db_sess: AsyncSession = Depends(db.get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
-    result = await db_sess.execute(
-        select(Permission).filter(
-            Permission.team_id == team_id,
-            Permission.user_id == current_user.id,
-            Permission.role == "admin"
-        )
-    )
-    admin_perm = result.scalar_one_or_none()
-    if not admin_perm:
+    if await get_user_role(db_sess, current_user.id, team_id) != "admin":
         raise HTTPException(status_code=404, detail="Team not found or you are not admin")
 
     result = await db_sess.execute(select(Team).filter(Team.id == team_id))
@@ -246,17 +322,9 @@ async def get_invitation_url(
     team_id: int,
     request: Request,
     db_sess: AsyncSession = Depends(db.get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
-    result = await db_sess.execute(
-        select(Permission).filter(
-            Permission.team_id == team_id,
-            Permission.user_id == current_user.id,
-            Permission.role == "admin"
-        )
-    )
-    admin_perm = result.scalar_one_or_none()
-    if not admin_perm:
+    if await get_user_role(db_sess, current_user.id, team_id) != "admin":
         raise HTTPException(status_code=404, detail="Team not found or you are not admin")
 
     result = await db_sess.execute(select(Team).filter(Team.id == team_id))
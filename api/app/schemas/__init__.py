@@ -1,7 +1,7 @@
 from .permission import PermissionCreate, PermissionOut
 from .user import UserCreate, UserOut, UserLogin
 from .team import TeamCreate, TeamOut
-from .play import PlayCreate, PlayOut
+from .play import PlayCreate, PlayOut, PlayCreateRequest, PlayUpdateRequest, parse_play_data, normalize_tags
 from .user import Token
 from .oauth2 import oauth2_scheme
 
@@ -16,6 +16,10 @@ __all__ = [
     "TeamOut",
     "PlayCreate",
     "PlayOut",  
+    "PlayCreateRequest",
+    "PlayUpdateRequest",
+    "parse_play_data",
+    "normalize_tags",
     "Token",
     "TokenData"
 ]
\ No newline at end of file
@@ -1,7 +1,39 @@
 # schemas/plays.py
-from pydantic import BaseModel
+from pydantic import AfterValidator, BaseModel, BeforeValidator
 from datetime import datetime
-from typing import Any
+from typing import Annotated, Any, Optional
+
+import orjson
+
+
+# 👉 data puede llegar como objeto JSON o, por compatibilidad con Unity, como string JSON
+def parse_play_data(value: Any) -> Any:
+    if isinstance(value, (str, bytes)):
+        try:
+            return orjson.loads(value)
+        except orjson.JSONDecodeError as e:
+            raise ValueError(f"JSON inválido: {e}")
+    return value
+
+PlayData = Annotated[Any, BeforeValidator(parse_play_data)]
+
+MAX_PLAY_TAGS = 20
+MAX_TAG_LENGTH = 40
+
+
+# 👉 Etiquetas (ataque, defensa, ATO, press break...): en minúsculas, sin espacios sobrantes ni duplicados
+def normalize_tags(value: Any) -> list[str]:
+    if not isinstance(value, list) or not all(isinstance(tag, str) for tag in value):
+        raise ValueError("tags must be a list of strings")
+    tags = list(dict.fromkeys(" ".join(tag.split()).lower() for tag in value if tag.strip()))
+    if len(tags) > MAX_PLAY_TAGS:
+        raise ValueError(f"Too many tags (max {MAX_PLAY_TAGS})")
+    if any(len(tag) > MAX_TAG_LENGTH for tag in tags):
+        raise ValueError(f"Tags must be at most {MAX_TAG_LENGTH} characters")
+    return tags
+
+PlayTags = Annotated[list[str], AfterValidator(normalize_tags)]
+
 
 class PlayBase(BaseModel):
     name: str
@@ -12,7 +44,13 @@ class PlayCreate(PlayBase):
 class PlayCreateRequest(BaseModel):
     team_id: int
     name: str
-    data: str
+    data: PlayData
+    tags: PlayTags = []
+
+class PlayUpdateRequest(BaseModel):
+    name: Optional[str] = None
+    data: PlayData = None
+    tags: Optional[PlayTags] = None
 
 class PlayOut(PlayBase):
     id: int
@@ -0,0 +1,74 @@
+# app/server.py
+# Arranque en producción (sin --reload):  python -m app.server
+#
+#   WEB_CONCURRENCY                 -> workers (por defecto, los cores disponibles para el contenedor)
+#   HOST / PORT
+#   GRACEFUL_SHUTDOWN_SECONDS       -> espera a las peticiones en curso al recibir SIGTERM; el orquestador
+#                                      debe dar más margen (docker stop -t / terminationGracePeriodSeconds)
+#   KEEP_ALIVE_SECONDS, FORWARDED_ALLOW_IPS, ACCESS_LOG
+#
+# Cada worker tiene sus propios pools (POSTGRES_POOL_SIZE + POSTGRES_MAX_OVERFLOW y MONGO_MAX_POOL_SIZE por worker):
+# workers x pool no debe superar max_connections de Postgres.
+import logging
+import os
+
+import uvicorn
+
+logger = logging.getLogger(__name__)
+
+HOST = os.getenv("HOST", "0.0.0.0")
+PORT = int(os.getenv("PORT", 8000))
+GRACEFUL_SHUTDOWN_SECONDS = int(os.getenv("GRACEFUL_SHUTDOWN_SECONDS", 20))
+KEEP_ALIVE_SECONDS = int(os.getenv("KEEP_ALIVE_SECONDS", 5))
+FORWARDED_ALLOW_IPS = os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1")
+ACCESS_LOG = os.getenv("ACCESS_LOG", "0") == "1"
+
+
+# 👉 Cores que puede usar el proceso: afinidad de CPU y cuota del cgroup (docker --cpus)
+def available_cores() -> int:
+    try:
+        cores = len(os.sched_getaffinity(0))
+    except AttributeError:  # Windows / macOS
+        cores = os.cpu_count() or 1
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            cores = min(cores, max(1, int(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return max(1, cores)
+
+
+def _event_loop() -> str:
+    try:
+        import uvloop  # noqa: F401
+    except ImportError:  # Windows: uvloop no existe
+        return "asyncio"
+    return "uvloop"
+
+
+def main() -> None:
+    workers = int(os.getenv("WEB_CONCURRENCY", available_cores()))
+    if workers > 1 and os.getenv("BROKER_BACKEND", "memory") == "memory":
+        # Las cachés de roles/jugadas y la edición colaborativa se invalidan por el broker
+        logger.warning("⚠️ %s workers con BROKER_BACKEND=memory: usa BROKER_BACKEND=postgres", workers)
+
+    uvicorn.run(
+        "main:app",
+        host=HOST,
+        port=PORT,
+        workers=workers,
+        loop=_event_loop(),
+        http="httptools",
+        lifespan="on",
+        proxy_headers=True,
+        forwarded_allow_ips=FORWARDED_ALLOW_IPS,
+        timeout_keep_alive=KEEP_ALIVE_SECONDS,
+        timeout_graceful_shutdown=GRACEFUL_SHUTDOWN_SECONDS,
+        access_log=ACCESS_LOG,
+    )
+
+
+if __name__ == "__main__":
+    main()
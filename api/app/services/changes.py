@@ -0,0 +1,138 @@
+# app/services/changes.py
+# Feed de cambios por equipo para sincronización incremental (GET /teams/{team_id}/changes)
+#
+#   record()      -> dentro de la transacción de la petición (altas/bajas de jugadas, nombre, miembros)
+#   record_now()  -> en su propia transacción, DESPUÉS de escribir los datos en el almacén
+#                    (si se registrara antes, un cliente podría leer el cambio con los datos antiguos)
+#   outbox        -> con Mongo, el alta se registra con la fila (data aún null) y otra vez cuando el outbox
+#                    aplica el documento, para que quien sincronizó en medio reciba los datos
+#
+# El id de team_changes sale de una secuencia global, pero dos transacciones del mismo equipo podrían
+# confirmarse en orden distinto al de sus ids y un lector saltarse la más lenta. Por eso cada escritura
+# toma un advisory lock del equipo hasta el commit: dentro de un equipo los ids se confirman en orden.
+import logging
+from typing import Any
+
+import orjson
+from sqlalchemy import func, insert, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import models
+from app.core import metrics, serialization
+from app.db.postgres import AsyncSessionLocal
+from app.services.play_store import PlayStore
+
+logger = logging.getLogger(__name__)
+
+# Espacio de nombres del advisory lock (pg_advisory_xact_lock(namespace, team_id))
+CHANGES_LOCK_NAMESPACE = 7_345_003
+
+CHANGES_RECORDED = metrics.Counter("team_changes_recorded_total", "Cambios registrados en el feed de equipos")
+
+
+async def record(db_sess: AsyncSession, team_id: int, entity: str, entity_ids: list[int], op: str = "upsert") -> None:
+    if not entity_ids:
+        return
+    await db_sess.execute(
+        text("SELECT pg_advisory_xact_lock(:namespace, :team_id)"),
+        {"namespace": CHANGES_LOCK_NAMESPACE, "team_id": team_id},
+    )
+    await db_sess.execute(insert(models.TeamChange), [
+        {"team_id": team_id, "entity": entity, "entity_id": entity_id, "op": op} for entity_id in entity_ids
+    ])
+    CHANGES_RECORDED.inc(len(entity_ids), entity=entity, op=op)
+
+
+async def record_now(team_id: int, entity: str, entity_ids: list[int], op: str = "upsert") -> None:
+    async with AsyncSessionLocal() as db_sess:
+        async with db_sess.begin():
+            await record(db_sess, team_id, entity, entity_ids, op)
+
+
+# 👉 Último id del feed del equipo (punto de partida tras una descarga completa)
+async def head(db_sess: AsyncSession, team_id: int) -> int:
+    return await db_sess.scalar(
+        select(func.coalesce(func.max(models.TeamChange.id), 0)).filter(models.TeamChange.team_id == team_id)
+    )
+
+
+# 👉 Página del feed a partir de `since` (exclusivo): (cambios como bytes JSON, último id, hay más)
+#    Varias entradas de la misma entidad en la página se reducen a la última; las altas/cambios
+#    llevan el estado actual y lo que ya no existe se devuelve como borrado (tombstone)
+async def changes_page(
+    db_sess: AsyncSession,
+    store: PlayStore,
+    team_id: int,
+    since: int,
+    limit: int,
+    with_data: bool,
+) -> tuple[list[bytes], int, bool]:
+    rows = (await db_sess.execute(
+        select(models.TeamChange.id, models.TeamChange.entity, models.TeamChange.entity_id, models.TeamChange.op)
+        .filter(models.TeamChange.team_id == team_id, models.TeamChange.id > since)
+        .order_by(models.TeamChange.id)
+        .limit(limit + 1)
+    )).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if not rows:
+        return [], since, False
+
+    latest: dict[tuple[str, int], Any] = {}
+    for row in rows:
+        latest.pop((row.entity, row.entity_id), None)
+        latest[(row.entity, row.entity_id)] = row
+
+    play_ids = [entity_id for (entity, entity_id), row in latest.items() if entity == "play" and row.op == "upsert"]
+    user_ids = [entity_id for (entity, entity_id), row in latest.items() if entity == "member" and row.op == "upsert"]
+
+    plays = {}
+    data_map: dict[int, bytes] = {}
+    if play_ids:
+        result = await db_sess.execute(
+            select(models.Play.id, models.Play.team_id, models.Play.name, models.Play.tags, models.Play.created_at)
+            .filter(models.Play.id.in_(play_ids), models.Play.team_id == team_id)
+        )
+        plays = {play.id: play for play in result}
+        if with_data and plays:
+            data_map = await store.data_map(db_sess, list(plays), [])
+
+    members = {}
+    if user_ids:
+        result = await db_sess.execute(
+            select(models.Permission.user_id, models.Permission.role, models.User.username)
+            .join(models.User, models.User.id == models.Permission.user_id)
+            .filter(models.Permission.team_id == team_id, models.Permission.user_id.in_(user_ids))
+        )
+        members = {member.user_id: member for member in result}
+
+    changes = []
+    for (entity, entity_id), row in latest.items():
+        if entity == "play" and entity_id in plays:
+            play = plays[entity_id]
+            meta = {
+                "id": play.id, "team_id": play.team_id, "name": play.name, "tags": play.tags,
+                "created_at": play.created_at,
+            }
+            body = (
+                serialization.splice_play(meta, data_map.get(play.id, b"null")) if with_data else orjson.dumps(meta)
+            )
+            changes.append(orjson.dumps({"seq": row.id, "type": "play", "op": "upsert"})[:-1] + b',"play":' + body + b"}")
+        elif entity == "member" and entity_id in members:
+            member = members[entity_id]
+            changes.append(orjson.dumps({
+                "seq": row.id, "type": "member", "op": "upsert",
+                "member": {"user_id": member.user_id, "username": member.username, "role": member.role},
+            }))
+        else:
+            # Borrado, o alta/cambio de algo que ya no existe (su borrado llegará en una página posterior)
+            changes.append(orjson.dumps({"seq": row.id, "type": entity, "op": "delete", "id": entity_id}))
+    return changes, rows[-1].id, has_more
+
+
+# 👉 Para escrituras fuera de la petición (edición colaborativa): un fallo no debe tumbar el guardado
+async def record_play_update(team_id: int, play_id: int) -> None:
+    try:
+        await record_now(team_id, "play", [play_id])
+    except Exception:
+        logger.exception("❌ No se pudo registrar el cambio de la jugada %s en el feed del equipo %s", play_id, team_id)
@@ -0,0 +1,395 @@
+# app/services/collab.py
+# Edición colaborativa de jugadas por WebSocket (una "sala" por jugada en cada worker)
+#
+#   cliente -> {"type": "patch", "ops": [...RFC 6902...], "id": <opcional>}
+#   servidor -> {"type": "snapshot", "revision", "data"}    al entrar y tras una escritura externa (PUT/PATCH)
+#               {"type": "patch", "ops", "user_id"}         ediciones de los demás
+#               {"type": "ack", "id"} / {"type": "error", "id", "detail"}
+#               {"type": "saved", "revision"}               tras cada escritura agrupada (de cualquier worker)
+#
+# Las operaciones se validan contra la copia en memoria de la sala, se reenvían enseguida a todos
+# (también a otros workers vía el broker) y se escriben en el almacén de datos agrupadas cada COLLAB_FLUSH_INTERVAL_SECONDS.
+#
+# Escritura agrupada:
+#   - un parche (y una revisión) por cada tramo seguido de ediciones de un mismo usuario, no todo al último
+#   - con expected_revision: si otro worker escribió antes (412) se parte de la revisión guardada y se reintenta;
+#     el almacén vuelve a validar las operaciones sobre el documento actual (si ya no encajan, se recarga la sala)
+#   - antes de escribir se vuelve a comprobar el rol de cada autor (caché de roles, invalidada por el broker):
+#     las ediciones de quien ya no puede editar se descartan y la sala se recarga
+import asyncio
+import itertools
+import logging
+import os
+import uuid
+from typing import Any
+
+import orjson
+from fastapi import HTTPException, WebSocket
+
+from app import db
+from app.core import metrics, play_cache
+from app.core.jsonpatch import PatchError, apply_patch
+from app.core.pubsub import Broker
+from app.core.roles import get_user_role
+from app.services import changes
+from app.services.play_store import get_play_store
+
+logger = logging.getLogger(__name__)
+
+COLLAB_FLUSH_INTERVAL_SECONDS = float(os.getenv("COLLAB_FLUSH_INTERVAL_SECONDS", 0.5))
+# LISTEN/NOTIFY admite ~8 KB por mensaje: los parches más grandes van por PATCH /plays/{id}/data
+COLLAB_MAX_MESSAGE_BYTES = int(os.getenv("COLLAB_MAX_MESSAGE_BYTES", 7000))
+# Intentos de una escritura agrupada cuando otro worker ha escrito antes (412)
+COLLAB_FLUSH_ATTEMPTS = int(os.getenv("COLLAB_FLUSH_ATTEMPTS", 3))
+COLLAB_CHANNEL = "play_edits"
+EDIT_ROLES = ("admin", "editor")
+
+COLLAB_CONNECTIONS = metrics.Gauge("collab_connections", "WebSockets de edición abiertos en este worker")
+COLLAB_OPS = metrics.Counter("collab_operations_total", "Operaciones JSON Patch recibidas por WebSocket")
+COLLAB_FLUSHED_OPS = metrics.Counter("collab_flushed_operations_total", "Operaciones escritas en el almacén tras agrupar")
+
+# Identifica este proceso en los mensajes del broker (cada worker aplica sus propias operaciones una sola vez)
+WORKER_ID = uuid.uuid4().hex
+_connection_ids = itertools.count(1)
+_broker: Broker | None = None
+
+
+class Connection:
+    def __init__(self, websocket: WebSocket, user_id: int, can_edit: bool):
+        self.id = next(_connection_ids)
+        self.websocket = websocket
+        self.user_id = user_id
+        self.can_edit = can_edit
+
+    async def send(self, message: dict) -> None:
+        try:
+            await self.websocket.send_text(orjson.dumps(message).decode())
+        except Exception:
+            # El cliente se ha ido: el bucle de recepción cerrará la conexión
+            pass
+
+
+class Room:
+    def __init__(self, play_id: int, team_id: int):
+        self.play_id = play_id
+        self.team_id = team_id
+        self.data: Any = None
+        self.revision = 0
+        self.connections: dict[int, Connection] = {}
+        # Ediciones sin guardar: [(user_id, operaciones)], un tramo por cada racha de un mismo usuario
+        self.pending: list[tuple[int, list[dict]]] = []
+        self.loaded = False
+        self.lock = asyncio.Lock()
+
+    async def load(self) -> None:
+        stored = await get_play_store().read_data(self.play_id)
+        if stored is None:
+            raise HTTPException(status_code=404, detail="Jugada no encontrada")
+        self.revision, self.data = stored
+        self.loaded = True
+
+    def snapshot(self) -> dict:
+        return {"type": "snapshot", "revision": self.revision, "data": self.data}
+
+    async def broadcast(self, message: dict, exclude: int | None = None) -> None:
+        await asyncio.gather(*(
+            connection.send(message) for connection in list(self.connections.values()) if connection.id != exclude
+        ))
+
+    # 👉 Aplica operaciones sobre la copia de la sala sin copiarla entera (cada edición no copia toda la jugada)
+    #    Devuelve (error, intacta): la copia solo queda a medias si falla una operación después de otra,
+    #    o un move (quita de "from" antes de comprobar "path"); en ese caso hay que recargarla
+    def apply(self, operations: list[dict]) -> tuple[str | None, bool]:
+        for index, operation in enumerate(operations):
+            try:
+                self.data = apply_patch(self.data, [operation], in_place=True)
+            except PatchError as e:
+                is_move = isinstance(operation, dict) and operation.get("op") == "move"
+                return str(e), index == 0 and not is_move
+        return None, True
+
+    def add_pending(self, user_id: int, operations: list[dict]) -> None:
+        if self.pending and self.pending[-1][0] == user_id:
+            self.pending[-1][1].extend(operations)
+        else:
+            self.pending.append((user_id, list(operations)))
+
+    # 👉 Escribe en el almacén las operaciones acumuladas: un parche por tramo de cada usuario
+    async def flush(self) -> None:
+        async with self.lock:
+            if not self.pending:
+                return
+            runs, self.pending = self.pending, []
+            try:
+                roles = await self._editor_roles({user_id for user_id, _ in runs})
+            except Exception:
+                # Postgres no responde: nada se ha escrito, se reintenta en la siguiente vuelta
+                logger.exception("❌ No se pudo comprobar el rol de los autores de la jugada %s", self.play_id)
+                self.pending = runs + self.pending
+                return
+            revoked = {user_id for user_id, role in roles.items() if role not in EDIT_ROLES}
+            runs = [(user_id, operations) for user_id, operations in runs if user_id not in revoked]
+            total, failed = len(runs), False
+            try:
+                await self._write(runs)
+            except HTTPException as e:
+                # El documento cambió por otro camino o ya no existe: se recarga y se reenvía a todos
+                logger.warning("⚠️ No se pudieron guardar las ediciones de la jugada %s: %s", self.play_id, e.detail)
+                failed = True
+            except Exception:
+                # Error transitorio (Postgres/Mongo): lo que no se escribió vuelve a la cola, en el mismo orden
+                logger.exception("❌ Error al guardar las ediciones de la jugada %s, se reintentará", self.play_id)
+                self.pending = runs + self.pending
+            written = len(runs) < total
+        if revoked:
+            await self._revoke(roles)
+        if written:
+            await changes.record_play_update(self.team_id, self.play_id)
+            await play_cache.invalidate(self.play_id)
+            await self.broadcast({"type": "saved", "revision": self.revision})
+            await _publish({"play_id": self.play_id, "type": "saved", "revision": self.revision, "origin": WORKER_ID})
+        if failed or revoked:
+            # La copia en memoria tiene operaciones que no se han guardado: también los demás workers la descartan
+            await notify_external_write(self.play_id)
+
+    # 🔹 Un parche por tramo, encadenando expected_revision; quita de `runs` los tramos ya escritos
+    async def _write(self, runs: list[tuple[int, list[dict]]]) -> None:
+        store = get_play_store()
+        for attempt in range(1, COLLAB_FLUSH_ATTEMPTS + 1):
+            try:
+                while runs:
+                    user_id, operations = runs[0]
+                    operations = coalesce(operations)
+                    self.revision = await store.patch(
+                        self.play_id, operations=operations, expected_revision=self.revision, user_id=user_id
+                    )
+                    COLLAB_FLUSHED_OPS.inc(len(operations))
+                    del runs[0]
+                return
+            except HTTPException as e:
+                if e.status_code != 412 or attempt == COLLAB_FLUSH_ATTEMPTS:
+                    raise
+            # Otro worker escribió antes: las operaciones pendientes se aplican sobre la revisión guardada
+            stored = await store.read_data(self.play_id)
+            if stored is None:
+                raise HTTPException(status_code=404, detail="Jugada no encontrada")
+            self.revision = stored[0]
+
+    # 🔹 Rol actual de cada autor (normalmente desde la caché de roles, sin consultar Postgres)
+    async def _editor_roles(self, user_ids: set[int]) -> dict[int, str | None]:
+        async with db.AsyncSessionLocal() as db_sess:
+            return {user_id: await get_user_role(db_sess, user_id, self.team_id) for user_id in user_ids}
+
+    # 🔹 Quien ya no es editor deja de poder editar; quien ya no es miembro sale de la sala
+    async def _revoke(self, roles: dict[int, str | None]) -> None:
+        for connection in list(self.connections.values()):
+            if connection.user_id not in roles or roles[connection.user_id] in EDIT_ROLES:
+                continue
+            role = roles[connection.user_id]
+            connection.can_edit = False
+            if role is None:
+                self.connections.pop(connection.id, None)
+                try:
+                    await connection.websocket.close(code=4403)
+                except Exception:
+                    pass
+        _update_connections_gauge()
+
+    async def reload(self) -> None:
+        async with self.lock:
+            await self._reload_locked()
+
+    async def _reload_locked(self) -> None:
+        self.pending = []
+        try:
+            await self.load()
+        except HTTPException:
+            await self.close(code=4404)
+            return
+        await self.broadcast(self.snapshot())
+
+    async def close(self, code: int) -> None:
+        for connection in list(self.connections.values()):
+            try:
+                await connection.websocket.close(code=code)
+            except Exception:
+                pass
+        self.connections.clear()
+        if _rooms.get(self.play_id) is self:
+            del _rooms[self.play_id]
+
+
+_rooms: dict[int, Room] = {}
+
+
+# 👉 Reduce las operaciones antes de escribir: de varios "replace" seguidos sobre la misma ruta
+#    (arrastrar un jugador) solo cuenta el último. Cualquier otra operación corta la reducción.
+def coalesce(operations: list[dict]) -> list[dict]:
+    result: list[dict] = []
+    replaced: set[str] = set()
+    for operation in reversed(operations):
+        path = operation.get("path", "")
+        if operation.get("op") != "replace":
+            replaced.clear()
+            result.append(operation)
+            continue
+        if path in replaced:
+            continue
+        if any(p.startswith(path + "/") or path.startswith(p + "/") for p in replaced):
+            replaced.clear()
+        replaced.add(path)
+        result.append(operation)
+    result.reverse()
+    return result
+
+
+async def join(play_id: int, team_id: int, connection: Connection) -> Room:
+    while True:
+        room = _rooms.get(play_id)
+        if room is None:
+            room = _rooms[play_id] = Room(play_id, team_id)
+        async with room.lock:
+            if _rooms.get(play_id) is not room:
+                # La sala se cerró mientras se esperaba el lock: se crea otra
+                continue
+            if not room.loaded:
+                try:
+                    await room.load()
+                except HTTPException:
+                    _rooms.pop(play_id, None)
+                    raise
+            room.connections[connection.id] = connection
+            await connection.send(room.snapshot())
+        break
+    _update_connections_gauge()
+    return room
+
+
+async def leave(room: Room, connection: Connection) -> None:
+    room.connections.pop(connection.id, None)
+    if not room.connections:
+        # Último en salir: se guarda lo pendiente y se libera la sala
+        #   (si no se pudo guardar, la sala sigue y flush_all lo reintenta)
+        await room.flush()
+        _release_if_idle(room)
+    _update_connections_gauge()
+
+
+def _release_if_idle(room: Room) -> None:
+    if not room.connections and not room.pending and _rooms.get(room.play_id) is room:
+        del _rooms[room.play_id]
+
+
+def _update_connections_gauge() -> None:
+    COLLAB_CONNECTIONS.set(sum(len(room.connections) for room in _rooms.values()))
+
+
+# 👉 Mensaje recibido de un cliente
+async def handle_message(room: Room, connection: Connection, raw: str) -> None:
+    try:
+        message = orjson.loads(raw)
+    except orjson.JSONDecodeError:
+        await connection.send({"type": "error", "detail": "JSON inválido"})
+        return
+    if not isinstance(message, dict):
+        await connection.send({"type": "error", "detail": "Expected a JSON object"})
+        return
+
+    kind = message.get("type")
+    message_id = message.get("id")
+    if kind == "ping":
+        await connection.send({"type": "pong", "id": message_id})
+        return
+    if kind != "patch":
+        await connection.send({"type": "error", "id": message_id, "detail": f"Unknown message type: {kind}"})
+        return
+    if not connection.can_edit:
+        await connection.send({"type": "error", "id": message_id, "detail": "No tienes permisos suficientes para esta acción"})
+        return
+
+    operations = message.get("ops")
+    if not isinstance(operations, list) or not operations:
+        await connection.send({"type": "error", "id": message_id, "detail": "ops must be a non-empty array"})
+        return
+    event = {"play_id": room.play_id, "ops": operations, "user_id": connection.user_id,
+             "origin": WORKER_ID, "connection": connection.id}
+    if len(orjson.dumps(event)) > COLLAB_MAX_MESSAGE_BYTES:
+        await connection.send({"type": "error", "id": message_id, "detail": "Patch too large, use PATCH /plays/{id}/data"})
+        return
+
+    async with room.lock:
+        error, intact = room.apply(operations)
+        if error is None:
+            room.add_pending(connection.user_id, operations)
+    if error is not None:
+        await connection.send({"type": "error", "id": message_id, "detail": error})
+        if not intact:
+            # Se guarda lo pendiente (son operaciones, no la copia) y se vuelve a leer la jugada
+            await room.flush()
+            await room.reload()
+        return
+    COLLAB_OPS.inc(len(operations))
+
+    await connection.send({"type": "ack", "id": message_id})
+    await _publish(event)
+
+
+async def _publish(event: dict) -> None:
+    if _broker is not None:
+        await _broker.publish(COLLAB_CHANNEL, event)
+
+
+# 👉 Mensajes del broker (de este worker o de otros)
+async def _on_event(event: dict) -> None:
+    room = _rooms.get(event.get("play_id"))
+    if room is None:
+        return
+
+    kind = event.get("type", "patch")
+    if kind == "reload":
+        await room.flush()
+        await room.reload()
+        return
+    if kind == "deleted":
+        await room.close(code=4404)
+        return
+    if kind == "saved":
+        # Escritura agrupada de otro worker: la siguiente de este parte de esa revisión
+        if event.get("origin") != WORKER_ID and event["revision"] > room.revision:
+            room.revision = event["revision"]
+            await room.broadcast({"type": "saved", "revision": room.revision})
+        return
+
+    if event.get("origin") != WORKER_ID:
+        # Edición hecha en otro worker: se aplica a la copia local (la escritura la hace ese worker)
+        async with room.lock:
+            error, _ = room.apply(event["ops"])
+        if error is not None:
+            # Copia desincronizada: se guarda lo pendiente de este worker y se recarga
+            await room.flush()
+            await room.reload()
+            return
+    exclude = event.get("connection") if event.get("origin") == WORKER_ID else None
+    await room.broadcast({"type": "patch", "ops": event["ops"], "user_id": event.get("user_id")}, exclude=exclude)
+
+
+# 👉 Escrituras que no pasan por el WebSocket (PUT/PATCH/DELETE): las salas abiertas se recargan o cierran
+async def notify_external_write(play_id: int, deleted: bool = False) -> None:
+    await _publish({"play_id": play_id, "type": "deleted" if deleted else "reload"})
+
+
+# 👉 Cada sala por separado: un error en una no deja a las demás sin guardar
+async def flush_all() -> None:
+    for room in list(_rooms.values()):
+        try:
+            await room.flush()
+        except Exception:
+            logger.exception("❌ Error al guardar la sala de la jugada %s", room.play_id)
+        _release_if_idle(room)
+
+
+def setup_collab(broker: Broker) -> None:
+    global _broker
+    _broker = broker
+    broker.subscribe(COLLAB_CHANNEL, _on_event)
+
@@ -0,0 +1,222 @@
+# app/services/outbox.py
+# Outbox transaccional: los cambios que afectan a Mongo se guardan como filas de `outbox` en la misma
+# transacción de Postgres que el cambio de metadatos, y un proceso en segundo plano las aplica en Mongo.
+#
+#   - orden estricto por id (un único consumidor a la vez gracias a un advisory lock)
+#   - escrituras idempotentes ($setOnInsert / deletes), se pueden repetir sin efectos extra
+#   - si Mongo falla: reintento con backoff exponencial; tras OUTBOX_MAX_ATTEMPTS la fila queda marcada (dead_at)
+import asyncio
+import contextvars
+import logging
+import os
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from pymongo import DeleteMany, DeleteOne, UpdateOne
+from pymongo.errors import BulkWriteError
+from sqlalchemy import delete, func, insert, select, text, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import metrics, serialization
+from app.db.mongo import get_plays_collection, get_revisions_collection
+from app.db.postgres import AsyncSessionLocal
+from app.models import OutboxEvent, Play
+from app.services import revisions
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", 500))
+OUTBOX_POLL_INTERVAL_SECONDS = float(os.getenv("OUTBOX_POLL_INTERVAL_SECONDS", 1))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", 10))
+OUTBOX_BACKOFF_BASE_SECONDS = float(os.getenv("OUTBOX_BACKOFF_BASE_SECONDS", 0.5))
+OUTBOX_BACKOFF_MAX_SECONDS = float(os.getenv("OUTBOX_BACKOFF_MAX_SECONDS", 300))
+# Clave del advisory lock que garantiza un solo consumidor entre todos los workers
+OUTBOX_LOCK_ID = 7_345_001
+
+OUTBOX_APPLIED = metrics.Counter("outbox_applied_total", "Eventos de outbox aplicados en Mongo")
+OUTBOX_FAILED = metrics.Counter("outbox_failed_total", "Intentos fallidos al aplicar eventos de outbox")
+OUTBOX_DEAD = metrics.Counter("outbox_dead_total", "Eventos de outbox descartados tras agotar los reintentos")
+OUTBOX_PENDING = metrics.Gauge("outbox_pending", "Eventos de outbox pendientes")
+OUTBOX_LAG = metrics.Gauge("outbox_lag_seconds", "Antigüedad del evento pendiente más antiguo")
+OUTBOX_BATCH_SECONDS = metrics.Histogram("outbox_batch_seconds", "Duración de cada lote aplicado en Mongo")
+
+
+# ---------------- Encolar (dentro de la transacción de la petición) ----------------
+def enqueue_play_upsert(db_sess: AsyncSession, play_id: int, data: Any, user_id: int | None = None) -> None:
+    db_sess.add(OutboxEvent(kind="play_upsert", aggregate_id=play_id, payload={"data": data, "user_id": user_id}))
+
+
+async def enqueue_play_upserts(db_sess: AsyncSession, plays: list[tuple[int, Any]], user_id: int | None = None) -> None:
+    if plays:
+        await db_sess.execute(insert(OutboxEvent), [
+            {"kind": "play_upsert", "aggregate_id": play_id, "payload": {"data": data, "user_id": user_id}}
+            for play_id, data in plays
+        ])
+
+
+def enqueue_play_delete(db_sess: AsyncSession, play_id: int) -> None:
+    db_sess.add(OutboxEvent(kind="play_delete", aggregate_id=play_id, payload={}))
+
+
+def enqueue_team_delete(db_sess: AsyncSession, team_id: int, play_ids: list[int]) -> None:
+    db_sess.add(OutboxEvent(kind="team_delete", aggregate_id=team_id, payload={"play_ids": play_ids}))
+
+
+# ---------------- Aplicar en Mongo ----------------
+def _play_operation(event: OutboxEvent):
+    if event.kind == "play_upsert":
+        # $setOnInsert: si el documento ya existe (reintento, o un PUT llegó antes) no se pisa
+        return UpdateOne(
+            {"play_id": event.aggregate_id},
+            {"$setOnInsert": serialization.play_document(event.aggregate_id, event.payload["data"])},
+            upsert=True,
+        )
+    if event.kind == "play_delete":
+        return DeleteOne({"play_id": event.aggregate_id})
+    if event.kind == "team_delete":
+        return DeleteMany({"play_id": {"$in": event.payload["play_ids"]}})
+    raise ValueError(f"Unknown outbox event: {event.kind}")
+
+
+def _revision_operation(event: OutboxEvent):
+    if event.kind == "play_upsert":
+        if not revisions.PLAY_REVISION_HISTORY:
+            return None
+        document = revisions.snapshot_document(event.aggregate_id, 1, event.payload["data"], event.payload.get("user_id"))
+        return UpdateOne({"play_id": event.aggregate_id, "rev": 1}, {"$setOnInsert": document}, upsert=True)
+    if event.kind == "play_delete":
+        return DeleteMany({"play_id": event.aggregate_id})
+    return DeleteMany({"play_id": {"$in": event.payload["play_ids"]}})
+
+
+# 👉 Devuelve (eventos aplicados, error del primero que falló)
+async def _apply(events: list[OutboxEvent]) -> tuple[int, str | None]:
+    error = None
+    try:
+        await get_plays_collection().bulk_write([_play_operation(event) for event in events], ordered=True)
+        applied = len(events)
+    except BulkWriteError as e:
+        # ordered=True: todo lo anterior al primer error quedó escrito
+        first = (e.details.get("writeErrors") or [{}])[0]
+        applied, error = first.get("index", 0), first.get("errmsg", str(e))
+    revision_ops = [op for op in map(_revision_operation, events[:applied]) if op is not None]
+    if revision_ops:
+        await get_revisions_collection().bulk_write(revision_ops, ordered=False)
+    return applied, error
+
+
+# 👉 Con Mongo, el alta de una jugada llega al feed de cambios con data null (el documento aún no existe):
+#    al aplicar el upsert se registra otro cambio, en la misma transacción que borra el evento
+async def _record_play_changes(db_sess: AsyncSession, events: list[OutboxEvent]) -> None:
+    from app.services import changes
+
+    play_ids = [event.aggregate_id for event in events if event.kind == "play_upsert"]
+    if not play_ids:
+        return
+    by_team: dict[int, list[int]] = defaultdict(list)
+    for play_id, team_id in await db_sess.execute(select(Play.id, Play.team_id).where(Play.id.in_(play_ids))):
+        by_team[team_id].append(play_id)
+    # En orden de equipo: los advisory locks del feed siempre se toman en el mismo orden
+    for team_id in sorted(by_team):
+        await changes.record(db_sess, team_id, "play", by_team[team_id])
+
+
+def _backoff(attempts: int) -> timedelta:
+    return timedelta(seconds=min(OUTBOX_BACKOFF_BASE_SECONDS * 2 ** (attempts - 1), OUTBOX_BACKOFF_MAX_SECONDS))
+
+
+# 👉 Aplica un lote; devuelve cuántos eventos se aplicaron (0 = nada pendiente o bloqueado por backoff/otro worker)
+async def drain_once(batch_size: int = OUTBOX_BATCH_SIZE) -> int:
+    async with AsyncSessionLocal() as db_sess:
+        async with db_sess.begin():
+            locked = await db_sess.scalar(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": OUTBOX_LOCK_ID})
+            if not locked:
+                return 0
+
+            result = await db_sess.execute(
+                select(OutboxEvent)
+                .where(OutboxEvent.dead_at.is_(None))
+                .order_by(OutboxEvent.id)
+                .limit(batch_size)
+            )
+            now = datetime.now(timezone.utc)
+            events = []
+            for event in result.scalars():
+                # El primero en backoff detiene el lote: los eventos posteriores pueden depender de él
+                if event.available_at > now:
+                    break
+                events.append(event)
+            if not events:
+                return 0
+
+            started = time.perf_counter()
+            try:
+                applied, error = await _apply(events)
+            except Exception as e:
+                applied, error = 0, str(e)
+            OUTBOX_BATCH_SECONDS.observe(time.perf_counter() - started)
+
+            if applied:
+                await db_sess.execute(delete(OutboxEvent).where(OutboxEvent.id.in_([e.id for e in events[:applied]])))
+                await _record_play_changes(db_sess, events[:applied])
+                OUTBOX_APPLIED.inc(applied)
+
+            if applied < len(events):
+                failed = events[applied]
+                attempts = failed.attempts + 1
+                values: dict = {"attempts": attempts, "last_error": (error or "write error")[:2000]}
+                if attempts >= OUTBOX_MAX_ATTEMPTS:
+                    values["dead_at"] = now
+                    OUTBOX_DEAD.inc(kind=failed.kind)
+                    logger.error("❌ Evento de outbox %s descartado tras %s intentos", failed.id, attempts)
+                else:
+                    values["available_at"] = now + _backoff(attempts)
+                await db_sess.execute(update(OutboxEvent).where(OutboxEvent.id == failed.id).values(**values))
+                OUTBOX_FAILED.inc(kind=failed.kind)
+            return applied
+
+
+async def _update_lag() -> None:
+    async with AsyncSessionLocal() as db_sess:
+        pending, oldest = (await db_sess.execute(
+            select(func.count(), func.min(OutboxEvent.created_at)).where(OutboxEvent.dead_at.is_(None))
+        )).one()
+    OUTBOX_PENDING.set(pending)
+    OUTBOX_LAG.set((datetime.now(timezone.utc) - oldest).total_seconds() if oldest else 0)
+
+
+_drain_lock = asyncio.Lock()
+_drain_requested = False
+_wake_tasks: set[asyncio.Task] = set()
+
+
+# 👉 Vacía la cola (lote a lote) y actualiza las métricas de retraso
+async def drain() -> None:
+    global _drain_requested
+    _drain_requested = True
+    if _drain_lock.locked():
+        # Ya hay un vaciado en curso en este worker: dará otra vuelta al terminar
+        return
+    async with _drain_lock:
+        while _drain_requested:
+            _drain_requested = False
+            while await drain_once() == OUTBOX_BATCH_SIZE:
+                pass
+        await _update_lag()
+
+
+def _on_wake_done(task: asyncio.Task) -> None:
+    _wake_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        # No es grave: el sondeo periódico lo volverá a intentar
+        logger.warning("⚠️ No se pudo vaciar el outbox: %s", task.exception())
+
+
+# 👉 Tras hacer commit: aplica enseguida sin esperar al siguiente sondeo (la petición no lo espera)
+#    Contexto vacío: las consultas del vaciado no cuentan en las estadísticas de la petición que lo despertó
+def wake() -> None:
+    task = asyncio.get_running_loop().create_task(drain(), context=contextvars.Context())
+    _wake_tasks.add(task)
+    task.add_done_callback(_on_wake_done)
@@ -0,0 +1,170 @@
+# app/services/play_data.py
+# Escrituras del documento de una jugada (plays_data) con control de revisión
+from typing import Any
+
+from fastapi import HTTPException, status
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import ReturnDocument
+from pymongo.errors import OperationFailure
+
+from app.core import serialization
+from app.core.jsonpatch import (
+    PatchError,
+    apply_merge_patch,
+    apply_patch,
+    make_patch,
+    merge_patch_operations,
+    mongo_object_filter,
+    to_mongo_update,
+)
+from app.db.mongo import get_revisions_collection
+from app.services import revisions
+
+# Reintentos del camino "leer, aplicar, escribir" cuando otra escritura se cuela (sin revisión esperada)
+PATCH_MAX_RETRIES = 3
+
+
+def precondition_failed(current: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_412_PRECONDITION_FAILED,
+        detail=f"Play was modified (current revision {current})",
+        headers={"X-Play-Revision": str(current)},
+    )
+
+
+# 👉 Reemplaza data completo; devuelve la nueva revisión
+async def save_play_data(
+    plays_collection: AsyncIOMotorCollection,
+    play_id: int,
+    data: Any,
+    expected_revision: int | None = None,
+    user_id: int | None = None,
+) -> int:
+    query: dict = {"play_id": play_id}
+    if expected_revision is not None:
+        query["revision"] = serialization.revision_query(expected_revision)
+    update = serialization.play_data_update(data)
+
+    if not revisions.PLAY_REVISION_HISTORY:
+        doc = await plays_collection.find_one_and_update(
+            query,
+            update,
+            projection={"_id": 0, "revision": 1},
+            upsert=expected_revision is None,
+            return_document=ReturnDocument.AFTER,
+        )
+        if doc is None:
+            raise await _revision_conflict(plays_collection, play_id)
+        return doc["revision"]
+
+    # Con historial se lee el documento anterior en la misma operación para guardar solo el delta
+    previous = await plays_collection.find_one_and_update(
+        query,
+        update,
+        projection=serialization.READ_PROJECTION,
+        upsert=expected_revision is None,
+        return_document=ReturnDocument.BEFORE,
+    )
+    if previous is None and expected_revision is not None:
+        raise await _revision_conflict(plays_collection, play_id)
+
+    # previous=None con upsert: el documento se acaba de crear con revision 1
+    revision = (previous or {}).get("revision", 0) + 1
+    operations = None if previous is None else make_patch(serialization.data_object(previous), data)
+    await revisions.record_revision(
+        get_revisions_collection(), play_id, revision, data=data, operations=operations, user_id=user_id
+    )
+    return revision
+
+
+async def _revision_conflict(plays_collection: AsyncIOMotorCollection, play_id: int) -> HTTPException:
+    current = await plays_collection.find_one({"play_id": play_id}, {"_id": 0, "revision": 1})
+    return precondition_failed((current or {}).get("revision", 0))
+
+
+# 👉 Aplica un JSON Patch (operations) o un merge patch (merge); devuelve la nueva revisión
+#    Si el parche se puede traducir a $set/$unset/$push se hace en Mongo sin leer el documento;
+#    si no (o con data_json guardado), se lee, se aplica en Python y se reescribe comparando la revisión.
+async def patch_play_data(
+    plays_collection: AsyncIOMotorCollection,
+    play_id: int,
+    operations: list[dict] | None = None,
+    merge: dict | None = None,
+    expected_revision: int | None = None,
+    user_id: int | None = None,
+) -> int:
+    translatable, object_filter = operations, {}
+    if merge is not None:
+        translatable = None
+        merge_operations = merge_patch_operations(merge)
+        if merge_operations is not None:
+            object_filter = mongo_object_filter(merge_operations[1])
+            if object_filter is not None:
+                translatable = merge_operations[0]
+
+    # Con data_json los bytes guardados quedarían desactualizados: solo se traduce con PLAY_DATA_STORAGE=bson
+    translated = None
+    if translatable is not None and not serialization.STORES_JSON:
+        translated = to_mongo_update(translatable, strict=merge is None)
+
+    if translated is not None:
+        update, must_exist = translated
+        query: dict = {"play_id": play_id, **object_filter, **{path: {"$exists": True} for path in must_exist}}
+        if expected_revision is not None:
+            query["revision"] = serialization.revision_query(expected_revision)
+        update["$inc"] = {"revision": 1}
+        try:
+            # data solo viaja de vuelta cuando la nueva revisión es una foto del historial
+            doc = await plays_collection.find_one_and_update(
+                query, update, projection=revisions.SNAPSHOT_AWARE_PROJECTION, return_document=ReturnDocument.AFTER
+            )
+        except OperationFailure:
+            # p.ej. $set dentro de un valor que no es un objeto: lo resuelve el camino completo
+            doc = None
+        if doc is not None:
+            await revisions.record_revision(
+                get_revisions_collection(), play_id, doc["revision"],
+                data=doc.get("data"), operations=operations, merge=merge, user_id=user_id,
+            )
+            return doc["revision"]
+        # Sin coincidencia: el camino completo devuelve el error exacto (404, 412 o 422)
+
+    return await _patch_full_document(plays_collection, play_id, operations, merge, expected_revision, user_id)
+
+
+async def _patch_full_document(
+    plays_collection: AsyncIOMotorCollection,
+    play_id: int,
+    operations: list[dict] | None,
+    merge: dict | None,
+    expected_revision: int | None,
+    user_id: int | None,
+) -> int:
+    for _ in range(PATCH_MAX_RETRIES):
+        doc = await plays_collection.find_one({"play_id": play_id}, serialization.READ_PROJECTION)
+        if doc is None:
+            raise HTTPException(status_code=404, detail="Jugada no encontrada")
+        current = doc.get("revision", 0)
+        if expected_revision is not None and expected_revision != current:
+            raise precondition_failed(current)
+
+        data = serialization.data_object(doc)
+        try:
+            new_data = apply_merge_patch(data, merge) if merge is not None else apply_patch(data, operations)
+        except PatchError as e:
+            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+
+        result = await plays_collection.update_one(
+            {"play_id": play_id, "revision": serialization.revision_query(current)},
+            serialization.play_data_update(new_data),
+        )
+        if result.matched_count:
+            await revisions.record_revision(
+                get_revisions_collection(), play_id, current + 1,
+                data=new_data, operations=operations, merge=merge, user_id=user_id,
+            )
+            return current + 1
+        if expected_revision is not None:
+            raise precondition_failed(current + 1)
+
+    raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Play is being modified concurrently, retry")
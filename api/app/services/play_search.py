@@ -0,0 +1,89 @@
+# app/services/play_search.py
+# Búsqueda de jugadas de un equipo por nombre y etiquetas (GET /plays/{team_id}/search)
+#
+#   q    -> texto libre: cada palabra es un prefijo en el tsvector (nombre + etiquetas) y, con 3+ caracteres,
+#           también se buscan nombres parecidos por trigramas (erratas: "horsn" -> "Horns")
+#   tags -> la jugada debe tener todas las etiquetas pedidas
+#
+# Índices GIN (team_id, ...) de la migración 0006: solo se leen las jugadas del equipo que coinciden.
+# Orden: relevancia (ts_rank + similarity) y id; el cursor es (relevancia, id) de la última fila.
+import os
+import re
+from decimal import Decimal, InvalidOperation
+
+from fastapi import HTTPException
+from sqlalchemy import Numeric, and_, cast, func, literal, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import models
+from app.core.pagination import decode_cursor, encode_cursor
+
+# Palabras de q que se usan (el resto se ignora)
+SEARCH_MAX_TERMS = int(os.getenv("SEARCH_MAX_TERMS", 8))
+# Longitud mínima de q para buscar también por similitud de trigramas
+SEARCH_TRIGRAM_MIN_LENGTH = int(os.getenv("SEARCH_TRIGRAM_MIN_LENGTH", 3))
+
+_TERM = re.compile(r"\w+")
+
+
+# 👉 "press brk" -> "press:* & brk:*" (solo caracteres de palabra: el usuario no puede inyectar operadores)
+def _tsquery(q: str) -> str | None:
+    terms = _TERM.findall(q.lower())[:SEARCH_MAX_TERMS]
+    return " & ".join(f"{term}:*" for term in terms) or None
+
+
+async def search_page(
+    db_sess: AsyncSession,
+    team_id: int,
+    q: str | None,
+    tags: list[str],
+    limit: int,
+    cursor: str | None,
+):
+    q = " ".join((q or "").split())
+    tsquery = _tsquery(q) if q else None
+    if q and tsquery is None:
+        raise HTTPException(status_code=400, detail="q must contain at least one word")
+    if not tsquery and not tags:
+        raise HTTPException(status_code=400, detail="q or tags is required")
+
+    filters = [models.Play.team_id == team_id]
+    if tags:
+        filters.append(models.Play.tags.contains(tags))
+
+    rank = literal(0)
+    if tsquery:
+        query = func.to_tsquery("simple", tsquery)
+        matches = [models.Play.search_vector.op("@@")(query)]
+        rank = func.ts_rank(models.Play.search_vector, query)
+        if len(q) >= SEARCH_TRIGRAM_MIN_LENGTH:
+            # % usa el índice de trigramas (umbral pg_trgm.similarity_threshold, 0.3 por defecto)
+            matches.append(models.Play.name.op("%")(q))
+            rank = rank + func.similarity(models.Play.name, q)
+        filters.append(or_(*matches))
+    # numeric redondeado: el cursor compara exactamente (un real de Postgres no sobrevive al ida y vuelta)
+    rank = func.round(cast(rank, Numeric), 6)
+
+    if cursor:
+        last_rank, last_id = decode_cursor(cursor, 2)
+        try:
+            last_rank = Decimal(last_rank)
+        except (TypeError, InvalidOperation):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        if not isinstance(last_id, int):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        filters.append(or_(rank < last_rank, and_(rank == last_rank, models.Play.id > last_id)))
+
+    rows = (await db_sess.execute(
+        select(
+            models.Play.id, models.Play.team_id, models.Play.name, models.Play.tags, models.Play.created_at,
+            rank.label("rank"),
+        )
+        .filter(*filters)
+        .order_by(rank.desc(), models.Play.id)
+        .limit(limit + 1)
+    )).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor([str(rows[-1].rank), rows[-1].id])
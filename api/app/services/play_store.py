@@ -0,0 +1,331 @@
+# app/services/play_store.py
+# Dónde viven los datos (`data`) de las jugadas. Los metadatos (plays) siempre están en Postgres.
+#
+# PLAY_STORE_BACKEND:
+#   mongo    -> plays_data en Mongo (formato original), escrituras de alta/baja vía outbox, historial de revisiones
+#   postgres -> columna JSONB plays.data: metadatos y datos en una sola fila, una consulta por lectura
+#   memory   -> diccionario en el proceso (tests, desarrollo local)
+import copy
+import os
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any
+
+import orjson
+from fastapi import HTTPException, status
+from sqlalchemy import Text, cast, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import models
+from app.core import serialization
+from app.core.jsonpatch import PatchError, apply_merge_patch, apply_patch
+from app.db import mongo
+from app.db.postgres import AsyncSessionLocal
+from app.services import outbox, play_data
+
+PLAY_STORE_BACKEND = os.getenv("PLAY_STORE_BACKEND", "mongo")
+
+
+# 👉 Jugada lista para servir: metadatos + bytes JSON de data (None = aún sin documento)
+@dataclass(frozen=True)
+class PlayRecord:
+    id: int
+    name: str
+    team_id: int
+    created_at: datetime
+    revision: int
+    data_json: bytes | None
+
+
+class PlayStore:
+    name = "base"
+    # GET /plays/{id}/revisions solo existe con el backend de Mongo
+    supports_revisions = False
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    # ---- lecturas ----
+    async def read(self, db_sess: AsyncSession, play_id: int) -> PlayRecord | None:
+        raise NotImplementedError
+
+    # 👉 play_id -> bytes JSON de data (o solo de las subrutas pedidas)
+    async def data_map(self, db_sess: AsyncSession, play_ids: list[int], paths: list[str]) -> dict[int, bytes]:
+        raise NotImplementedError
+
+    # 👉 (revision, data) como objeto Python, o None si no existe
+    async def read_data(self, play_id: int) -> tuple[int, Any] | None:
+        raise NotImplementedError
+
+    # ---- escrituras (devuelven la nueva revisión) ----
+    async def save(self, play_id: int, data: Any, expected_revision: int | None = None, user_id: int | None = None) -> int:
+        raise NotImplementedError
+
+    async def patch(
+        self,
+        play_id: int,
+        operations: list[dict] | None = None,
+        merge: dict | None = None,
+        expected_revision: int | None = None,
+        user_id: int | None = None,
+    ) -> int:
+        raise NotImplementedError
+
+    # ---- altas y bajas, dentro de la transacción de la petición (antes del commit) ----
+    async def created(self, db_sess: AsyncSession, plays: list[tuple[int, Any]], user_id: int | None = None) -> None:
+        pass
+
+    async def play_deleted(self, db_sess: AsyncSession, play_id: int) -> None:
+        pass
+
+    async def team_deleted(self, db_sess: AsyncSession, team_id: int, play_ids: list[int]) -> None:
+        pass
+
+    # Después del commit de un alta/baja
+    def after_commit(self) -> None:
+        pass
+
+
+def _apply(data: Any, operations: list[dict] | None, merge: dict | None) -> Any:
+    try:
+        return apply_merge_patch(data, merge) if merge is not None else apply_patch(data, operations)
+    except PatchError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+
+
+async def _play_meta(db_sess: AsyncSession, play_id: int):
+    result = await db_sess.execute(
+        select(models.Play.id, models.Play.name, models.Play.team_id, models.Play.created_at).filter_by(id=play_id)
+    )
+    return result.one_or_none()
+
+
+# 👉 Mongo: metadatos en Postgres + documento en plays_data (dos consultas por lectura)
+class MongoPlayStore(PlayStore):
+    name = "mongo"
+    supports_revisions = True
+
+    # collection: solo para benchmarks (por defecto plays_data de la conexión global)
+    def __init__(self, collection=None):
+        self._plays_collection = collection
+
+    async def start(self) -> None:
+        # Solo crea el cliente (sin conexiones); los índices se crean con python -m app.db.migrate
+        mongo.connect_mongo()
+
+    async def stop(self) -> None:
+        mongo.close_mongo()
+
+    def _collection(self):
+        return self._plays_collection if self._plays_collection is not None else mongo.get_plays_collection()
+
+    async def read(self, db_sess: AsyncSession, play_id: int) -> PlayRecord | None:
+        meta = await _play_meta(db_sess, play_id)
+        if meta is None:
+            return None
+        doc = await self._collection().find_one({"play_id": play_id}, serialization.READ_PROJECTION)
+        return PlayRecord(
+            id=meta.id, name=meta.name, team_id=meta.team_id, created_at=meta.created_at,
+            revision=(doc or {}).get("revision", 0),
+            data_json=serialization.data_json_bytes(doc) if doc is not None else None,
+        )
+
+    async def data_map(self, db_sess: AsyncSession, play_ids: list[int], paths: list[str]) -> dict[int, bytes]:
+        if paths and serialization.STORES_BSON:
+            # Las subrutas se proyectan en el propio Mongo
+            projection = {"_id": 0, "play_id": 1, **{f"data.{path}": 1 for path in paths}}
+        else:
+            projection = serialization.READ_PROJECTION
+        docs = await self._collection().find({"play_id": {"$in": play_ids}}, projection).to_list(length=len(play_ids))
+
+        if not paths:
+            return {doc["play_id"]: serialization.data_json_bytes(doc) for doc in docs}
+        if serialization.STORES_BSON:
+            return {doc["play_id"]: orjson.dumps(doc.get("data")) for doc in docs}
+        return {
+            doc["play_id"]: orjson.dumps(serialization.extract_paths(serialization.data_object(doc), paths))
+            for doc in docs
+        }
+
+    async def read_data(self, play_id: int) -> tuple[int, Any] | None:
+        doc = await self._collection().find_one({"play_id": play_id}, serialization.READ_PROJECTION)
+        if doc is None:
+            return None
+        return doc.get("revision", 0), serialization.data_object(doc)
+
+    async def save(self, play_id: int, data: Any, expected_revision: int | None = None, user_id: int | None = None) -> int:
+        return await play_data.save_play_data(self._collection(), play_id, data, expected_revision, user_id)
+
+    async def patch(self, play_id, operations=None, merge=None, expected_revision=None, user_id=None) -> int:
+        return await play_data.patch_play_data(self._collection(), play_id, operations, merge, expected_revision, user_id)
+
+    async def created(self, db_sess: AsyncSession, plays: list[tuple[int, Any]], user_id: int | None = None) -> None:
+        await outbox.enqueue_play_upserts(db_sess, plays, user_id)
+
+    async def play_deleted(self, db_sess: AsyncSession, play_id: int) -> None:
+        outbox.enqueue_play_delete(db_sess, play_id)
+
+    async def team_deleted(self, db_sess: AsyncSession, team_id: int, play_ids: list[int]) -> None:
+        outbox.enqueue_team_delete(db_sess, team_id, play_ids)
+
+    def after_commit(self) -> None:
+        outbox.wake()
+
+
+# 👉 Postgres: data en plays.data (JSONB); la lectura devuelve metadatos y data en una sola consulta
+class PostgresPlayStore(PlayStore):
+    name = "postgres"
+
+    async def read(self, db_sess: AsyncSession, play_id: int) -> PlayRecord | None:
+        # data::text: los bytes JSON salen tal cual de Postgres, sin decodificar a objetos Python
+        result = await db_sess.execute(
+            select(
+                models.Play.id, models.Play.name, models.Play.team_id, models.Play.created_at,
+                models.Play.revision, cast(models.Play.data, Text).label("data_json"),
+            ).filter_by(id=play_id)
+        )
+        row = result.one_or_none()
+        if row is None:
+            return None
+        return PlayRecord(
+            id=row.id, name=row.name, team_id=row.team_id, created_at=row.created_at,
+            revision=row.revision, data_json=(row.data_json or "null").encode(),
+        )
+
+    async def data_map(self, db_sess: AsyncSession, play_ids: list[int], paths: list[str]) -> dict[int, bytes]:
+        if not paths:
+            result = await db_sess.execute(
+                select(models.Play.id, cast(models.Play.data, Text)).where(models.Play.id.in_(play_ids))
+            )
+            return {play_id: (data_json or "null").encode() for play_id, data_json in result}
+        result = await db_sess.execute(select(models.Play.id, models.Play.data).where(models.Play.id.in_(play_ids)))
+        return {play_id: orjson.dumps(serialization.extract_paths(data, paths)) for play_id, data in result}
+
+    async def read_data(self, play_id: int) -> tuple[int, Any] | None:
+        async with AsyncSessionLocal() as db_sess:
+            row = (await db_sess.execute(
+                select(models.Play.revision, models.Play.data).filter_by(id=play_id)
+            )).one_or_none()
+        return None if row is None else (row.revision, row.data)
+
+    async def save(self, play_id: int, data: Any, expected_revision: int | None = None, user_id: int | None = None) -> int:
+        async with AsyncSessionLocal() as db_sess:
+            async with db_sess.begin():
+                query = update(models.Play).where(models.Play.id == play_id)
+                if expected_revision is not None:
+                    query = query.where(models.Play.revision == expected_revision)
+                revision = await db_sess.scalar(
+                    query.values(data=data, revision=models.Play.revision + 1).returning(models.Play.revision)
+                )
+                if revision is None:
+                    current = await db_sess.scalar(select(models.Play.revision).filter_by(id=play_id))
+                    if current is None:
+                        raise HTTPException(status_code=404, detail="Jugada no encontrada")
+                    raise play_data.precondition_failed(current)
+        return revision
+
+    async def patch(self, play_id, operations=None, merge=None, expected_revision=None, user_id=None) -> int:
+        # Leer-aplicar-escribir con la fila bloqueada (FOR UPDATE): sin carreras entre escrituras
+        async with AsyncSessionLocal() as db_sess:
+            async with db_sess.begin():
+                row = (await db_sess.execute(
+                    select(models.Play.revision, models.Play.data).filter_by(id=play_id).with_for_update()
+                )).one_or_none()
+                if row is None:
+                    raise HTTPException(status_code=404, detail="Jugada no encontrada")
+                if expected_revision is not None and expected_revision != row.revision:
+                    raise play_data.precondition_failed(row.revision)
+                new_data = _apply(row.data, operations, merge)
+                await db_sess.execute(
+                    update(models.Play).where(models.Play.id == play_id).values(data=new_data, revision=row.revision + 1)
+                )
+        return row.revision + 1
+
+    async def created(self, db_sess: AsyncSession, plays: list[tuple[int, Any]], user_id: int | None = None) -> None:
+        if plays:
+            # UPDATE ... WHERE id = ? por lotes (bulk update del ORM por clave primaria)
+            await db_sess.execute(
+                update(models.Play), [{"id": play_id, "data": data, "revision": 1} for play_id, data in plays]
+            )
+
+    # Las bajas ya las hace el DELETE en cascada de Postgres
+
+
+# 👉 En memoria: solo para tests y desarrollo (un proceso, sin persistencia)
+class InMemoryPlayStore(PlayStore):
+    name = "memory"
+
+    def __init__(self):
+        self._plays: dict[int, tuple[int, Any]] = {}
+
+    async def read(self, db_sess: AsyncSession, play_id: int) -> PlayRecord | None:
+        meta = await _play_meta(db_sess, play_id)
+        if meta is None:
+            return None
+        stored = self._plays.get(play_id)
+        return PlayRecord(
+            id=meta.id, name=meta.name, team_id=meta.team_id, created_at=meta.created_at,
+            revision=stored[0] if stored else 0,
+            data_json=orjson.dumps(stored[1]) if stored else None,
+        )
+
+    async def data_map(self, db_sess: AsyncSession, play_ids: list[int], paths: list[str]) -> dict[int, bytes]:
+        result = {}
+        for play_id in play_ids:
+            if play_id in self._plays:
+                data = self._plays[play_id][1]
+                result[play_id] = orjson.dumps(serialization.extract_paths(data, paths) if paths else data)
+        return result
+
+    async def read_data(self, play_id: int) -> tuple[int, Any] | None:
+        stored = self._plays.get(play_id)
+        return None if stored is None else (stored[0], copy.deepcopy(stored[1]))
+
+    def _check(self, play_id: int, expected_revision: int | None) -> int:
+        current = self._plays.get(play_id, (0, None))[0]
+        if expected_revision is not None and expected_revision != current:
+            raise play_data.precondition_failed(current)
+        return current
+
+    async def save(self, play_id: int, data: Any, expected_revision: int | None = None, user_id: int | None = None) -> int:
+        revision = self._check(play_id, expected_revision) + 1
+        self._plays[play_id] = (revision, copy.deepcopy(data))
+        return revision
+
+    async def patch(self, play_id, operations=None, merge=None, expected_revision=None, user_id=None) -> int:
+        if play_id not in self._plays:
+            raise HTTPException(status_code=404, detail="Jugada no encontrada")
+        revision = self._check(play_id, expected_revision) + 1
+        self._plays[play_id] = (revision, _apply(self._plays[play_id][1], operations, merge))
+        return revision
+
+    async def created(self, db_sess: AsyncSession, plays: list[tuple[int, Any]], user_id: int | None = None) -> None:
+        for play_id, data in plays:
+            self._plays[play_id] = (1, copy.deepcopy(data))
+
+    async def play_deleted(self, db_sess: AsyncSession, play_id: int) -> None:
+        self._plays.pop(play_id, None)
+
+    async def team_deleted(self, db_sess: AsyncSession, team_id: int, play_ids: list[int]) -> None:
+        for play_id in play_ids:
+            self._plays.pop(play_id, None)
+
+
+_store: PlayStore | None = None
+
+
+def get_play_store() -> PlayStore:
+    global _store
+    if _store is None:
+        if PLAY_STORE_BACKEND == "mongo":
+            _store = MongoPlayStore()
+        elif PLAY_STORE_BACKEND == "postgres":
+            _store = PostgresPlayStore()
+        elif PLAY_STORE_BACKEND == "memory":
+            _store = InMemoryPlayStore()
+        else:
+            raise ValueError(f"❌ PLAY_STORE_BACKEND desconocido: {PLAY_STORE_BACKEND}")
+    return _store
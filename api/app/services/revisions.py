@@ -0,0 +1,145 @@
+# app/services/revisions.py
+# Historial de revisiones de las jugadas (colección play_revisions):
+#   - una foto completa (snapshot) cada REVISION_SNAPSHOT_INTERVAL revisiones (1, 1+K, 1+2K, ...)
+#   - entre medias solo el delta respecto a la revisión anterior (JSON Patch o merge patch)
+# Reconstruir cualquier revisión cuesta como mucho una foto + K-1 deltas.
+import asyncio
+import os
+from datetime import datetime, timezone
+from typing import Any
+
+from fastapi import HTTPException
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import DESCENDING
+
+from app.core.jsonpatch import PatchError, apply_merge_patch, apply_patch
+
+PLAY_REVISION_HISTORY = os.getenv("PLAY_REVISION_HISTORY", "1") == "1"
+REVISION_SNAPSHOT_INTERVAL = int(os.getenv("REVISION_SNAPSHOT_INTERVAL", 20))
+# Revisiones que se conservan por jugada al compactar
+REVISION_RETENTION = int(os.getenv("REVISION_RETENTION", 200))
+
+
+def is_snapshot_revision(rev: int) -> bool:
+    return (rev - 1) % REVISION_SNAPSHOT_INTERVAL == 0
+
+
+# 👉 Proyección para find_one_and_update: trae data solo si la nueva revisión toca foto
+SNAPSHOT_AWARE_PROJECTION = {
+    "_id": 0,
+    "revision": 1,
+    "data": {
+        "$cond": [
+            {"$eq": [{"$mod": [{"$subtract": ["$revision", 1]}, REVISION_SNAPSHOT_INTERVAL]}, 0]},
+            "$data",
+            "$$REMOVE",
+        ]
+    },
+}
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def snapshot_document(play_id: int, rev: int, data: Any, user_id: int | None = None) -> dict:
+    return {"play_id": play_id, "rev": rev, "kind": "snapshot", "data": data, "user_id": user_id, "created_at": _now()}
+
+
+# 👉 Guarda la revisión `rev`: foto si toca (data obligatorio), delta en otro caso
+async def record_revision(
+    revisions: AsyncIOMotorCollection,
+    play_id: int,
+    rev: int,
+    *,
+    data: Any = None,
+    operations: list[dict] | None = None,
+    merge: dict | None = None,
+    user_id: int | None = None,
+) -> None:
+    if not PLAY_REVISION_HISTORY:
+        return
+    if is_snapshot_revision(rev):
+        document = snapshot_document(play_id, rev, data, user_id)
+    elif merge is not None:
+        document = {"play_id": play_id, "rev": rev, "kind": "merge", "merge": merge, "user_id": user_id, "created_at": _now()}
+    else:
+        document = {"play_id": play_id, "rev": rev, "kind": "patch", "ops": operations or [], "user_id": user_id, "created_at": _now()}
+    # replace_one + upsert: idempotente si se reintenta la misma revisión
+    await revisions.replace_one({"play_id": play_id, "rev": rev}, document, upsert=True)
+
+
+async def list_revisions(revisions: AsyncIOMotorCollection, play_id: int, limit: int, before: int | None) -> list[dict]:
+    query: dict = {"play_id": play_id}
+    if before is not None:
+        query["rev"] = {"$lt": before}
+    cursor = revisions.find(
+        query, {"_id": 0, "rev": 1, "kind": 1, "user_id": 1, "created_at": 1}
+    ).sort("rev", DESCENDING).limit(limit)
+    return await cursor.to_list(length=limit)
+
+
+# 👉 Reconstruye los datos de la revisión `rev` (foto más cercana + deltas)
+async def get_revision_data(revisions: AsyncIOMotorCollection, play_id: int, rev: int) -> Any:
+    snapshot = await revisions.find_one(
+        {"play_id": play_id, "rev": {"$lte": rev}, "kind": "snapshot"},
+        {"_id": 0, "rev": 1, "data": 1},
+        sort=[("rev", DESCENDING)],
+    )
+    if snapshot is None:
+        raise HTTPException(status_code=404, detail="Revisión no encontrada")
+
+    deltas = await revisions.find(
+        {"play_id": play_id, "rev": {"$gt": snapshot["rev"], "$lte": rev}},
+        {"_id": 0, "rev": 1, "kind": 1, "ops": 1, "merge": 1},
+    ).sort("rev", 1).to_list(length=rev - snapshot["rev"])
+
+    expected = list(range(snapshot["rev"] + 1, rev + 1))
+    if [delta["rev"] for delta in deltas] != expected:
+        raise HTTPException(status_code=404, detail="Revisión no encontrada")
+
+    # En un hilo: con jugadas grandes aplicar ~20 deltas bloquearía el event loop
+    try:
+        return await asyncio.to_thread(apply_deltas, snapshot["data"], deltas)
+    except PatchError:
+        raise HTTPException(status_code=409, detail="El historial de esta jugada está incompleto")
+
+
+# 👉 Aplica los deltas sobre `data` sin copiarlo en cada paso (data debe ser una copia propia, p.ej. recién leída)
+def apply_deltas(data: Any, deltas: list[dict]) -> Any:
+    for delta in deltas:
+        if delta["kind"] == "merge":
+            data = apply_merge_patch(data, delta["merge"], in_place=True)
+        else:
+            data = apply_patch(data, delta["ops"], in_place=True)
+    return data
+
+
+# 👉 Retención: deja las últimas `keep` revisiones de cada jugada.
+#    La revisión más antigua que se conserva se convierte en foto para que siga siendo reconstruible.
+async def compact_revisions(revisions: AsyncIOMotorCollection, keep: int = REVISION_RETENTION) -> int:
+    removed = 0
+    pipeline = [
+        {"$group": {"_id": "$play_id", "max_rev": {"$max": "$rev"}, "count": {"$sum": 1}}},
+        {"$match": {"count": {"$gt": keep}}},
+    ]
+    async for group in revisions.aggregate(pipeline):
+        play_id = group["_id"]
+        oldest_kept = group["max_rev"] - keep + 1
+
+        oldest = await revisions.find_one({"play_id": play_id, "rev": oldest_kept}, {"_id": 0, "kind": 1})
+        if oldest is None:
+            continue
+        if oldest["kind"] != "snapshot":
+            try:
+                data = await get_revision_data(revisions, play_id, oldest_kept)
+            except HTTPException:
+                # Historial con huecos: no se puede materializar, se deja para revisión manual
+                continue
+            await revisions.replace_one(
+                {"play_id": play_id, "rev": oldest_kept}, snapshot_document(play_id, oldest_kept, data)
+            )
+
+        result = await revisions.delete_many({"play_id": play_id, "rev": {"$lt": oldest_kept}})
+        removed += result.deleted_count
+    return removed
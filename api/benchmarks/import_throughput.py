@@ -0,0 +1,126 @@
+# benchmarks/import_throughput.py
+# Rendimiento de POST /plays/{team_id}/import (app ASGI en el mismo proceso, sin servidor HTTP):
+#   importa --plays jugadas "realistas" (benchmarks.play_serialization.make_play) por tamaño y formato
+#   (array JSON y NDJSON) en peticiones de --batch jugadas, e informa jugadas/s frente al objetivo (5.000/s).
+#
+# Uso (desde api/, con POSTGRES_URL apuntando a una base de datos de prueba ya migrada):
+#   python -m benchmarks.import_throughput --store postgres --plays 20000 --batch 5000
+#   python -m benchmarks.import_throughput --store mongo --sizes 2000,20000
+#
+# El usuario y el equipo llevan el prefijo del run y se borran al terminar (las jugadas caen en cascada).
+import argparse
+import asyncio
+import os
+import time
+import uuid
+
+import httpx
+import orjson
+from dotenv import load_dotenv
+from sqlalchemy import delete, insert
+
+from benchmarks.play_serialization import make_play
+
+load_dotenv()
+
+PASSWORD = "import-password"
+TARGET_PLAYS_PER_SECOND = 5_000
+FORMATS = {"json": "application/json", "ndjson": "application/x-ndjson"}
+
+
+# Los módulos de app se importan dentro de las funciones: leen la configuración (PLAY_STORE_BACKEND) al importarse
+async def seed(prefix: str) -> int:
+    from app import models
+    from app.core.auth import get_password_hash
+    from app.db.postgres import AsyncSessionLocal
+
+    async with AsyncSessionLocal() as db_sess:
+        user_id = (await db_sess.execute(
+            insert(models.User).returning(models.User.id),
+            {"email": f"{prefix}@import.local", "username": prefix, "password_hash": await get_password_hash(PASSWORD)},
+        )).scalar_one()
+        team_id = (await db_sess.execute(
+            insert(models.Team).returning(models.Team.id),
+            {"name": f"{prefix.upper()}TEAM", "color": "#FF8800", "invitation_code": prefix},
+        )).scalar_one()
+        await db_sess.execute(insert(models.Permission), {"user_id": user_id, "team_id": team_id, "role": "admin"})
+        await db_sess.commit()
+    return team_id
+
+
+async def cleanup(prefix: str) -> None:
+    from app import models
+    from app.db.postgres import AsyncSessionLocal
+
+    async with AsyncSessionLocal() as db_sess:
+        await db_sess.execute(delete(models.Team).where(models.Team.invitation_code == prefix))
+        await db_sess.execute(delete(models.User).where(models.User.username == prefix))
+        await db_sess.commit()
+
+
+def build_body(play: dict, count: int, fmt: str, offset: int) -> bytes:
+    items = [{"name": f"Import {offset + i}", "data": play, "tags": ["import"]} for i in range(count)]
+    if fmt == "ndjson":
+        return b"\n".join(orjson.dumps(item) for item in items)
+    return orjson.dumps(items)
+
+
+async def bench(client, headers: dict, team_id: int, play: dict, fmt: str, args) -> tuple[float, int, int]:
+    # Los cuerpos se construyen antes de medir: solo cuenta el trabajo del servidor
+    bodies = []
+    for offset in range(0, args.plays, args.batch):
+        bodies.append(build_body(play, min(args.batch, args.plays - offset), fmt, offset))
+
+    created = failed = 0
+    started = time.perf_counter()
+    for body in bodies:
+        response = await client.post(
+            f"/plays/{team_id}/import", content=body, headers={**headers, "Content-Type": FORMATS[fmt]}
+        )
+        if response.status_code != 201:
+            raise RuntimeError(f"import -> {response.status_code}: {response.text[:200]}")
+        result = response.json()
+        created += result["created"]
+        failed += result["failed"]
+    return time.perf_counter() - started, created, failed
+
+
+async def main(args) -> None:
+    os.environ["PLAY_STORE_BACKEND"] = args.store
+    # La app lee la configuración al importarse
+    from main import app
+
+    prefix = f"imp{uuid.uuid4().hex[:6]}"
+    sizes = [int(size) for size in args.sizes.split(",")]
+
+    async with app.router.lifespan_context(app):
+        team_id = await seed(prefix)
+        try:
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://import", timeout=300) as client:
+                response = await client.post("/auth/login", json={"username": prefix, "password": PASSWORD})
+                response.raise_for_status()
+                headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+                print(f"store: {args.store}, jugadas por tamaño: {args.plays}, por petición: {args.batch}")
+                print(f"{'size':>8} {'format':>7} {'MB':>8} {'seconds':>8} {'plays/s':>9} {'failed':>7}  objetivo")
+                for size in sizes:
+                    play = make_play(size)
+                    megabytes = len(orjson.dumps(play)) * args.plays / 1e6
+                    for fmt in args.formats.split(","):
+                        elapsed, created, failed = await bench(client, headers, team_id, play, fmt, args)
+                        rate = created / elapsed
+                        verdict = "✅" if rate >= TARGET_PLAYS_PER_SECOND else "❌"
+                        print(f"{size:>8} {fmt:>7} {megabytes:>8.1f} {elapsed:>8.2f} {rate:>9.0f} {failed:>7}  {verdict}")
+        finally:
+            await cleanup(prefix)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Jugadas/s de la importación masiva")
+    parser.add_argument("--store", choices=("memory", "postgres", "mongo"), default="postgres")
+    parser.add_argument("--plays", type=int, default=20_000, help="Jugadas importadas por tamaño y formato")
+    parser.add_argument("--batch", type=int, default=5_000, help="Jugadas por petición")
+    parser.add_argument("--sizes", default="2000,20000", help="Tamaños de jugada en bytes")
+    parser.add_argument("--formats", default="json,ndjson")
+    asyncio.run(main(parser.parse_args()))
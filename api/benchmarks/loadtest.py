@@ -0,0 +1,303 @@
+# benchmarks/loadtest.py
+# Prueba de carga de la API completa (app ASGI en el mismo proceso, sin servidor HTTP):
+#   1. siembra usuarios, equipos, permisos y jugadas de varios tamaños
+#   2. N usuarios virtuales repiten la sesión del cliente Unity:
+#      login -> /teams/me -> /plays/{team_id} -> /plays/{id}/data (x K) -> PUT /plays/{id}/data
+#   3. informe por endpoint (p50/p95/p99, peticiones/s, errores) en JSON para comparar entre commits
+#
+# Uso (desde api/, con POSTGRES_URL apuntando a una base de datos de prueba ya migrada; docker compose up postgres mongo
+#      y python -m app.db.migrate):
+#   python -m benchmarks.loadtest --store memory --users 200 --teams 20 --plays 2000 --vus 50 --duration 30
+#   python -m benchmarks.loadtest --store mongo --compare benchmarks/results/loadtest-abc1234.json
+#
+# --store memory usa un almacén de datos en el proceso (solo hace falta Postgres); postgres/mongo, el real.
+# Los datos sembrados llevan el prefijo del run y se borran al terminar.
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import subprocess
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+
+import httpx
+import orjson
+from dotenv import load_dotenv
+from sqlalchemy import delete, insert
+
+from benchmarks.play_serialization import make_play
+
+load_dotenv()
+
+PASSWORD = "loadtest-password"
+RESULTS_DIR = Path(__file__).parent / "results"
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.errors: dict[str, int] = defaultdict(int)
+        self.started = time.perf_counter()
+        self.finished = self.started
+
+    async def call(self, client, method: str, endpoint: str, url: str, expected=(200,), **kwargs):
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except Exception:
+            self.errors[endpoint] += 1
+            return None
+        self.latencies[endpoint].append(time.perf_counter() - started)
+        if response.status_code not in expected:
+            self.errors[endpoint] += 1
+        return response
+
+    def report(self) -> dict:
+        elapsed = self.finished - self.started
+        endpoints = {}
+        for endpoint in sorted(set(self.latencies) | set(self.errors)):
+            samples = sorted(self.latencies.get(endpoint, []))
+            endpoints[endpoint] = {
+                "requests": len(samples),
+                "errors": self.errors.get(endpoint, 0),
+                "rps": round(len(samples) / elapsed, 2) if elapsed else 0,
+                **_percentiles(samples),
+            }
+        everything = sorted(s for samples in self.latencies.values() for s in samples)
+        total = {
+            "requests": len(everything),
+            "errors": sum(self.errors.values()),
+            "rps": round(len(everything) / elapsed, 2) if elapsed else 0,
+            **_percentiles(everything),
+        }
+        return {"elapsed_seconds": round(elapsed, 2), "endpoints": endpoints, "total": total}
+
+
+def _percentiles(samples: list[float]) -> dict:
+    if not samples:
+        return {"p50_ms": None, "p95_ms": None, "p99_ms": None}
+
+    def at(q: float) -> float:
+        return round(samples[min(len(samples) - 1, int(len(samples) * q))] * 1000, 2)
+
+    return {"p50_ms": round(statistics.median(samples) * 1000, 2), "p95_ms": at(0.95), "p99_ms": at(0.99)}
+
+
+# ---------------- Datos ----------------
+# Los módulos de app se importan dentro de las funciones: leen la configuración (PLAY_STORE_BACKEND) al importarse
+async def seed(args, prefix: str) -> list[dict]:
+    from app import models
+    from app.core.auth import get_password_hash
+    from app.db.postgres import AsyncSessionLocal
+    from app.services import outbox
+    from app.services.play_store import get_play_store
+
+    rng = random.Random(args.seed)
+    password_hash = await get_password_hash(PASSWORD)
+    sizes = [int(size) for size in args.sizes.split(",")]
+    fixtures = {size: make_play(size) for size in sizes}
+    store = get_play_store()
+
+    async with AsyncSessionLocal() as db_sess:
+        users = (await db_sess.execute(
+            insert(models.User).returning(models.User.id, models.User.username, sort_by_parameter_order=True),
+            [{"email": f"{prefix}{i}@loadtest.local", "username": f"{prefix}{i}", "password_hash": password_hash}
+             for i in range(args.users)],
+        )).all()
+        teams = (await db_sess.execute(
+            insert(models.Team).returning(models.Team.id, sort_by_parameter_order=True),
+            [{"name": f"{prefix.upper()}TEAM {i}", "color": "#FF8800", "invitation_code": f"{prefix}{i}"}
+             for i in range(args.teams)],
+        )).scalars().all()
+
+        # Cada usuario en 1-3 equipos; el primero de cada equipo es admin, el resto editor o viewer
+        permissions, memberships = [], defaultdict(set)
+        for index, team_id in enumerate(teams):
+            owner = users[index % len(users)]
+            permissions.append({"user_id": owner.id, "team_id": team_id, "role": "admin"})
+            memberships[owner.id].add(team_id)
+        for user in users:
+            for team_id in rng.sample(list(teams), k=min(len(teams), rng.randint(1, 3))):
+                if team_id not in memberships[user.id]:
+                    role = "editor" if rng.random() < args.editor_ratio else "viewer"
+                    permissions.append({"user_id": user.id, "team_id": team_id, "role": role})
+                    memberships[user.id].add(team_id)
+        await db_sess.execute(insert(models.Permission), permissions)
+
+        plays = (await db_sess.execute(
+            insert(models.Play).returning(models.Play.id, sort_by_parameter_order=True),
+            [{"team_id": teams[i % len(teams)], "name": f"Play {i}"} for i in range(args.plays)],
+        )).scalars().all()
+        for start in range(0, len(plays), 500):
+            await store.created(db_sess, [
+                (play_id, fixtures[rng.choice(sizes)]) for play_id in plays[start:start + 500]
+            ])
+        await db_sess.commit()
+
+    if store.name == "mongo":
+        # Las altas en Mongo van por el outbox: se aplican antes de empezar a medir
+        await outbox.drain()
+    return [{"username": user.username} for user in users]
+
+
+async def cleanup(prefix: str) -> None:
+    from app import models
+    from app.db.postgres import AsyncSessionLocal
+
+    async with AsyncSessionLocal() as db_sess:
+        # Las jugadas y permisos caen en cascada (los datos en Mongo los limpia el reconciliador de huérfanos)
+        await db_sess.execute(delete(models.Team).where(models.Team.invitation_code.startswith(prefix)))
+        await db_sess.execute(delete(models.User).where(models.User.username.startswith(prefix)))
+        await db_sess.commit()
+
+
+# ---------------- Sesiones ----------------
+async def session(client, recorder: Recorder, user: dict, rng: random.Random, args) -> None:
+    response = await recorder.call(
+        client, "POST", "POST /auth/login", "/auth/login", json={"username": user["username"], "password": PASSWORD}
+    )
+    if response is None or response.status_code != 200:
+        return
+    client_headers = {
+        "Authorization": f"Bearer {response.json()['access_token']}",
+        # httpx pide gzip por defecto: se fija explícitamente para medir lo que pide el cliente real
+        "Accept-Encoding": args.accept_encoding,
+    }
+
+    response = await recorder.call(client, "GET", "GET /teams/me", "/teams/me", headers=client_headers)
+    if response is None or response.status_code != 200:
+        return
+    teams = response.json()
+
+    plays = []
+    for team in teams:
+        response = await recorder.call(
+            client, "GET", "GET /plays/{team_id}", f"/plays/{team['team_id']}", headers=client_headers
+        )
+        if response is not None and response.status_code == 200:
+            plays.extend((play["id"], team["role"]) for play in response.json())
+    if not plays:
+        return
+
+    etags = {}
+    for play_id, _ in rng.sample(plays, k=min(len(plays), args.reads)):
+        headers = dict(client_headers)
+        if play_id in etags:
+            headers["If-None-Match"] = etags[play_id]
+        response = await recorder.call(
+            client, "GET", "GET /plays/{id}/data", f"/plays/{play_id}/data", expected=(200, 304), headers=headers
+        )
+        if response is not None and response.status_code == 200:
+            etags[play_id] = response.headers.get("etag")
+            body = response.json()
+            if rng.random() < args.write_ratio and (play_id, "viewer") not in plays:
+                await recorder.call(
+                    client, "PUT", "PUT /plays/{id}/data", f"/plays/{play_id}/data",
+                    expected=(200, 412), headers=client_headers, content=_touch(body.get("data")),
+                )
+
+
+def _touch(data) -> bytes:
+    if isinstance(data, dict):
+        data = {**data, "version": (data.get("version") or 0) + 1}
+    return orjson.dumps(data)
+
+
+async def virtual_user(client, recorder: Recorder, users: list[dict], deadline: float, index: int, args) -> None:
+    rng = random.Random(args.seed + index)
+    while time.perf_counter() < deadline:
+        await session(client, recorder, rng.choice(users), rng, args)
+        if args.think_time:
+            await asyncio.sleep(rng.uniform(0, args.think_time))
+
+
+# ---------------- Informe ----------------
+def _git_commit() -> str | None:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(report: dict, baseline_path: str) -> None:
+    baseline = orjson.loads(Path(baseline_path).read_bytes())
+    print(f"\nvs {baseline_path} ({baseline.get('commit')})")
+    print(f"{'endpoint':<24} {'p50':>9} {'p95':>9} {'p99':>9} {'rps':>9}")
+    for endpoint, current in {**report["endpoints"], "total": report["total"]}.items():
+        previous = baseline["total"] if endpoint == "total" else baseline["endpoints"].get(endpoint)
+        if not previous:
+            continue
+
+        def delta(key: str) -> str:
+            if not previous.get(key) or current.get(key) is None:
+                return "-"
+            return f"{(current[key] - previous[key]) / previous[key] * 100:+.1f}%"
+
+        print(f"{endpoint:<24} {delta('p50_ms'):>9} {delta('p95_ms'):>9} {delta('p99_ms'):>9} {delta('rps'):>9}")
+
+
+async def main(args) -> None:
+    os.environ["PLAY_STORE_BACKEND"] = args.store
+    # La app lee la configuración al importarse
+    from main import app
+
+    prefix = f"lt{uuid.uuid4().hex[:6]}_"
+
+    async with app.router.lifespan_context(app):
+        print(f"Sembrando {args.users} usuarios, {args.teams} equipos, {args.plays} jugadas ({args.store})...")
+        users = await seed(args, prefix)
+        try:
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=60) as client:
+                recorder = Recorder()
+                deadline = time.perf_counter() + args.duration
+                print(f"{args.vus} usuarios virtuales durante {args.duration}s...")
+                await asyncio.gather(*(
+                    virtual_user(client, recorder, users, deadline, index, args) for index in range(args.vus)
+                ))
+                recorder.finished = time.perf_counter()
+        finally:
+            await cleanup(prefix)
+
+    report = {
+        "commit": _git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+        **recorder.report(),
+    }
+
+    print(f"\n{'endpoint':<24} {'requests':>9} {'errors':>7} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for endpoint, stats in {**report["endpoints"], "total": report["total"]}.items():
+        print(f"{endpoint:<24} {stats['requests']:>9} {stats['errors']:>7} {stats['rps']:>8} "
+              f"{stats['p50_ms']!s:>8} {stats['p95_ms']!s:>8} {stats['p99_ms']!s:>8}")
+
+    output = Path(args.output) if args.output else RESULTS_DIR / f"loadtest-{report['commit'] or 'local'}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_bytes(orjson.dumps(report, option=orjson.OPT_INDENT_2))
+    print(f"\nInforme guardado en {output}")
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prueba de carga de la API con sesiones del cliente Unity")
+    parser.add_argument("--store", choices=("memory", "postgres", "mongo"), default="memory")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--teams", type=int, default=20)
+    parser.add_argument("--plays", type=int, default=2000)
+    parser.add_argument("--sizes", default="2000,20000,200000", help="Tamaños de jugada en bytes (se reparten al azar)")
+    parser.add_argument("--editor-ratio", type=float, default=0.5)
+    parser.add_argument("--vus", type=int, default=50, help="Usuarios virtuales concurrentes")
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--reads", type=int, default=5, help="Jugadas abiertas por sesión")
+    parser.add_argument("--write-ratio", type=float, default=0.1, help="Probabilidad de guardar cada jugada abierta")
+    parser.add_argument("--think-time", type=float, default=0.0, help="Pausa máxima entre sesiones (s)")
+    parser.add_argument("--accept-encoding", default="identity", help='p.ej. "gzip" o "zstd, gzip"')
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", default=None)
+    parser.add_argument("--compare", default=None, help="Informe JSON anterior con el que comparar")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,76 @@
+# benchmarks/play_compression.py
+# Tamaño y CPU de las codificaciones de `data` para jugadas animadas (sin base de datos):
+#   json          -> orjson sin comprimir (formato actual)
+#   gzip / zstd   -> json comprimido (PLAY_DATA_COMPRESSION y Content-Encoding)
+#   f32+zstd      -> coordenadas empaquetadas en arrays float32 por columnas + zstd (solo como referencia:
+#                    pierde precisión y obligaría a Unity a decodificar un formato propio)
+#
+# Uso (desde api/):  python -m benchmarks.play_compression
+import time
+from array import array
+
+import orjson
+
+from app.core import compression
+from benchmarks.play_serialization import make_play
+
+SIZES = {"100KB": 100_000, "1MB": 1_000_000, "5MB": 5_000_000}
+
+
+def bench(fn, repeat: int) -> float:
+    fn()
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+# Frames -> columnas (t, balón, jugadores) en arrays float32; el resto del documento queda en JSON
+def pack_typed(play: dict) -> bytes:
+    frames = play["frames"]
+    columns = {
+        "t": array("f", (f["t"] for f in frames)),
+        "ball": array("f", (v for f in frames for v in (f["ball"]["x"], f["ball"]["y"]))),
+        "players": array("f", (v for f in frames for p in f["players"] for v in (p["x"], p["y"]))),
+    }
+    header = orjson.dumps({
+        **{k: v for k, v in play.items() if k != "frames"},
+        "holders": [f["ball"]["holder"] for f in frames],
+        "roster": [[p["id"], p["team"]] for p in frames[0]["players"]] if frames else [],
+        "lengths": {name: len(values) for name, values in columns.items()},
+    })
+    return len(header).to_bytes(4, "little") + header + b"".join(values.tobytes() for values in columns.values())
+
+
+def main() -> None:
+    encodings = list(compression.ENCODINGS)
+    print(f"{'size':>6} {'format':>9} {'bytes':>10} {'ratio':>6} {'encode ms':>10} {'decode ms':>10}")
+    for label, size in SIZES.items():
+        play = make_play(size)
+        raw = orjson.dumps(play)
+        repeat = max(3, 20_000_000 // size)
+
+        rows = [("json", raw, bench(lambda: orjson.dumps(play), repeat), bench(lambda: orjson.loads(raw), repeat))]
+        for encoding in encodings:
+            blob = compression.compress(raw, encoding)
+            rows.append((
+                encoding,
+                blob,
+                bench(lambda: compression.compress(orjson.dumps(play), encoding), repeat),
+                bench(lambda: orjson.loads(compression.decompress(blob, encoding)), repeat),
+            ))
+        if "zstd" in encodings:
+            packed = compression.compress(pack_typed(play), "zstd")
+            rows.append((
+                "f32+zstd",
+                packed,
+                bench(lambda: compression.compress(pack_typed(play), "zstd"), repeat),
+                bench(lambda: compression.decompress(packed, "zstd"), repeat),
+            ))
+
+        for name, blob, encode_ms, decode_ms in rows:
+            print(f"{label:>6} {name:>9} {len(blob):>10} {len(raw) / len(blob):>5.1f}x {encode_ms:>10.2f} {decode_ms:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
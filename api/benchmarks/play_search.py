@@ -0,0 +1,186 @@
+# benchmarks/play_search.py
+# Búsqueda de jugadas: ILIKE sobre la tabla (sin índices de búsqueda) frente a GET /plays/{team_id}/search
+# (tsvector + trigramas + etiquetas, índices GIN de la migración 0006). Objetivo: < 20 ms en un equipo de 50k jugadas.
+#
+# Uso (desde api/, con POSTGRES_URL apuntando a una base de datos de prueba):
+#   python -m benchmarks.play_search --team-plays 50000 --other-plays 200000
+#
+# Trabaja en un schema propio ("bench_search") que se borra al terminar. La consulta indexada es la de
+# app.services.play_search (misma función que usa el endpoint).
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+from dotenv import load_dotenv
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+load_dotenv()
+
+from app.services import play_search  # noqa: E402
+
+SCHEMA = "bench_search"
+TEAM_ID = 1
+
+SETS = ["Horns", "Floppy", "Spain", "Zipper", "Elevator", "Chicago", "Hammer", "Iverson", "Stack", "Box", "Flex", "Punch"]
+ACTIONS = ["Flare", "Pick and Roll", "Backdoor", "Lob", "Stagger", "Rip", "Twist", "Slice", "Get", "Handoff"]
+TAGS = ["offense", "defense", "ato", "slob", "blob", "press break", "zone", "man", "transition", "end of game"]
+
+
+def _array(values: list[str]) -> str:
+    return "ARRAY[" + ", ".join("'" + value.replace("'", "''") + "'" for value in values) + "]"
+
+
+DDL = [
+    f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE",
+    f"CREATE SCHEMA {SCHEMA}",
+    f"SET search_path TO {SCHEMA}, public",
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm SCHEMA public",
+    "CREATE EXTENSION IF NOT EXISTS btree_gin SCHEMA public",
+    "CREATE TABLE plays (id serial PRIMARY KEY, team_id integer NOT NULL, name varchar NOT NULL, "
+    "tags varchar[] NOT NULL DEFAULT '{}', created_at timestamptz DEFAULT now())",
+    "CREATE INDEX ix_plays_team_id_created_at_id ON plays (team_id, created_at, id)",
+]
+
+# Las primeras :team_plays jugadas son del equipo medido; el resto se reparte entre :teams equipos
+SEED = (
+    "INSERT INTO plays (team_id, name, tags, created_at) "
+    f"SELECT CASE WHEN i <= :team_plays THEN {TEAM_ID} ELSE 2 + (i % :teams) END, "
+    f"({_array(SETS)})[1 + (i * 7) % {len(SETS)}] || ' ' || ({_array(ACTIONS)})[1 + (i * 13) % {len(ACTIONS)}] || ' ' || i, "
+    f"ARRAY[({_array(TAGS)})[1 + i % {len(TAGS)}], ({_array(TAGS)})[1 + (i * 3 + 1) % {len(TAGS)}]], "
+    "now() - (i || ' seconds')::interval "
+    "FROM generate_series(1, :plays) i"
+)
+
+# Lo mismo que la migración 0006
+SEARCH_DDL = [
+    """
+    CREATE FUNCTION play_search_document(name text, tags text[]) RETURNS tsvector
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+        SELECT setweight(to_tsvector('simple', coalesce(name, '')), 'A')
+            || setweight(to_tsvector('simple', array_to_string(coalesce(tags, '{}'), ' ')), 'B')
+    $$
+    """,
+    "ALTER TABLE plays ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (play_search_document(name, tags)) STORED",
+    "CREATE INDEX ix_plays_team_id_search_vector ON plays USING gin (team_id, search_vector)",
+    "CREATE INDEX ix_plays_team_id_name_trgm ON plays USING gin (team_id, name gin_trgm_ops)",
+    "CREATE INDEX ix_plays_team_id_tags ON plays USING gin (team_id, tags)",
+]
+
+# Consulta ingenua: ILIKE sobre nombre y etiquetas, sin ranking
+NAIVE = text(
+    "SELECT id, team_id, name, tags, created_at FROM plays "
+    "WHERE team_id = :team_id AND (name ILIKE :pattern OR array_to_string(tags, ' ') ILIKE :pattern) "
+    "ORDER BY created_at, id LIMIT :limit"
+)
+
+# (q, tags): prefijo, palabra completa, errata (trigramas), varias palabras, etiqueta, y una muy amplia
+CASES = [
+    ("hor", []),
+    ("horns", []),
+    ("horsn", []),
+    ("floppy lob", []),
+    ("press break", []),
+    (None, ["ato"]),
+    ("spain", ["ato"]),
+    ("e", []),
+]
+
+
+def _database_url() -> str:
+    if os.getenv("MODE") == "development":
+        return os.getenv("POSTGRES_URL_DEV")
+    return os.getenv("POSTGRES_URL")
+
+
+def _label(q: str | None, tags: list[str]) -> str:
+    return " ".join(filter(None, [f"q={q!r}" if q else None, f"tags={','.join(tags)}" if tags else None]))
+
+
+async def timed(fn, repeat: int) -> tuple[float, float, int]:
+    count = await fn()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95) - 1], count
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--team-plays", type=int, default=50_000)
+    parser.add_argument("--other-plays", type=int, default=200_000)
+    parser.add_argument("--teams", type=int, default=100)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    engine = create_async_engine(
+        _database_url(), connect_args={"server_settings": {"search_path": f"{SCHEMA},public"}}
+    )
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+    try:
+        async with engine.begin() as conn:
+            for statement in DDL:
+                await conn.execute(text(statement))
+            started = time.perf_counter()
+            plays = args.team_plays + args.other_plays
+            await conn.execute(text(SEED), {"team_plays": args.team_plays, "teams": args.teams, "plays": plays})
+            await conn.execute(text("ANALYZE plays"))
+            print(f"Seed: {args.team_plays} jugadas en el equipo medido, {plays} en total "
+                  f"en {time.perf_counter() - started:.1f}s")
+
+        naive = {}
+        async with sessions() as db_sess:
+            for q, tags in CASES:
+                pattern = f"%{' '.join(filter(None, [q] + tags))}%"
+
+                async def run_naive():
+                    rows = await db_sess.execute(NAIVE, {"team_id": TEAM_ID, "pattern": pattern, "limit": args.limit})
+                    return len(rows.all())
+
+                naive[(q, tuple(tags))] = await timed(run_naive, args.repeat)
+
+        async with engine.begin() as conn:
+            started = time.perf_counter()
+            for statement in SEARCH_DDL:
+                await conn.execute(text(statement))
+            await conn.execute(text("ANALYZE plays"))
+            print(f"Columna generada + índices GIN en {time.perf_counter() - started:.1f}s")
+
+        print(f"\n{'búsqueda':<28} {'ILIKE p50':>10} {'p95':>8} {'filas':>6} {'search p50':>11} {'p95':>8} {'filas':>6}")
+        async with sessions() as db_sess:
+            for q, tags in CASES:
+                async def run_search():
+                    rows, _ = await play_search.search_page(db_sess, TEAM_ID, q, tags, args.limit, None)
+                    return len(rows)
+
+                indexed = await timed(run_search, args.repeat)
+                n50, n95, n_rows = naive[(q, tuple(tags))]
+                s50, s95, s_rows = indexed
+                flag = "" if s95 < 20 else "  ⚠️ > 20 ms"
+                print(f"{_label(q, tags):<28} {n50:>10.2f} {n95:>8.2f} {n_rows:>6} {s50:>11.2f} {s95:>8.2f} {s_rows:>6}{flag}")
+
+        # Plan de la consulta indexada para una búsqueda típica
+        async with engine.connect() as conn:
+            result = await conn.execute(text(
+                "EXPLAIN (ANALYZE, BUFFERS) SELECT id FROM plays "
+                "WHERE team_id = :team_id AND (search_vector @@ to_tsquery('simple', 'horns:*') OR name % 'horns') "
+                "ORDER BY ts_rank(search_vector, to_tsquery('simple', 'horns:*')) + similarity(name, 'horns') DESC, id "
+                "LIMIT :limit"
+            ), {"team_id": TEAM_ID, "limit": args.limit})
+            print("\n--- search q='horns'")
+            for (line,) in result:
+                print(line)
+    finally:
+        async with engine.begin() as conn:
+            await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,76 @@
+# benchmarks/play_serialization.py
+# Microbenchmark del camino de lectura de una jugada (sin base de datos):
+#   json_response -> BSON -> dict -> jsonable_encoder -> json.dumps (JSONResponse por defecto de FastAPI)
+#   orjson        -> BSON -> dict -> jsonable_encoder -> orjson.dumps (ORJSONResponse)
+#   splice        -> BSON con data_json -> bytes -> splice_play (PLAY_DATA_STORAGE=both/json)
+#
+# Uso (desde api/):  python -m benchmarks.play_serialization
+import json
+import random
+import time
+from datetime import datetime, timezone
+
+import bson
+import orjson
+from bson import Binary
+from fastapi.encoders import jsonable_encoder
+
+from app.core.serialization import data_json_bytes, splice_play
+
+SIZES = {"1KB": 1_000, "100KB": 100_000, "1MB": 1_000_000}
+
+
+# Jugada animada "realista": frames con posiciones de jugadores y balón
+def make_play(target_bytes: int) -> dict:
+    rng = random.Random(target_bytes)
+    frames = []
+    play = {"court": "half", "version": 3, "frames": frames}
+    while len(orjson.dumps(play)) < target_bytes:
+        frames.append({
+            "t": len(frames) * 0.1,
+            "ball": {"x": round(rng.uniform(0, 15), 2), "y": round(rng.uniform(0, 14), 2), "holder": rng.randint(1, 5)},
+            "players": [
+                {"id": i, "team": "A" if i <= 5 else "B", "x": round(rng.uniform(0, 15), 2), "y": round(rng.uniform(0, 14), 2)}
+                for i in range(1, 11)
+            ],
+        })
+    return play
+
+
+def bench(fn, repeat: int) -> float:
+    fn()
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1e6
+
+
+def main() -> None:
+    meta = {"id": 1, "name": "Horns", "team_id": 1, "created_at": datetime.now(timezone.utc)}
+    print(f"{'size':>6} {'json_response µs':>18} {'orjson µs':>12} {'splice µs':>12} {'speedup':>8}")
+    for label, size in SIZES.items():
+        play = make_play(size)
+        bson_doc = bson.encode({"play_id": 1, "data": play})
+        raw_doc = bson.encode({"play_id": 1, "data_json": Binary(orjson.dumps(play))})
+        repeat = max(10, 2_000_000 // size)
+
+        def json_response():
+            doc = bson.decode(bson_doc)
+            json.dumps(jsonable_encoder({**meta, "data": doc["data"]}), ensure_ascii=False).encode()
+
+        def orjson_response():
+            doc = bson.decode(bson_doc)
+            orjson.dumps(jsonable_encoder({**meta, "data": doc["data"]}))
+
+        def splice():
+            doc = bson.decode(raw_doc)
+            splice_play(meta, data_json_bytes(doc))
+
+        t_json = bench(json_response, repeat)
+        t_orjson = bench(orjson_response, repeat)
+        t_splice = bench(splice, repeat)
+        print(f"{label:>6} {t_json:>18.1f} {t_orjson:>12.1f} {t_splice:>12.1f} {t_json / t_splice:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
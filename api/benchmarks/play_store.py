@@ -0,0 +1,117 @@
+# benchmarks/play_store.py
+# Latencia de lectura de los backends de datos de jugadas (app.services.play_store):
+#   read      -> GET /plays/{id}/data sin caché (metadatos + data)
+#   data_map  -> GET /plays/{team_id}/full (data de una página de jugadas)
+#
+# Uso (desde api/, con POSTGRES_URL y, para el backend mongo, MONGO_URL):
+#   python -m benchmarks.play_store --plays 2000 --size 100000 --reads 500
+#
+# Trabaja en un schema / colección propios ("bench_store") que se borran al terminar.
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+import orjson
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.core import serialization
+from app.db.mongo import MONGO_DB_NAME
+from app.services.play_store import InMemoryPlayStore, MongoPlayStore, PostgresPlayStore
+from benchmarks.play_serialization import make_play
+from benchmarks.query_plans import _database_url, _mongo_url
+
+load_dotenv()
+
+SCHEMA = "bench_store"
+PAGE_SIZE = 100
+
+DDL = [
+    f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE",
+    f"CREATE SCHEMA {SCHEMA}",
+    f"CREATE TABLE {SCHEMA}.plays (id serial PRIMARY KEY, team_id integer, name varchar NOT NULL, "
+    "created_at timestamptz DEFAULT now(), data jsonb, revision integer NOT NULL DEFAULT 0)",
+]
+
+
+def percentiles(samples: list[float]) -> str:
+    samples = sorted(samples)
+    p50 = statistics.median(samples)
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    return f"p50 {p50 * 1000:7.2f} ms   p95 {p95 * 1000:7.2f} ms"
+
+
+async def bench_store(label: str, store, sessions, play_ids: list[int], reads: int) -> None:
+    rng = random.Random(0)
+    read_times, page_times = [], []
+    async with sessions() as db_sess:
+        for _ in range(reads):
+            started = time.perf_counter()
+            await store.read(db_sess, rng.choice(play_ids))
+            read_times.append(time.perf_counter() - started)
+        for _ in range(max(10, reads // 20)):
+            start = rng.randrange(max(1, len(play_ids) - PAGE_SIZE))
+            started = time.perf_counter()
+            await store.data_map(db_sess, play_ids[start:start + PAGE_SIZE], [])
+            page_times.append(time.perf_counter() - started)
+    print(f"{label:>9}  read: {percentiles(read_times)}   data_map({PAGE_SIZE}): {percentiles(page_times)}")
+
+
+async def main(plays: int, size: int, reads: int, skip_mongo: bool) -> None:
+    engine = create_async_engine(
+        _database_url(), connect_args={"server_settings": {"search_path": SCHEMA}}
+    )
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+    data = make_play(size)
+    print(f"{plays} jugadas de ~{size // 1000} KB, {reads} lecturas")
+
+    mongo_client = None
+    try:
+        async with engine.begin() as conn:
+            for statement in DDL:
+                await conn.execute(text(statement))
+            # Mismos datos en todas las filas: la latencia depende del tamaño, no del contenido
+            await conn.execute(
+                text("INSERT INTO plays (team_id, name, data, revision) "
+                     "SELECT 1, 'Play ' || i, CAST(:data AS jsonb), 1 FROM generate_series(1, :plays) i"),
+                {"data": orjson.dumps(data).decode(), "plays": plays},
+            )
+        play_ids = list(range(1, plays + 1))
+
+        await bench_store("postgres", PostgresPlayStore(), sessions, play_ids, reads)
+
+        memory = InMemoryPlayStore()
+        await memory.created(None, [(play_id, data) for play_id in play_ids])
+        await bench_store("memory", memory, sessions, play_ids, reads)
+
+        if not skip_mongo:
+            mongo_client = AsyncIOMotorClient(_mongo_url())
+            collection = mongo_client[MONGO_DB_NAME][SCHEMA]
+            await collection.drop()
+            await collection.create_index("play_id", unique=True)
+            for start in range(0, plays, 500):
+                await collection.insert_many(
+                    [serialization.play_document(play_id, data) for play_id in play_ids[start:start + 500]]
+                )
+            await bench_store("mongo", MongoPlayStore(collection), sessions, play_ids, reads)
+            await collection.drop()
+    finally:
+        async with engine.begin() as conn:
+            await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await engine.dispose()
+        if mongo_client is not None:
+            mongo_client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--plays", type=int, default=2000)
+    parser.add_argument("--size", type=int, default=100_000, help="Tamaño aproximado de cada jugada en bytes")
+    parser.add_argument("--reads", type=int, default=500)
+    parser.add_argument("--skip-mongo", action="store_true")
+    args = parser.parse_args()
+    asyncio.run(main(args.plays, args.size, args.reads, args.skip_mongo))
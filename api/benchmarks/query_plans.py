@@ -0,0 +1,161 @@
+# benchmarks/query_plans.py
+# Planes de las consultas calientes antes y después de los índices de la migración 0002.
+#
+# Uso (desde api/, con POSTGRES_URL y MONGO_URL apuntando a bases de datos de prueba):
+#   python -m benchmarks.query_plans --plays 100000 --teams 500
+#
+# Trabaja en un schema / colección propios ("bench_plans") que se borran al terminar.
+import argparse
+import asyncio
+import os
+import random
+import time
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+load_dotenv()
+
+SCHEMA = "bench_plans"
+
+DDL = [
+    f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE",
+    f"CREATE SCHEMA {SCHEMA}",
+    f"SET search_path TO {SCHEMA}",
+    "CREATE TABLE users (id serial PRIMARY KEY, email varchar NOT NULL, username varchar NOT NULL, password_hash varchar NOT NULL)",
+    "CREATE TABLE teams (id serial PRIMARY KEY, name varchar NOT NULL, color varchar NOT NULL, invitation_code varchar NOT NULL UNIQUE)",
+    "CREATE TABLE permissions (id serial PRIMARY KEY, user_id integer REFERENCES users(id) ON DELETE CASCADE, "
+    "team_id integer REFERENCES teams(id) ON DELETE CASCADE, role varchar NOT NULL)",
+    "CREATE TABLE plays (id serial PRIMARY KEY, team_id integer REFERENCES teams(id) ON DELETE CASCADE, "
+    "name varchar NOT NULL, created_at timestamptz DEFAULT now())",
+]
+
+SEED = [
+    "INSERT INTO users (email, username, password_hash) "
+    "SELECT 'u' || i || '@bench.local', 'u' || i, 'x' FROM generate_series(1, :users) i",
+    "INSERT INTO teams (name, color, invitation_code) "
+    "SELECT 'TEAM ' || i, '#000000', 'code' || i FROM generate_series(1, :teams) i",
+    # Cada usuario es miembro de un equipo; el primero de cada equipo es admin
+    "INSERT INTO permissions (user_id, team_id, role) "
+    "SELECT i, 1 + (i % :teams), CASE WHEN i <= :teams THEN 'admin' ELSE 'viewer' END "
+    "FROM generate_series(1, :users) i",
+    "INSERT INTO plays (team_id, name, created_at) "
+    "SELECT 1 + (i % :teams), 'Play ' || i, now() - (i || ' seconds')::interval "
+    "FROM generate_series(1, :plays) i",
+]
+
+INDEXES = [
+    "ALTER TABLE permissions ADD CONSTRAINT uq_permissions_user_id_team_id UNIQUE (user_id, team_id)",
+    "CREATE INDEX ix_permissions_team_id_role ON permissions (team_id, role)",
+    "CREATE INDEX ix_plays_team_id_created_at_id ON plays (team_id, created_at, id)",
+]
+
+HOT_QUERIES = {
+    "check_user_role": "SELECT role FROM permissions WHERE user_id = :user_id AND team_id = :team_id",
+    "team_admin": "SELECT * FROM permissions WHERE team_id = :team_id AND role = 'admin'",
+    "list_team_plays": "SELECT id, name, created_at FROM plays WHERE team_id = :team_id ORDER BY created_at, id",
+}
+
+
+def _database_url() -> str:
+    if os.getenv("MODE") == "development":
+        return os.getenv("POSTGRES_URL_DEV")
+    return os.getenv("POSTGRES_URL")
+
+
+def _mongo_url() -> str:
+    if os.getenv("MODE") == "development":
+        return os.getenv("MONGO_URL_DEV")
+    return os.getenv("MONGO_URL")
+
+
+async def explain_all(conn, params: dict) -> None:
+    for name, query in HOT_QUERIES.items():
+        result = await conn.execute(text(f"EXPLAIN (ANALYZE, BUFFERS) {query}"), params)
+        print(f"\n--- {name}")
+        for (line,) in result:
+            print(line)
+
+
+async def postgres_plans(args) -> None:
+    engine = create_async_engine(_database_url())
+    async with engine.begin() as conn:
+        for statement in DDL:
+            await conn.execute(text(statement))
+
+        started = time.perf_counter()
+        params = {"users": args.users, "teams": args.teams, "plays": args.plays}
+        for statement in SEED:
+            await conn.execute(text(statement), params)
+        await conn.execute(text("ANALYZE"))
+        print(f"Seed: {args.plays} plays / {args.teams} equipos / {args.users} usuarios "
+              f"en {time.perf_counter() - started:.1f}s")
+
+        query_params = {"user_id": args.users // 2, "team_id": 1 + (args.users // 2) % args.teams}
+
+        print("\n==================== SIN ÍNDICES ====================")
+        await explain_all(conn, query_params)
+
+        for statement in INDEXES:
+            await conn.execute(text(statement))
+        await conn.execute(text("ANALYZE"))
+
+        print("\n==================== CON ÍNDICES ====================")
+        await explain_all(conn, query_params)
+
+        await conn.execute(text(f"DROP SCHEMA {SCHEMA} CASCADE"))
+    await engine.dispose()
+
+
+async def mongo_plans(args) -> None:
+    client = AsyncIOMotorClient(_mongo_url())
+    collection = client["basketballboard"][SCHEMA]
+    await collection.drop()
+
+    batch = []
+    for play_id in range(1, args.plays + 1):
+        batch.append({"play_id": play_id, "data": {"frames": []}})
+        if len(batch) == 10_000:
+            await collection.insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        await collection.insert_many(batch, ordered=False)
+
+    play_ids = random.sample(range(1, args.plays + 1), 200)
+    query = {"play_id": {"$in": play_ids}}
+
+    print("\n==================== MONGO play_id SIN ÍNDICE ====================")
+    plan = await collection.find(query).explain()
+    print(plan["executionStats"]["executionStages"]["stage"],
+          "docsExamined =", plan["executionStats"]["totalDocsExamined"],
+          "ms =", plan["executionStats"]["executionTimeMillis"])
+
+    await collection.create_index("play_id", unique=True, name="uq_play_id")
+
+    print("\n==================== MONGO play_id CON ÍNDICE ====================")
+    plan = await collection.find(query).explain()
+    print(plan["executionStats"]["executionStages"]["stage"],
+          "docsExamined =", plan["executionStats"]["totalDocsExamined"],
+          "ms =", plan["executionStats"]["executionTimeMillis"])
+
+    await collection.drop()
+    client.close()
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--plays", type=int, default=100_000)
+    parser.add_argument("--teams", type=int, default=500)
+    parser.add_argument("--users", type=int, default=5_000)
+    parser.add_argument("--skip-mongo", action="store_true")
+    args = parser.parse_args()
+
+    await postgres_plans(args)
+    if not args.skip_mongo:
+        await mongo_plans(args)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
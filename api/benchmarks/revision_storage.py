@@ -0,0 +1,71 @@
+# benchmarks/revision_storage.py
+# Tamaño del historial de revisiones (sin base de datos), para una jugada editada N veces desde Unity:
+#   full   -> una copia completa de data por revisión
+#   delta  -> foto cada REVISION_SNAPSHOT_INTERVAL revisiones + JSON Patch entre medias (app.services.revisions)
+# También mide cuánto cuesta reconstruir la revisión más lejana a una foto.
+#
+# Uso (desde api/):  python -m benchmarks.revision_storage [--revisions 200]
+import argparse
+import copy
+import random
+import time
+
+import bson
+
+from app.core.jsonpatch import make_patch
+from app.services.revisions import REVISION_SNAPSHOT_INTERVAL, apply_deltas, is_snapshot_revision
+from benchmarks.play_serialization import make_play
+
+SIZES = {"10KB": 10_000, "100KB": 100_000, "1MB": 1_000_000}
+
+
+# Edición típica: mover algunos jugadores en unos pocos frames
+def edit(play: dict, rng: random.Random) -> dict:
+    play = {**play, "frames": list(play["frames"])}
+    for _ in range(rng.randint(1, 3)):
+        index = rng.randrange(len(play["frames"]))
+        frame = play["frames"][index]
+        players = [dict(p) for p in frame["players"]]
+        player = rng.choice(players)
+        player["x"] = round(rng.uniform(0, 15), 2)
+        player["y"] = round(rng.uniform(0, 14), 2)
+        play["frames"][index] = {**frame, "players": players}
+    return play
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--revisions", type=int, default=200)
+    count = parser.parse_args().revisions
+
+    print(f"snapshot interval: {REVISION_SNAPSHOT_INTERVAL}, revisiones: {count}")
+    print(f"{'size':>6} {'full MB':>10} {'delta MB':>10} {'ratio':>7} {'rebuild ms':>11}")
+    for label, size in SIZES.items():
+        rng = random.Random(size)
+        play = make_play(size)
+        full_bytes = delta_bytes = 0
+        docs = []
+        for rev in range(1, count + 1):
+            if rev > 1:
+                previous, play = play, edit(play, rng)
+            full_bytes += len(bson.encode({"play_id": 1, "rev": rev, "data": play}))
+            if is_snapshot_revision(rev):
+                doc = {"play_id": 1, "rev": rev, "kind": "snapshot", "data": play}
+            else:
+                doc = {"play_id": 1, "rev": rev, "kind": "patch", "ops": make_patch(previous, play)}
+            delta_bytes += len(bson.encode(doc))
+            docs.append(doc)
+
+        # Peor caso de lectura: la revisión justo antes de la siguiente foto
+        #   (una copia de la foto, como la que llega de Mongo, y los deltas aplicados sobre ella)
+        target = min(count, REVISION_SNAPSHOT_INTERVAL)
+        started = time.perf_counter()
+        apply_deltas(copy.deepcopy(docs[0]["data"]), docs[1:target])
+        rebuild_ms = (time.perf_counter() - started) * 1000
+
+        print(f"{label:>6} {full_bytes / 1e6:>10.2f} {delta_bytes / 1e6:>10.2f} "
+              f"{full_bytes / delta_bytes:>6.1f}x {rebuild_ms:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
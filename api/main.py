@@ -1,19 +1,90 @@
+import asyncio
+import inspect
+import logging
+import os
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse, PlainTextResponse
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.exceptions import HTTPException as StarletteHTTPException
 
 from app.db import postgres, mongo
-from app.routes import auth, teams, plays
+from app.core import pubsub, roles, metrics, play_cache, query_stats
+from app.core.auth import setup_token_cache, start_hash_executor, shutdown_hash_executor
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app import jobs
+from app.jobs.revisions import compact_revisions_job, REVISION_COMPACTION_INTERVAL_SECONDS
+from app.jobs.orphans import reconcile_orphans_job, ORPHAN_RECONCILE_INTERVAL_SECONDS
+from app.services import collab, outbox
+from app.services.play_store import get_play_store
+from app.routes import auth, teams, plays, bootstrap
 from dotenv import load_dotenv
 
 load_dotenv()
 print("Environment variables loaded")
-print("POSTGRES_URL:", postgres.DATABASE_URL)
+
+logger = logging.getLogger(__name__)
+
+# Tope de cada paso de vaciado en el shutdown (con Postgres o Mongo caídos no se espera al timeout de conexión)
+SHUTDOWN_STEP_TIMEOUT_SECONDS = float(os.getenv("SHUTDOWN_STEP_TIMEOUT_SECONDS", 10))
+
+
+# 🔹 Un paso del shutdown: si falla se registra y se sigue con el resto
+async def _shutdown_step(name: str, step) -> None:
+    try:
+        result = step()
+        if inspect.isawaitable(result):
+            await asyncio.wait_for(result, SHUTDOWN_STEP_TIMEOUT_SECONDS)
+    except Exception:
+        logger.exception("❌ Error en el shutdown (%s)", name)
+
+
+# 👉 Startup / Shutdown
+# El arranque no abre conexiones ni crea tablas: los pools conectan en la primera consulta
+# y el esquema se crea/actualiza con  python -m app.db.migrate
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Consultas por petición (antes de crear el cliente de Mongo)
+    query_stats.instrument_engine(postgres.get_engine())
+    query_stats.instrument_mongo()
+    start_hash_executor()
+    # Con PLAY_STORE_BACKEND=mongo crea el cliente de Mongo
+    store = get_play_store()
+    await store.start()
+    broker = pubsub.get_broker()
+    roles.setup_role_cache(broker)
+    setup_token_cache(broker)
+    play_cache.setup_play_cache(broker)
+    collab.setup_collab(broker)
+    await broker.start()
+    jobs.start_periodic("collab_flush", collab.COLLAB_FLUSH_INTERVAL_SECONDS, collab.flush_all)
+    if store.name == "mongo":
+        # Outbox, historial y huérfanos solo existen cuando los datos viven en Mongo
+        jobs.start_periodic("outbox", outbox.OUTBOX_POLL_INTERVAL_SECONDS, outbox.drain)
+        jobs.start_periodic("revision_compaction", REVISION_COMPACTION_INTERVAL_SECONDS, compact_revisions_job)
+        jobs.start_periodic("orphan_reconcile", ORPHAN_RECONCILE_INTERVAL_SECONDS, reconcile_orphans_job)
+
+    yield
+
+    try:
+        await _shutdown_step("jobs", jobs.stop_all)
+        # Últimas ediciones por WebSocket aún sin escribir y eventos del outbox pendientes
+        # (lo que no se pueda aplicar sigue en la tabla outbox para el siguiente worker)
+        await _shutdown_step("collab flush", collab.flush_all)
+        if store.name == "mongo":
+            await _shutdown_step("outbox drain", outbox.drain)
+    finally:
+        # Los pools se cierran siempre, aunque el vaciado haya fallado
+        await _shutdown_step("broker", broker.stop)
+        await _shutdown_step("hash executor", shutdown_hash_executor)
+        await _shutdown_step("play store", store.stop)
+        await _shutdown_step("postgres", postgres.dispose_engine)
 
 # 👉 Create app
-app = FastAPI(title="Basketball Plays API")
+app = FastAPI(title="Basketball Plays API", default_response_class=ORJSONResponse, lifespan=lifespan)
+app.add_middleware(query_stats.QueryStatsMiddleware)
 
 # 👉 CORS (NECESARIO PARA UNITY WEBGL)
 app.add_middleware(
@@ -22,25 +93,15 @@ app.add_middleware(
     allow_credentials=False,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag", "X-Play-Revision", "Server-Timing"],  # Unity WebGL solo puede leer las cabeceras expuestas
 )
 
-# 👉 Startup / Shutdown
-@app.on_event("startup")
-async def startup():
-    app.state.pg = await postgres.connect_postgres()
-    app.state.mongo = mongo.get_mongo_client()
-    app.state.db = postgres.AsyncSessionLocal()
-
-@app.on_event("shutdown")
-async def shutdown():
-    await app.state.pg.close()
-
 # 👉 Exception handlers
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
     errors = exc.errors()
     messages = "; ".join([err["msg"] for err in errors])
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=422,
         content={"detail": messages}
     )
@@ -48,17 +109,44 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
 @app.exception_handler(StarletteHTTPException)
 async def http_exception_handler(request: Request, exc: StarletteHTTPException):
     detail = exc.detail if isinstance(exc.detail, str) else str(exc.detail)
-    return JSONResponse(
+    # Se conservan las cabeceras de la excepción (X-Play-Revision en los 412, WWW-Authenticate...)
+    return ORJSONResponse(
         status_code=exc.status_code,
-        content={"detail": detail}
+        content={"detail": detail},
+        headers=getattr(exc, "headers", None)
     )
 
 # 👉 Routes
 app.include_router(auth, tags=["Auth"])
 app.include_router(teams, tags=["Teams"])
 app.include_router(plays, tags=["Plays"])
+app.include_router(bootstrap, tags=["Bootstrap"])
 
 # 👉 Root
 @app.get("/")
 async def root():
     return {"message": "API running with Postgres and MongoDB!"}
+
+# 👉 Readiness: el balanceador solo manda tráfico si responden las bases de datos
+READINESS_TIMEOUT_SECONDS = float(os.getenv("READINESS_TIMEOUT_SECONDS", 2))
+
+async def _check(ping) -> str:
+    try:
+        await asyncio.wait_for(ping(), READINESS_TIMEOUT_SECONDS)
+    except Exception as e:
+        return f"error: {type(e).__name__}"
+    return "ok"
+
+@app.get("/ready", include_in_schema=False)
+async def ready():
+    checks = {"postgres": postgres.ping}
+    if get_play_store().name == "mongo":
+        checks["mongo"] = mongo.ping
+    results = dict(zip(checks, await asyncio.gather(*(_check(ping) for ping in checks.values()))))
+    status_code = 200 if all(result == "ok" for result in results.values()) else 503
+    return ORJSONResponse(status_code=status_code, content=results)
+
+# 👉 Métricas (formato Prometheus)
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    return PlainTextResponse(metrics.render())
@@ -0,0 +1,67 @@
+"""initial schema
+
+Esquema tal y como lo creaba Base.metadata.create_all. En una base de datos
+existente basta con `alembic stamp 0001` antes del primer `alembic upgrade head`.
+
+Revision ID: 0001
+Revises:
+Create Date: 2025-10-01 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("email", sa.String(), nullable=False),
+        sa.Column("username", sa.String(), nullable=False),
+        sa.Column("password_hash", sa.String(), nullable=False),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+    op.create_index("ix_users_username", "users", ["username"], unique=True)
+
+    op.create_table(
+        "teams",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("color", sa.String(), nullable=False),
+        sa.Column("invitation_code", sa.String(), nullable=False, unique=True),
+    )
+    op.create_index("ix_teams_id", "teams", ["id"])
+
+    op.create_table(
+        "permissions",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="CASCADE")),
+        sa.Column("team_id", sa.Integer(), sa.ForeignKey("teams.id", ondelete="CASCADE")),
+        sa.Column("role", sa.String(), nullable=False),
+    )
+    op.create_index("ix_permissions_id", "permissions", ["id"])
+
+    op.create_table(
+        "plays",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("team_id", sa.Integer(), sa.ForeignKey("teams.id", ondelete="CASCADE")),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("created_at", sa.TIMESTAMP(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_plays_id", "plays", ["id"])
+
+
+def downgrade() -> None:
+    op.drop_table("plays")
+    op.drop_table("permissions")
+    op.drop_table("teams")
+    op.drop_table("users")
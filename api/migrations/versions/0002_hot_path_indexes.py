@@ -0,0 +1,43 @@
+"""token_version and indexes for the hot lookup paths
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2025-10-02 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "users",
+        sa.Column("token_version", sa.Integer(), nullable=False, server_default="0"),
+    )
+
+    # Una sola membresía por (usuario, equipo): se conserva la más antigua si hay duplicados
+    op.execute(
+        "DELETE FROM permissions a USING permissions b "
+        "WHERE a.user_id = b.user_id AND a.team_id = b.team_id AND a.id > b.id"
+    )
+    # El índice único también sirve para las búsquedas por (user_id, team_id) y por user_id
+    op.create_unique_constraint("uq_permissions_user_id_team_id", "permissions", ["user_id", "team_id"])
+    op.create_index("ix_permissions_team_id_role", "permissions", ["team_id", "role"])
+
+    # Listado de jugadas de un equipo, ordenado por fecha
+    op.create_index("ix_plays_team_id_created_at_id", "plays", ["team_id", "created_at", "id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_plays_team_id_created_at_id", table_name="plays")
+    op.drop_index("ix_permissions_team_id_role", table_name="permissions")
+    op.drop_constraint("uq_permissions_user_id_team_id", "permissions", type_="unique")
+    op.drop_column("users", "token_version")
@@ -0,0 +1,28 @@
+"""plays.data / plays.revision for the Postgres play store
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2025-10-08 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("plays", sa.Column("data", postgresql.JSONB(), nullable=True))
+    op.add_column("plays", sa.Column("revision", sa.Integer(), nullable=False, server_default="0"))
+
+
+def downgrade() -> None:
+    op.drop_column("plays", "revision")
+    op.drop_column("plays", "data")
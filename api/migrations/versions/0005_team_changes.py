@@ -0,0 +1,35 @@
+"""team_changes feed for delta sync
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2025-10-10 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "team_changes",
+        sa.Column("id", sa.BigInteger(), primary_key=True),
+        sa.Column("team_id", sa.Integer(), sa.ForeignKey("teams.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("entity", sa.String(), nullable=False),
+        sa.Column("entity_id", sa.Integer(), nullable=False),
+        sa.Column("op", sa.String(), nullable=False),
+        sa.Column("created_at", sa.TIMESTAMP(timezone=True), nullable=False, server_default=sa.func.now()),
+    )
+    op.create_index("ix_team_changes_team_id_id", "team_changes", ["team_id", "id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_team_changes_team_id_id", table_name="team_changes")
+    op.drop_table("team_changes")
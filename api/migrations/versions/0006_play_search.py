@@ -0,0 +1,60 @@
+"""play tags and search indexes
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2025-10-14 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision: str = "0006"
+down_revision: Union[str, None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # pg_trgm: similitud de nombres (erratas, fragmentos); btree_gin: team_id dentro de los índices GIN
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gin")
+
+    op.add_column(
+        "plays",
+        sa.Column("tags", postgresql.ARRAY(sa.String()), nullable=False, server_default="{}"),
+    )
+
+    # Una columna generada exige una expresión IMMUTABLE (array_to_string no lo es): se envuelve en una función.
+    # Configuración 'simple': sin stemming, los nombres de jugadas mezclan español e inglés
+    op.execute("""
+        CREATE FUNCTION play_search_document(name text, tags text[]) RETURNS tsvector
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+            SELECT setweight(to_tsvector('simple', coalesce(name, '')), 'A')
+                || setweight(to_tsvector('simple', array_to_string(coalesce(tags, '{}'), ' ')), 'B')
+        $$
+    """)
+    # Reescribe la tabla plays una vez (ver nota en el README)
+    op.execute(
+        "ALTER TABLE plays ADD COLUMN search_vector tsvector "
+        "GENERATED ALWAYS AS (play_search_document(name, tags)) STORED"
+    )
+
+    op.create_index("ix_plays_team_id_search_vector", "plays", ["team_id", "search_vector"], postgresql_using="gin")
+    op.create_index(
+        "ix_plays_team_id_name_trgm", "plays", ["team_id", "name"],
+        postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"},
+    )
+    op.create_index("ix_plays_team_id_tags", "plays", ["team_id", "tags"], postgresql_using="gin")
+
+
+def downgrade() -> None:
+    op.drop_index("ix_plays_team_id_tags", table_name="plays")
+    op.drop_index("ix_plays_team_id_name_trgm", table_name="plays")
+    op.drop_index("ix_plays_team_id_search_vector", table_name="plays")
+    op.drop_column("plays", "search_vector")
+    op.execute("DROP FUNCTION play_search_document(text, text[])")
+    op.drop_column("plays", "tags")
@@ -0,0 +1,47 @@
+# tests/test_auth.py
+import asyncio
+
+from app.core import auth
+
+
+def test_hashing_works_after_executor_shutdown():
+    hashed = asyncio.run(auth.get_password_hash("secret"))
+    auth.shutdown_hash_executor()
+    assert asyncio.run(auth.verify_password("secret", hashed))
+    auth.shutdown_hash_executor()
+
+
+def test_app_lifespan_can_run_twice():
+    from main import app
+
+    async def run_twice():
+        for _ in range(2):
+            async with app.router.lifespan_context(app):
+                hashed = await auth.get_password_hash("secret")
+                assert await auth.verify_password("secret", hashed)
+
+    asyncio.run(run_twice())
+
+
+def test_cancelled_hash_keeps_its_slot_until_the_thread_finishes():
+    import threading
+
+    release = threading.Event()
+
+    async def scenario():
+        task = asyncio.create_task(auth._run_hash("hash", release.wait, 5))
+        await asyncio.sleep(0.05)
+        assert auth._pending_hashes == 1
+        task.cancel()
+        await asyncio.sleep(0.05)
+        # El cliente se fue, pero el hilo sigue ocupado
+        assert auth._pending_hashes == 1
+        release.set()
+        for _ in range(100):
+            if auth._pending_hashes == 0:
+                break
+            await asyncio.sleep(0.01)
+        assert auth._pending_hashes == 0
+
+    asyncio.run(scenario())
+    auth.shutdown_hash_executor()
@@ -0,0 +1,31 @@
+# tests/test_bootstrap.py
+import asyncio
+import importlib
+
+from app.services.play_store import InMemoryPlayStore
+
+# app.routes exporta el router con el mismo nombre que el módulo
+bootstrap = importlib.import_module("app.routes.bootstrap")
+
+
+def test_data_is_capped_by_bytes_in_play_order(monkeypatch):
+    store = InMemoryPlayStore()
+    asyncio.run(store.created(None, [(play_id, {"blob": "x" * 100}) for play_id in (1, 2, 3, 4)]))
+    monkeypatch.setattr(bootstrap, "BOOTSTRAP_DATA_BATCH_SIZE", 2)
+    monkeypatch.setattr(bootstrap, "BOOTSTRAP_MAX_DATA_BYTES", 350)
+
+    # 5 aún no tiene datos (alta pendiente): se incluye, con data null
+    data_map, included = asyncio.run(bootstrap._read_data(None, store, [3, 5, 1, 4, 2]))
+
+    assert included == [3, 5, 1, 4]
+    assert sorted(data_map) == [1, 3, 4]
+
+
+def test_all_data_fits(monkeypatch):
+    store = InMemoryPlayStore()
+    asyncio.run(store.created(None, [(1, {"a": 1}), (2, {"b": 2})]))
+
+    data_map, included = asyncio.run(bootstrap._read_data(None, store, [2, 1]))
+
+    assert included == [2, 1]
+    assert data_map == {1: b'{"a":1}', 2: b'{"b":2}'}
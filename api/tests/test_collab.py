@@ -0,0 +1,220 @@
+# tests/test_collab.py
+# Escritura agrupada de las salas de edición con el almacén en memoria (sin Postgres: los roles se
+# siembran en la caché y el feed de cambios se sustituye)
+import asyncio
+
+import pytest
+
+from app.core.roles import remember_roles
+from app.services import changes, collab
+from app.services.play_store import InMemoryPlayStore
+
+PLAY_ID = 1
+TEAM_ID = 10
+
+
+class RecordingStore(InMemoryPlayStore):
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+
+    async def patch(self, play_id, operations=None, merge=None, expected_revision=None, user_id=None) -> int:
+        self.calls.append((user_id, expected_revision, operations))
+        return await super().patch(play_id, operations, merge, expected_revision, user_id)
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent = []
+        self.closed_with = None
+
+    async def send_text(self, text: str) -> None:
+        self.sent.append(text)
+
+    async def close(self, code: int) -> None:
+        self.closed_with = code
+
+
+class FakeBroker:
+    def __init__(self):
+        self.published = []
+
+    async def publish(self, channel: str, message: dict) -> None:
+        self.published.append(message)
+
+
+@pytest.fixture
+def store(monkeypatch):
+    store = RecordingStore()
+    asyncio.run(store.created(None, [(PLAY_ID, {"players": []})]))
+    monkeypatch.setattr(collab, "get_play_store", lambda: store)
+
+    async def record_play_update(team_id, play_id):
+        pass
+
+    monkeypatch.setattr(changes, "record_play_update", record_play_update)
+    return store
+
+
+@pytest.fixture
+def broker(monkeypatch):
+    broker = FakeBroker()
+    monkeypatch.setattr(collab, "_broker", broker)
+    return broker
+
+
+def _room(*user_ids: int) -> collab.Room:
+    room = collab.Room(PLAY_ID, TEAM_ID)
+    room.revision, room.data = 1, {"players": []}
+    room.loaded = True
+    for user_id in user_ids:
+        connection = collab.Connection(FakeWebSocket(), user_id, can_edit=True)
+        room.connections[connection.id] = connection
+    return room
+
+
+def _add(index: int) -> list[dict]:
+    return [{"op": "add", "path": "/players/-", "value": index}]
+
+
+def test_flush_writes_one_revision_per_author(store, broker):
+    remember_roles(1, {TEAM_ID: "editor"})
+    remember_roles(2, {TEAM_ID: "admin"})
+    room = _room(1, 2)
+    room.add_pending(1, _add(0))
+    room.add_pending(1, _add(1))
+    room.add_pending(2, _add(2))
+    room.add_pending(1, _add(3))
+
+    asyncio.run(room.flush())
+
+    assert [(user_id, expected) for user_id, expected, _ in store.calls] == [(1, 1), (2, 2), (1, 3)]
+    assert room.revision == 4
+    assert asyncio.run(store.read_data(PLAY_ID)) == (4, {"players": [0, 1, 2, 3]})
+    assert {"play_id": PLAY_ID, "type": "saved", "revision": 4, "origin": collab.WORKER_ID} in broker.published
+
+
+def test_flush_retries_on_top_of_another_workers_write(store, broker):
+    remember_roles(1, {TEAM_ID: "editor"})
+    room = _room(1)
+    room.add_pending(1, _add(1))
+    # Otro worker guardó antes sus ediciones: la revisión de la sala ya no es la actual
+    asyncio.run(store.patch(PLAY_ID, operations=_add(0)))
+
+    asyncio.run(room.flush())
+
+    assert [expected for _, expected, _ in store.calls] == [None, 1, 2]
+    assert room.revision == 3
+    assert asyncio.run(store.read_data(PLAY_ID)) == (3, {"players": [0, 1]})
+    assert not any(message.get("type") == "reload" for message in broker.published)
+
+
+def test_flush_drops_edits_of_users_who_lost_the_editor_role(store, broker):
+    remember_roles(1, {TEAM_ID: "editor"})
+    remember_roles(2, {TEAM_ID: "viewer"})
+    remember_roles(3, {TEAM_ID: None})
+    room = _room(1, 2, 3)
+    room.add_pending(2, _add(2))
+    room.add_pending(3, _add(3))
+    room.add_pending(1, _add(1))
+
+    asyncio.run(room.flush())
+
+    assert [user_id for user_id, _, _ in store.calls] == [1]
+    assert asyncio.run(store.read_data(PLAY_ID)) == (2, {"players": [1]})
+    connections = {connection.user_id: connection for connection in room.connections.values()}
+    assert connections[1].can_edit and not connections[2].can_edit
+    assert 3 not in connections
+    # Las copias en memoria tienen las ediciones descartadas: todas las salas se recargan
+    assert {"play_id": PLAY_ID, "type": "reload"} in broker.published
+
+
+def test_saved_from_another_worker_advances_the_room_revision(store, broker, monkeypatch):
+    room = _room(1)
+    monkeypatch.setitem(collab._rooms, PLAY_ID, room)
+
+    asyncio.run(collab._on_event({"play_id": PLAY_ID, "type": "saved", "revision": 5, "origin": "other"}))
+
+    assert room.revision == 5
+    (connection,) = room.connections.values()
+    assert connection.websocket.sent == ['{"type":"saved","revision":5}']
+
+
+def test_transient_store_errors_keep_the_unwritten_edits(store, broker, monkeypatch):
+    remember_roles(1, {TEAM_ID: "editor"})
+    remember_roles(2, {TEAM_ID: "editor"})
+    room = _room(1, 2)
+    room.add_pending(1, _add(1))
+    room.add_pending(2, _add(2))
+
+    patch = store.patch
+
+    async def flaky_patch(play_id, operations=None, merge=None, expected_revision=None, user_id=None):
+        if user_id == 2:
+            raise ConnectionError("mongo is down")
+        return await patch(play_id, operations, merge, expected_revision, user_id)
+
+    monkeypatch.setattr(store, "patch", flaky_patch)
+    asyncio.run(room.flush())
+
+    # El primer tramo se guardó; el segundo sigue pendiente y la sala no se recarga
+    assert asyncio.run(store.read_data(PLAY_ID)) == (2, {"players": [1]})
+    assert room.pending == [(2, _add(2))]
+    assert not any(message.get("type") == "reload" for message in broker.published)
+
+    monkeypatch.setattr(store, "patch", patch)
+    asyncio.run(room.flush())
+    assert asyncio.run(store.read_data(PLAY_ID)) == (3, {"players": [1, 2]})
+    assert room.pending == []
+
+
+def test_flush_all_keeps_going_after_a_failing_room(store, broker, monkeypatch):
+    remember_roles(1, {TEAM_ID: "editor"})
+    broken, room = collab.Room(2, TEAM_ID), _room(1)
+    room.add_pending(1, _add(1))
+
+    async def fail():
+        raise RuntimeError("boom")
+
+    broken.flush = fail
+    monkeypatch.setattr(collab, "_rooms", {2: broken, PLAY_ID: room})
+    asyncio.run(collab.flush_all())
+
+    assert asyncio.run(store.read_data(PLAY_ID)) == (2, {"players": [1]})
+    # Salas sin conexiones ni ediciones pendientes se liberan
+    assert collab._rooms == {PLAY_ID: room}
+
+
+def _connection(room: collab.Room) -> collab.Connection:
+    return next(iter(room.connections.values()))
+
+
+def test_edits_are_applied_in_place(store, broker):
+    room = _room(1)
+    data = room.data
+    asyncio.run(collab.handle_message(room, _connection(room), '{"type": "patch", "ops": [{"op": "add", "path": "/players/-", "value": 1}]}'))
+
+    assert room.data is data and data == {"players": [1]}
+    assert room.pending == [(1, _add(1))]
+
+
+def test_invalid_first_op_leaves_the_room_untouched(store, broker):
+    room = _room(1)
+    data = room.data
+    asyncio.run(collab.handle_message(room, _connection(room), '{"type": "patch", "ops": [{"op": "remove", "path": "/nope"}]}'))
+
+    assert room.data is data and data == {"players": []}
+    assert '"type":"error"' in _connection(room).websocket.sent[-1]
+
+
+def test_op_failing_partway_reloads_the_room(store, broker):
+    remember_roles(1, {TEAM_ID: "editor"})
+    room = _room(1)
+    room.add_pending(1, _add(0))
+    room.apply(_add(0))
+    ops = '[{"op": "add", "path": "/players/-", "value": 1}, {"op": "remove", "path": "/nope"}]'
+    asyncio.run(collab.handle_message(room, _connection(room), '{"type": "patch", "ops": ' + ops + '}'))
+
+    # Lo pendiente se guardó y la copia a medias se sustituyó por la guardada
+    assert asyncio.run(store.read_data(PLAY_ID)) == (2, {"players": [0]})
+    assert (room.revision, room.data, room.pending) == (2, {"players": [0]}, [])
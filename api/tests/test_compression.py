@@ -0,0 +1,95 @@
+# tests/test_compression.py
+import asyncio
+import gzip
+
+import orjson
+import pytest
+
+from app.core import compression, serialization
+
+PAYLOAD = orjson.dumps({"frames": [{"t": i, "players": [{"x": i % 7, "y": i % 5}] * 5} for i in range(500)]})
+
+needs_zstd = pytest.mark.skipif(compression.zstandard is None, reason="zstandard no instalado")
+
+
+@pytest.mark.parametrize("encoding", ["gzip", pytest.param("zstd", marks=needs_zstd)])
+def test_round_trip(encoding):
+    blob = compression.compress(PAYLOAD, encoding)
+    assert len(blob) < len(PAYLOAD)
+    assert compression.decompress(blob, encoding) == PAYLOAD
+    assert compression.decompress(blob, encoding, max_size=len(PAYLOAD)) == PAYLOAD
+
+
+@pytest.mark.parametrize("encoding", ["gzip", pytest.param("zstd", marks=needs_zstd)])
+def test_decompressed_size_is_capped(encoding):
+    blob = compression.compress(b"0" * 1_000_000, encoding)
+    with pytest.raises(compression.DecompressedTooLarge):
+        compression.decompress(blob, encoding, max_size=1000)
+
+
+@pytest.mark.parametrize("encoding", ["gzip", pytest.param("zstd", marks=needs_zstd)])
+def test_stream_round_trip(encoding):
+    async def chunks():
+        for start in range(0, len(PAYLOAD), 4096):
+            yield PAYLOAD[start:start + 4096]
+
+    async def collect():
+        return b"".join([part async for part in compression.compress_stream(chunks(), encoding)])
+
+    assert compression.decompress(asyncio.run(collect()), encoding) == PAYLOAD
+
+
+def test_gzip_is_deterministic():
+    assert compression.compress(PAYLOAD, "gzip") == compression.compress(PAYLOAD, "gzip")
+    assert gzip.decompress(compression.compress(PAYLOAD, "gzip")) == PAYLOAD
+
+
+@pytest.mark.parametrize("blob, encoding", [
+    (b"not gzip", "gzip"),
+    pytest.param(b"not zstd", "zstd", marks=needs_zstd),
+    (b"", "br"),
+])
+def test_invalid_bodies(blob, encoding):
+    with pytest.raises(compression.DecompressionError):
+        compression.decompress(blob, encoding)
+
+
+@pytest.mark.parametrize("accept_encoding, expected", [
+    (None, None),
+    ("", None),
+    ("identity", None),
+    ("gzip", "gzip"),
+    ("gzip;q=0, deflate", None),
+    ("*", compression.ENCODINGS[0]),
+    ("gzip, *;q=0", "gzip"),
+    pytest.param("gzip, deflate, br, zstd", "zstd", marks=needs_zstd),
+    pytest.param("zstd;q=0.5, gzip", "gzip", marks=needs_zstd),
+    pytest.param("GZIP;q=0.8, zstd;q=bad", "gzip", marks=needs_zstd),
+])
+def test_negotiate(accept_encoding, expected):
+    assert compression.negotiate(accept_encoding) == expected
+
+
+def test_small_responses_are_not_compressed():
+    assert compression.response_encoding("gzip", compression.RESPONSE_COMPRESSION_MIN_BYTES - 1) is None
+    assert compression.response_encoding("gzip", compression.RESPONSE_COMPRESSION_MIN_BYTES) == "gzip"
+
+
+@pytest.mark.parametrize("encoding", ["gzip", pytest.param("zstd", marks=needs_zstd)])
+def test_stored_documents_round_trip(monkeypatch, encoding):
+    monkeypatch.setattr(serialization, "STORES_BSON", False)
+    monkeypatch.setattr(serialization, "STORES_JSON", True)
+    monkeypatch.setattr(compression, "PLAY_DATA_COMPRESSION", encoding)
+    monkeypatch.setattr(compression, "PLAY_DATA_COMPRESSION_MIN_BYTES", 1024)
+    data = orjson.loads(PAYLOAD)
+
+    doc = serialization.play_document(1, data)
+    assert doc["data_encoding"] == encoding
+    assert serialization.data_json_bytes(doc) == PAYLOAD
+    assert serialization.data_object(doc) == data
+
+    small = serialization.play_document(2, {"a": 1})
+    assert "data_encoding" not in small
+    assert serialization.data_json_bytes(small) == b'{"a":1}'
+    # Al reescribir sin comprimir se borra la codificación anterior
+    assert serialization.play_data_update({"a": 1})["$unset"] == {"data": "", "data_encoding": ""}
@@ -0,0 +1,187 @@
+# tests/test_jsonpatch.py
+import pytest
+
+from app.core.jsonpatch import (
+    PatchError,
+    apply_merge_patch,
+    apply_patch,
+    json_equal,
+    make_patch,
+    merge_patch_operations,
+    mongo_object_filter,
+    to_mongo_update,
+)
+
+
+# ---------------- op "test" ----------------
+@pytest.mark.parametrize("stored, expected", [
+    (1, True),
+    (0, False),
+    (True, 1),
+    ({"a": 1}, {"a": True}),
+    ([1, 0], [True, False]),
+    (None, False),
+    ("1", 1),
+    ({"a": 1}, {"a": 1, "b": None}),
+])
+def test_test_op_requires_same_json_type(stored, expected):
+    with pytest.raises(PatchError):
+        apply_patch({"v": stored}, [{"op": "test", "path": "/v", "value": expected}])
+
+
+@pytest.mark.parametrize("stored, expected", [
+    (1, 1.0),
+    (True, True),
+    (None, None),
+    ({"a": [1, {"b": "x"}]}, {"a": [1, {"b": "x"}]}),
+])
+def test_test_op_passes_on_equal_values(stored, expected):
+    assert apply_patch({"v": stored}, [{"op": "test", "path": "/v", "value": expected}]) == {"v": stored}
+
+
+def test_json_equal_is_symmetric():
+    assert not json_equal(1, True) and not json_equal(True, 1)
+    assert json_equal(2.0, 2) and json_equal(2, 2.0)
+
+
+# ---------------- merge patch -> Mongo ----------------
+def test_merge_patch_replaces_array_with_object():
+    doc = {"frames": [{"t": 0}, {"t": 1}]}
+    assert apply_merge_patch(doc, {"frames": {"3": {"t": 3}}}) == {"frames": {"3": {"t": 3}}}
+
+
+@pytest.mark.parametrize("patch", [
+    {"frames": {"3": {"t": 3}}},
+    {"3": 1},
+    {"a": {"b": {"0": None}}},
+    {"list": {"-": 1}},
+])
+def test_merge_patch_with_array_like_keys_is_not_translated(patch):
+    # Mongo leería "frames.3" como índice de array: se aplica leyendo el documento
+    assert merge_patch_operations(patch) is None
+
+
+def test_nested_null_under_scalar_sets_empty_object():
+    assert apply_merge_patch({"a": 5}, {"a": {"b": None}}) == {"a": {}}
+    assert apply_merge_patch({}, {"a": {"b": None}}) == {"a": {}}
+
+
+def test_nested_merge_requires_object_parents():
+    operations, objects = merge_patch_operations({"a": {"b": None, "c": {"d": 1}}, "e": 2})
+    assert operations == [
+        {"op": "remove", "path": "/a/b"},
+        {"op": "add", "path": "/a/c/d", "value": 1},
+        {"op": "add", "path": "/e", "value": 2},
+    ]
+    # Si data, data.a o data.a.c no son objetos, la consulta no coincide y se usa leer-aplicar-escribir
+    assert mongo_object_filter(objects) == {
+        "data": {"$type": "object"},
+        "data.a": {"$type": "object"},
+        "data.a.c": {"$type": "object"},
+    }
+    assert to_mongo_update(operations, strict=False) == (
+        {"$set": {"data.a.c.d": 1, "data.e": 2}, "$unset": {"data.a.b": ""}}, []
+    )
+
+
+def test_object_filter_rejects_keys_mongo_cannot_address():
+    assert mongo_object_filter(["/a.b"]) is None
+
+
+# ---------------- apply_patch ----------------
+def test_apply_patch_operations():
+    doc = {"players": [{"x": 0}], "meta": {"name": "Horns"}}
+    result = apply_patch(doc, [
+        {"op": "add", "path": "/players/-", "value": {"x": 1}},
+        {"op": "replace", "path": "/players/0/x", "value": 5},
+        {"op": "copy", "from": "/meta/name", "path": "/title"},
+        {"op": "move", "from": "/meta/name", "path": "/meta/label"},
+        {"op": "remove", "path": "/players/1"},
+        {"op": "add", "path": "/a~1b", "value": 1},
+    ])
+    assert result == {"players": [{"x": 5}], "meta": {"label": "Horns"}, "title": "Horns", "a/b": 1}
+    # El documento original no cambia
+    assert doc == {"players": [{"x": 0}], "meta": {"name": "Horns"}}
+
+
+@pytest.mark.parametrize("operation", [
+    {"op": "remove", "path": "/missing"},
+    {"op": "replace", "path": "/players/3", "value": 1},
+    {"op": "add", "path": "/players/01", "value": 1},
+    {"op": "add", "path": "players", "value": 1},
+    {"op": "add", "path": "/x"},
+    {"op": "move", "from": "/players", "path": "/players/0"},
+    {"op": "remove", "path": ""},
+    {"op": "swap", "path": "/players"},
+    {"path": "/players"},
+])
+def test_apply_patch_rejects_invalid_operations(operation):
+    with pytest.raises(PatchError):
+        apply_patch({"players": [{"x": 0}]}, [operation])
+
+
+# ---------------- make_patch ----------------
+@pytest.mark.parametrize("source, target", [
+    ({"a": 1, "b": 2}, {"a": 1, "c": 3}),
+    ({"players": [{"x": 0}, {"x": 1}]}, {"players": [{"x": 0}, {"x": 2}]}),
+    ({"players": [1]}, {"players": [1, 2, 3]}),
+    ({"players": [1, 2, 3]}, {"players": [3]}),
+    ({"a/b": {"~c": 1}}, {"a/b": {"~c": 2}}),
+    ([1], {"a": 1}),
+])
+def test_make_patch_round_trip(source, target):
+    assert apply_patch(source, make_patch(source, target)) == target
+
+
+def test_make_patch_is_minimal():
+    assert make_patch({"a": 1}, {"a": 1}) == []
+    assert make_patch({"p": [{"x": 0}, {"x": 1}]}, {"p": [{"x": 0}, {"x": 2}]}) == [
+        {"op": "replace", "path": "/p/1/x", "value": 2}
+    ]
+    assert make_patch({"p": [1]}, {"p": [1, 2]}) == [{"op": "add", "path": "/p/-", "value": 2}]
+
+
+# ---------------- to_mongo_update ----------------
+def test_to_mongo_update_translates_unambiguous_operations():
+    update, must_exist = to_mongo_update([
+        {"op": "replace", "path": "/meta/name", "value": "Horns"},
+        {"op": "add", "path": "/meta/tags", "value": []},
+        {"op": "add", "path": "/players/-", "value": 1},
+        {"op": "add", "path": "/players/-", "value": 2},
+        {"op": "remove", "path": "/old"},
+    ])
+    assert update == {
+        "$set": {"data.meta.name": "Horns", "data.meta.tags": []},
+        "$unset": {"data.old": ""},
+        "$push": {"data.players": {"$each": [1, 2]}},
+    }
+    assert must_exist == ["data.meta.name", "data.meta", "data.players", "data.old"]
+
+
+@pytest.mark.parametrize("operations", [
+    [{"op": "replace", "path": "/players/0", "value": 1}],
+    [{"op": "remove", "path": "/players/0"}],
+    [{"op": "add", "path": "/a.b", "value": 1}],
+    [{"op": "add", "path": "/$where", "value": 1}],
+    [{"op": "move", "from": "/a", "path": "/b"}],
+    [{"op": "test", "path": "/a", "value": 1}],
+    [{"op": "replace", "path": "", "value": {}}],
+    [{"op": "add", "path": "/a", "value": {}}, {"op": "add", "path": "/a/b", "value": 1}],
+    [{"op": "replace", "path": "/a", "value": 1}, {"op": "replace", "path": "/a", "value": 2}],
+    [{"op": "add", "path": "/a/-", "value": 1}, {"op": "replace", "path": "/a", "value": []}],
+    [],
+])
+def test_to_mongo_update_falls_back_when_ambiguous(operations):
+    assert to_mongo_update(operations) is None
+
+
+def test_in_place_variants_reuse_the_document():
+    doc = {"players": [{"x": 0}], "meta": {"name": "Horns"}}
+    result = apply_patch(doc, [{"op": "replace", "path": "/players/0/x", "value": 1}], in_place=True)
+    assert result is doc and doc["players"][0]["x"] == 1
+
+    merged = apply_merge_patch(doc, {"meta": {"name": None, "set": "Spain"}}, in_place=True)
+    assert merged is doc and doc["meta"] == {"set": "Spain"}
+
+    copy = apply_merge_patch(doc, {"meta": {"set": "Chicago"}})
+    assert copy is not doc and doc["meta"] == {"set": "Spain"}
@@ -0,0 +1,26 @@
+# tests/test_lifespan.py
+import asyncio
+
+import main
+from app.core import auth
+
+
+def test_shutdown_closes_pools_when_the_drains_fail(monkeypatch):
+    closed = []
+
+    async def unreachable():
+        raise ConnectionRefusedError("postgres is down")
+
+    async def dispose_engine():
+        closed.append("postgres")
+
+    monkeypatch.setattr(main.collab, "flush_all", unreachable)
+    monkeypatch.setattr(main.postgres, "dispose_engine", dispose_engine)
+
+    async def run():
+        async with main.app.router.lifespan_context(main.app):
+            pass
+
+    asyncio.run(run())
+    assert closed == ["postgres"]
+    assert auth._hash_executor is None
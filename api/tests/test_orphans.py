@@ -0,0 +1,23 @@
+# tests/test_orphans.py
+import asyncio
+
+from app.jobs import orphans
+
+
+async def _ids(values):
+    for value in values:
+        yield value
+
+
+def _batches(pg_ids, mongo_ids, max_id, batch_size):
+    async def collect():
+        return [batch async for batch in orphans.orphan_batches(_ids(pg_ids), _ids(mongo_ids), max_id, batch_size)]
+    return asyncio.run(collect())
+
+
+def test_orphan_batches_are_the_mongo_ids_missing_in_postgres():
+    assert _batches([1, 2, 4, 7], [1, 2, 3, 4, 5, 6, 7, 8], max_id=7, batch_size=2) == [[3, 5], [6]]
+
+
+def test_orphan_batches_ignore_plays_created_after_the_scan_started():
+    assert _batches([2], [1, 2, 9, 10], max_id=5, batch_size=10) == [[1]]
@@ -0,0 +1,99 @@
+# tests/test_outbox.py
+# Los eventos del outbox se pueden aplicar más de una vez (reintentos, un worker que murió tras escribir
+# en Mongo y antes del commit en Postgres): repetirlos no cambia el resultado.
+import asyncio
+
+import pytest
+from pymongo import DeleteMany, DeleteOne, UpdateOne
+
+from app.core import serialization
+from app.models import OutboxEvent
+from app.services import outbox, revisions
+
+
+class FakeCollection:
+    def __init__(self, name: str):
+        self.name = name
+        self.docs: list[dict] = []
+
+    @staticmethod
+    def _matches(doc: dict, query: dict) -> bool:
+        return all(
+            doc.get(key) in value["$in"] if isinstance(value, dict) else doc.get(key) == value
+            for key, value in query.items()
+        )
+
+    async def bulk_write(self, operations: list, ordered: bool = True) -> None:
+        for operation in operations:
+            if isinstance(operation, UpdateOne):
+                assert operation._upsert and set(operation._doc) == {"$setOnInsert"}
+                if not any(self._matches(doc, operation._filter) for doc in self.docs):
+                    self.docs.append({**operation._filter, **operation._doc["$setOnInsert"]})
+            elif isinstance(operation, DeleteOne):
+                matches = [doc for doc in self.docs if self._matches(doc, operation._filter)]
+                if matches:
+                    self.docs.remove(matches[0])
+            elif isinstance(operation, DeleteMany):
+                self.docs = [doc for doc in self.docs if not self._matches(doc, operation._filter)]
+
+
+@pytest.fixture
+def collections(monkeypatch):
+    plays, history = FakeCollection("plays_data"), FakeCollection("play_revisions")
+    monkeypatch.setattr(outbox, "get_plays_collection", lambda: plays)
+    monkeypatch.setattr(outbox, "get_revisions_collection", lambda: history)
+    monkeypatch.setattr(revisions, "PLAY_REVISION_HISTORY", True)
+    return plays, history
+
+
+def _upsert(play_id: int, data) -> OutboxEvent:
+    return OutboxEvent(kind="play_upsert", aggregate_id=play_id, payload={"data": data, "user_id": 7})
+
+
+def _data(collection: FakeCollection) -> dict:
+    return {doc["play_id"]: serialization.data_object(doc) for doc in collection.docs}
+
+
+def test_play_upsert_only_inserts():
+    operation = outbox._play_operation(_upsert(1, {"a": 1}))
+    assert isinstance(operation, UpdateOne)
+    assert operation._filter == {"play_id": 1}
+    assert operation._upsert
+    assert operation._doc == {"$setOnInsert": serialization.play_document(1, {"a": 1})}
+
+
+def test_replaying_events_is_idempotent(collections):
+    plays, history = collections
+    events = [_upsert(1, {"a": 1}), _upsert(2, {"b": 2}), _upsert(3, {"c": 3}),
+              OutboxEvent(kind="play_delete", aggregate_id=2, payload={})]
+
+    assert asyncio.run(outbox._apply(events)) == (4, None)
+    first = (_data(plays), [(doc["play_id"], doc["rev"]) for doc in history.docs])
+    assert asyncio.run(outbox._apply(events)) == (4, None)
+
+    assert (_data(plays), [(doc["play_id"], doc["rev"]) for doc in history.docs]) == first
+    assert first == ({1: {"a": 1}, 3: {"c": 3}}, [(1, 1), (3, 1)])
+
+
+def test_replayed_upsert_does_not_overwrite_a_later_write(collections):
+    plays, _ = collections
+    event = _upsert(1, {"a": 1})
+    asyncio.run(outbox._apply([event]))
+    # Un PUT posterior ya cambió el documento; el reintento del alta no lo pisa
+    plays.docs[0].update(serialization.play_data_update({"a": 2})["$set"], revision=2)
+
+    asyncio.run(outbox._apply([event]))
+
+    assert _data(plays) == {1: {"a": 2}}
+    assert plays.docs[0]["revision"] == 2
+
+
+def test_team_delete_removes_plays_and_history(collections):
+    plays, history = collections
+    asyncio.run(outbox._apply([_upsert(1, {}), _upsert(2, {}), _upsert(3, {})]))
+
+    team_delete = OutboxEvent(kind="team_delete", aggregate_id=10, payload={"play_ids": [1, 2]})
+    asyncio.run(outbox._apply([team_delete, team_delete]))
+
+    assert list(_data(plays)) == [3]
+    assert [doc["play_id"] for doc in history.docs] == [3]
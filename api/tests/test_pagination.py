@@ -0,0 +1,66 @@
+# tests/test_pagination.py
+import base64
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.pagination import decode_cursor, encode_cursor
+from app.routes.plays import _data_paths
+from tests.conftest import requires_postgres
+
+
+def test_cursor_round_trip():
+    values = ["2024-05-01T10:00:00+00:00", 42]
+    cursor = encode_cursor(values)
+    assert "=" not in cursor
+    assert decode_cursor(cursor, 2) == values
+
+
+@pytest.mark.parametrize("cursor", [
+    "not base64 !",
+    base64.urlsafe_b64encode(b"{not json").decode(),
+    encode_cursor({"id": 1}),
+    encode_cursor([1, 2]),
+])
+def test_invalid_cursor_is_a_400(cursor):
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor(cursor, 1)
+    assert exc.value.status_code == 400
+
+
+@requires_postgres
+@pytest.mark.parametrize("path", ["/teams/", "/plays/{team_id}"])
+def test_cursor_with_wrong_types_is_a_400(client, user, team, path):
+    path = path.format(team_id=team["id"])
+    for cursor in (encode_cursor(["1"]), encode_cursor(["2024-05-01T10:00:00+00:00", "1"])):
+        response = client.get(path, params={"cursor": cursor}, headers=user)
+        assert response.status_code == 400, response.text
+
+
+@requires_postgres
+def test_play_list_pages_with_cursor(client, user, team):
+    created = []
+    for i in range(5):
+        response = client.post("/plays/", json={"team_id": team["id"], "name": f"Play {i}", "data": {}}, headers=user)
+        created.append(response.json()["id"])
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        response = client.get(f"/plays/{team['id']}", params=params, headers=user)
+        assert response.status_code == 200, response.text
+        seen += [play["id"] for play in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert seen == created
+
+
+@pytest.mark.parametrize("selected, expected", [
+    ({"id", "name"}, None),
+    ({"data", "data.frames"}, []),
+    ({"data.frames", "data.frames.0", "data.meta.name"}, ["frames", "meta.name"]),
+    ({"data.frames.0.players", "data.frames.0", "data.framesets"}, ["frames.0", "framesets"]),
+])
+def test_data_paths_drop_overlapping_projections(selected, expected):
+    assert _data_paths(selected) == expected
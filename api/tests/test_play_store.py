@@ -0,0 +1,129 @@
+# tests/test_play_store.py
+# Contrato de PlayStore con el almacén en memoria (el que usan los tests de rutas) y las rutas de
+# jugadas sobre él (Postgres para los metadatos: se saltan sin TEST_POSTGRES_URL)
+import asyncio
+
+import orjson
+import pytest
+from fastapi import HTTPException
+
+from app.services.play_store import InMemoryPlayStore, get_play_store
+from tests.conftest import register, requires_postgres
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+@pytest.fixture
+def store():
+    store = InMemoryPlayStore()
+    run(store.created(None, [(1, {"players": [], "meta": {"name": "Horns"}})]))
+    return store
+
+
+def test_suite_uses_the_memory_store():
+    assert isinstance(get_play_store(), InMemoryPlayStore)
+
+
+def test_writes_bump_the_revision(store):
+    assert run(store.patch(1, operations=[{"op": "add", "path": "/players/-", "value": 1}])) == 2
+    assert run(store.patch(1, merge={"meta": {"name": None, "set": "Spain"}}, expected_revision=2)) == 3
+    assert run(store.save(1, {"replaced": True}, expected_revision=3)) == 4
+    assert run(store.read_data(1)) == (4, {"replaced": True})
+
+
+def test_read_data_returns_a_copy(store):
+    _, data = run(store.read_data(1))
+    data["players"].append("mutated")
+    assert run(store.read_data(1))[1]["players"] == []
+
+
+@pytest.mark.parametrize("write, status_code", [
+    (lambda store: store.save(1, {}, expected_revision=5), 412),
+    (lambda store: store.patch(1, operations=[], expected_revision=0), 412),
+    (lambda store: store.patch(1, operations=[{"op": "remove", "path": "/missing"}]), 422),
+    (lambda store: store.patch(2, operations=[]), 404),
+])
+def test_failed_writes(store, write, status_code):
+    with pytest.raises(HTTPException) as exc:
+        run(write(store))
+    assert exc.value.status_code == status_code
+    assert run(store.read_data(1))[0] == 1
+
+
+def test_deleted_plays_are_gone(store):
+    run(store.play_deleted(None, 1))
+    assert run(store.read_data(1)) is None
+
+
+# ---------------- Rutas (almacén en memoria) ----------------
+@pytest.fixture
+def play(client, user, team) -> dict:
+    response = client.post("/plays/", json={
+        "team_id": team["id"], "name": "Horns", "data": {"players": [{"x": 0}]}, "tags": ["ato"],
+    }, headers=user)
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+@requires_postgres
+def test_if_match_protects_concurrent_writes(client, user, play):
+    url = f"/plays/{play['id']}/data"
+    first = client.put(url, json={"players": []}, headers={**user, "If-Match": '"1"'})
+    assert first.status_code == 200, first.text
+    assert first.headers["X-Play-Revision"] == "2"
+
+    stale = client.put(url, json={"players": [{"x": 9}]}, headers={**user, "If-Match": '"1"'})
+    assert stale.status_code == 412
+    assert stale.headers["X-Play-Revision"] == "2"
+
+
+@requires_postgres
+def test_merge_and_json_patch(client, user, play):
+    url = f"/plays/{play['id']}/data"
+    merged = client.patch(url, content=orjson.dumps({"meta": {"name": "Horns"}}),
+                          headers={**user, "Content-Type": "application/merge-patch+json"})
+    assert merged.status_code == 200, merged.text
+    patched = client.patch(url, content=orjson.dumps([{"op": "replace", "path": "/players/0/x", "value": 3}]),
+                           headers={**user, "Content-Type": "application/json-patch+json"})
+    assert patched.status_code == 200, patched.text
+    invalid = client.patch(url, content=orjson.dumps([{"op": "remove", "path": "/nope"}]),
+                           headers={**user, "Content-Type": "application/json-patch+json"})
+    assert invalid.status_code == 422
+
+    data = client.get(url, headers=user)
+    assert data.json()["data"] == {"players": [{"x": 3}], "meta": {"name": "Horns"}}
+    assert data.headers["X-Play-Revision"] == "3"
+    assert client.get(url, headers={**user, "If-None-Match": data.headers["ETag"]}).status_code == 304
+
+
+@requires_postgres
+def test_import_and_export(client, user, team):
+    body = b'{"name": "A", "data": {"n": 1}}\n{"name": ""}\n{"name": "B", "data": {"n": 2}, "tags": ["x"]}\n'
+    imported = client.post(f"/plays/{team['id']}/import", content=body,
+                           headers={**user, "Content-Type": "application/x-ndjson"})
+    assert imported.status_code == 201, imported.text
+    assert (imported.json()["created"], imported.json()["failed"]) == (2, 1)
+
+    exported = client.get(f"/plays/{team['id']}/export", headers=user)
+    assert exported.status_code == 200, exported.text
+    plays = [orjson.loads(line) for line in exported.content.splitlines() if line.strip()]
+    assert sorted((play["name"], play["data"]["n"]) for play in plays) == [("A", 1), ("B", 2)]
+
+
+@requires_postgres
+def test_viewers_cannot_write_and_history_needs_mongo(client, user, team, play):
+    viewer = register(client)
+    assert client.post(f"/teams/join/{team['invitation_code']}", headers=viewer).status_code == 200
+    url = f"/plays/{play['id']}/data"
+    assert client.get(url, headers=viewer).status_code == 200
+    assert client.put(url, json={}, headers=viewer).status_code == 403
+    assert client.get(f"/plays/{play['id']}/revisions", headers=user).status_code == 501
+
+
+@requires_postgres
+def test_deleted_play_is_gone(client, user, play):
+    assert client.delete(f"/plays/{play['id']}", headers=user).status_code == 204
+    assert client.get(f"/plays/{play['id']}/data", headers=user).status_code == 404
+    assert run(get_play_store().read_data(play["id"])) is None
@@ -0,0 +1,154 @@
+# tests/test_query_budget.py
+# QUERY_BUDGET_MODE=strict (conftest): una petición que se pasa de su presupuesto de consultas es un 500,
+# así que las rutas principales, ejecutadas aquí contra Postgres, fallan si aparece un N+1.
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core import query_stats
+from app.services import changes, outbox
+from tests.conftest import register, requires_postgres
+
+
+def _budget_app(queries: int) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(query_stats.QueryStatsMiddleware)
+
+    @app.get("/limited")
+    async def limited():
+        for _ in range(queries):
+            query_stats._record("pg", 0.001)
+        return {"ok": True}
+
+    @app.get("/unlimited")
+    @query_stats.query_budget(None)
+    async def unlimited():
+        for _ in range(queries):
+            query_stats._record("pg", 0.001)
+        return {"ok": True}
+
+    return app
+
+
+def test_strict_mode_is_enabled_for_the_suite():
+    assert query_stats.QUERY_BUDGET_MODE == "strict"
+
+
+def test_request_within_budget_gets_server_timing():
+    client = TestClient(_budget_app(query_stats.QUERY_BUDGET))
+    response = client.get("/limited")
+    assert response.status_code == 200
+    assert f'{query_stats.QUERY_BUDGET} queries' in response.headers["server-timing"]
+
+
+def test_request_over_budget_fails_in_strict_mode():
+    client = TestClient(_budget_app(query_stats.QUERY_BUDGET + 1))
+    response = client.get("/limited")
+    assert response.status_code == 500
+    assert "Query budget exceeded for /limited" in response.json()["detail"]
+    assert client.get("/unlimited").status_code == 200
+
+
+def test_outbox_wake_does_not_count_against_the_request(monkeypatch):
+    seen = []
+
+    async def drain():
+        seen.append(query_stats.current())
+
+    monkeypatch.setattr(outbox, "drain", drain)
+
+    async def scenario():
+        token = query_stats._current.set(query_stats.RequestStats({"type": "http"}))
+        try:
+            outbox.wake()
+        finally:
+            query_stats._current.reset(token)
+        await asyncio.gather(*outbox._wake_tasks)
+
+    asyncio.run(scenario())
+    assert seen == [None]
+
+
+# ---------------- Rutas principales (Postgres) ----------------
+@requires_postgres
+def test_auth_routes_within_budget(client):
+    headers = register(client)
+    me = client.get("/auth/me", headers=headers)
+    assert me.status_code == 200, me.text
+
+    login = client.post("/auth/login", json={"username": me.json()["username"], "password": "secret"})
+    assert login.status_code == 200, login.text
+
+
+@requires_postgres
+def test_team_routes_within_budget(client, user, team):
+    for path in ("/teams/", "/teams/me", f"/teams/{team['id']}/members", f"/teams/{team['id']}/invitation-code"):
+        response = client.get(path, headers=user)
+        assert response.status_code == 200, f"{path}: {response.text}"
+
+    other = register(client)
+    joined = client.post(f"/teams/join/{team['invitation_code']}", headers=other)
+    assert joined.status_code == 200, joined.text
+
+
+@requires_postgres
+def test_play_routes_within_budget(client, user, team):
+    team_id = team["id"]
+    plays = []
+    for i in range(5):
+        created = client.post("/plays/", json={
+            "team_id": team_id, "name": f"Horns {i}", "data": {"players": [], "step": i}, "tags": ["ato"],
+        }, headers=user)
+        assert created.status_code == 201, created.text
+        plays.append(created.json()["id"])
+    play_id = plays[0]
+
+    updated = client.put(f"/plays/{play_id}", json={"name": "Horns flare"}, headers=user)
+    assert updated.status_code == 200, updated.text
+    replaced = client.put(f"/plays/{play_id}/data", json={"players": [], "step": 10}, headers=user)
+    assert replaced.status_code == 200, replaced.text
+    patched = client.patch(
+        f"/plays/{play_id}/data", json=[{"op": "replace", "path": "/step", "value": 11}],
+        headers={**user, "Content-Type": "application/json-patch+json"},
+    )
+    assert patched.status_code == 200, patched.text
+
+    for path in (
+        f"/plays/{team_id}",
+        f"/plays/{team_id}/full",
+        f"/plays/{team_id}/search?q=horns",
+        f"/plays/{play_id}/data",
+        f"/teams/{team_id}/changes",
+        "/bootstrap?data=all",
+    ):
+        response = client.get(path, headers=user)
+        assert response.status_code == 200, f"{path}: {response.text}"
+
+    assert client.get(f"/plays/{play_id}/data", headers=user).json()["data"]["step"] == 11
+    deleted = client.delete(f"/plays/{plays[-1]}", headers=user)
+    assert deleted.status_code == 204, deleted.text
+
+
+@requires_postgres
+def test_rename_with_data_records_one_change(client, user, team, monkeypatch):
+    created = client.post("/plays/", json={"team_id": team["id"], "name": "Spain", "data": {"step": 0}}, headers=user)
+    assert created.status_code == 201, created.text
+
+    recorded = []
+    original = changes.record
+
+    async def counting_record(db_sess, team_id, entity, entity_ids, op="upsert"):
+        recorded.append((entity, entity_ids))
+        await original(db_sess, team_id, entity, entity_ids, op)
+
+    monkeypatch.setattr(changes, "record", counting_record)
+    play_id = created.json()["id"]
+    updated = client.put(f"/plays/{play_id}", json={"name": "Spain pick", "data": {"step": 1}}, headers=user)
+    assert updated.status_code == 200, updated.text
+    assert recorded == [("play", [play_id])]
+
+    recorded.clear()
+    renamed = client.put(f"/plays/{play_id}", json={"name": "Spain flare"}, headers=user)
+    assert renamed.status_code == 200, renamed.text
+    assert recorded == [("play", [play_id])]
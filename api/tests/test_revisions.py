@@ -0,0 +1,20 @@
+# tests/test_revisions.py
+import copy
+
+from app.services.revisions import apply_deltas
+
+
+def test_apply_deltas_rebuilds_from_a_snapshot():
+    snapshot = {"players": [{"x": 0}], "meta": {"name": "Horns"}}
+    deltas = [
+        {"rev": 2, "kind": "patch", "ops": [{"op": "add", "path": "/players/-", "value": {"x": 1}}]},
+        {"rev": 3, "kind": "merge", "merge": {"meta": {"name": "Spain"}}},
+        {"rev": 4, "kind": "patch", "ops": [{"op": "replace", "path": "/players/0/x", "value": 5}]},
+    ]
+    stored = copy.deepcopy(deltas)
+
+    assert apply_deltas(copy.deepcopy(snapshot), deltas) == {
+        "players": [{"x": 5}, {"x": 1}], "meta": {"name": "Spain"}
+    }
+    # Los deltas no quedan enlazados al resultado
+    assert deltas == stored
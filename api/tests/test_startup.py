@@ -0,0 +1,12 @@
+# tests/test_startup.py
+# Presupuesto de arranque de un worker (import + lifespan en un proceso nuevo, sin bases de datos)
+import pytest
+
+from benchmarks.startup import STARTUP_IMPORT_BUDGET_MS, STARTUP_LIFESPAN_BUDGET_MS, STORES, measure
+
+
+@pytest.mark.parametrize("store", STORES)
+def test_startup_within_budget(store):
+    timings = measure(store, runs=3)
+    assert timings["import_ms"] <= STARTUP_IMPORT_BUDGET_MS, timings
+    assert timings["lifespan_ms"] <= STARTUP_LIFESPAN_BUDGET_MS, timings